@@ -0,0 +1,121 @@
+"""
+Ciclo de vida e injeção de dependências da aplicação.
+
+No startup, cria uma instância por processo do pool de conexões, do
+gerenciador de tokens e do serviço de busca (com seu cache) e inicia o
+aquecimento do cache com os termos mais buscados; no shutdown, encerra
+tudo. As rotas recebem essas instâncias via Depends, o que permite
+trocá-las em testes com app.dependency_overrides.
+
+Também define o orçamento de tempo de cada rota (orcamento_da_rota).
+"""
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+
+from app.services.aquecimento_cache import AquecedorCache
+from app.services.autenticacao_mercadolivre import AutenticacaoMercadoLivre
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.services.prontidao import VerificadorProntidao
+from app.utils.metricas import encerrar_processo
+from app.utils.prazo import Orcamento, iniciar_orcamento
+from app.utils.registro import configurar_registro, encerrar_registro
+
+logger = logging.getLogger(__name__)
+
+
+class Servicos:
+    """Instâncias compartilhadas pelas requisições de um processo."""
+
+    def __init__(
+        self,
+        transporte: TransporteHTTP,
+        auth: AutenticacaoMercadoLivre,
+        produtos: ProdutosMercadoLivre,
+    ) -> None:
+        self.transporte = transporte
+        self.auth = auth
+        self.produtos = produtos
+        self.aquecimento = AquecedorCache(produtos)
+        self.prontidao = VerificadorProntidao(
+            auth, transporte, produtos, aquecimento=self.aquecimento
+        )
+
+    @classmethod
+    def criar(cls) -> "Servicos":
+        """Lê o .env e monta os serviços compartilhando o mesmo transporte e token."""
+        load_dotenv()
+        transporte = TransporteHTTP()
+        auth = AutenticacaoMercadoLivre(transporte=transporte)
+        produtos = ProdutosMercadoLivre(auth=auth, transporte=transporte)
+        return cls(transporte, auth, produtos)
+
+    async def fechar(self) -> None:
+        """
+        Cancela tarefas em segundo plano, grava as buscas frequentes e
+        fecha o armazenamento de tokens e as conexões.
+        """
+        await self.aquecimento.fechar()
+        await self.produtos.fechar()
+        await self.auth.fechar()
+        await self.transporte.encerrar()
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """
+    Lifespan do FastAPI: configura o registro, cria os serviços e começa a
+    aquecer o cache no startup, e os encerra no shutdown (o registro por
+    último, gravando o que restou).
+    """
+    servicos = Servicos.criar()
+    configurar_registro()
+    app.state.servicos = servicos
+    servicos.aquecimento.iniciar()
+    logger.info("🚀 Serviços do Mercado Livre iniciados")
+    try:
+        yield
+    finally:
+        await servicos.fechar()
+        logger.info("🛑 Serviços do Mercado Livre encerrados")
+        encerrar_processo()
+        encerrar_registro()
+
+
+def obter_servicos(request: Request) -> Servicos:
+    return request.app.state.servicos
+
+
+def obter_produtos_service(request: Request) -> ProdutosMercadoLivre:
+    return obter_servicos(request).produtos
+
+
+def obter_auth_service(request: Request) -> AutenticacaoMercadoLivre:
+    return obter_servicos(request).auth
+
+
+def obter_transporte_http(request: Request) -> TransporteHTTP:
+    return obter_servicos(request).transporte
+
+
+def obter_prontidao(request: Request) -> VerificadorProntidao:
+    return obter_servicos(request).prontidao
+
+
+def orcamento_da_rota(variavel: str, padrao: float):
+    """
+    Cria a dependência que inicia o orçamento de tempo da rota.
+
+    O valor, em segundos, vem da variável de ambiente informada (lida a
+    cada requisição); "0" deixa a rota sem prazo. As chamadas ao upstream
+    feitas durante a requisição limitam timeouts e novas tentativas a ele.
+    """
+    async def iniciar() -> Optional[Orcamento]:
+        return iniciar_orcamento(float(os.getenv(variavel, padrao)))
+
+    return iniciar
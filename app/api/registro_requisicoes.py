@@ -0,0 +1,55 @@
+"""
+Middleware que grava uma linha de resumo por requisição.
+
+Também registra a latência de ponta a ponta das rotas de busca nas
+métricas do Prometheus (app.utils.metricas).
+
+Em vez de vários registros ao longo da busca, os serviços anotam campos
+(termo, total, cache, chamadas ao upstream...) com app.utils.registro.anotar
+e contar, e esta linha os reúne com método, rota, status e duração.
+
+É um middleware ASGI puro (não BaseHTTPMiddleware): não cria tarefa extra
+por requisição e acompanha respostas em fluxo até o último byte.
+"""
+import logging
+import time
+
+from app.utils.metricas import BUSCA_DURACAO, ROTAS_BUSCA, classe_status
+from app.utils.registro import iniciar_requisicao
+
+logger = logging.getLogger(__name__)
+
+
+class RegistroRequisicoes:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        campos = iniciar_requisicao()
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem) -> None:
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            if scope["path"] in ROTAS_BUSCA:
+                BUSCA_DURACAO.labels(scope["path"], classe_status(status)).observe(duracao)
+            resumo = {
+                "metodo": scope["method"],
+                "rota": scope["path"],
+                "status": status,
+                "duracao_ms": round(duracao * 1000, 1),
+            }
+            resumo.update(campos)
+            logger.info("requisicao", extra={"campos": resumo})
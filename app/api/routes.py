@@ -4,25 +4,43 @@ César Rodrigues Ribeiro - Desafio Mercado Livre por Arthur
 Rotas da API para busca de produtos e autenticação.
 
 Define todos os endpoints da aplicação, incluindo:
-- Busca de produtos
+- Busca de produtos (JSON e fluxo NDJSON)
 - Autenticação OAuth
 - Interface visual
 - Health check
 
 """
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import HTMLResponse, FileResponse
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse
 from pathlib import Path
 from typing import Optional
 from app.services.produtos_mercadolivre import ProdutosMercadoLivre
-from app.services.autenticacao_mercadolivre import AutenticacaoMercadoLivre
 from app.schemas.produto import RespostaBusca, Produto
 from app.utils.erros import tratar_erro_api, ErroValidacao, ErroAutenticacao
-from app.utils.health import verificar_saude
+from app.utils.health import verificar_saude, verificar_vida
+from app.services.autenticacao_mercadolivre import AutenticacaoMercadoLivre
+from app.services.cliente_http import TransporteHTTP
+from app.services.prontidao import VerificadorProntidao
+from app.api.dependencias import (
+    obter_auth_service, obter_produtos_service, obter_prontidao, obter_transporte_http, orcamento_da_rota
+)
+from app.services.cache_busca import CacheBusca
+from app.utils.paginacao import LIMITE_MAXIMO, OFFSET_MAXIMO, decodificar_cursor
+from app.utils.json_rapido import RespostaJSONRapida, codificar_json
+from app.utils.etapas import medir, tempos_ms
+from app.utils.metricas import exportar
+from app.utils.prazo import Orcamento
+from app.utils.registro import estatisticas_registro
 
 router = APIRouter()
-produtos_service = ProdutosMercadoLivre()
-auth_service = AutenticacaoMercadoLivre()
+
+# ML_VALIDAR_RESPOSTA=1 volta a validar /api/buscar pelo response_model (útil para depuração)
+VALIDAR_RESPOSTA = os.getenv("ML_VALIDAR_RESPOSTA", "0") == "1"
+
+# Orçamento de tempo de cada busca, em segundos, incluindo fallback e novas tentativas
+orcamento_busca = orcamento_da_rota("ML_PRAZO_BUSCA", 8.0)
+orcamento_busca_stream = orcamento_da_rota("ML_PRAZO_BUSCA_STREAM", 15.0)
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -39,10 +57,17 @@ async def pagina_inicial():
         return HTMLResponse(content="<h1>Arquivo index.html não encontrado</h1>", status_code=404)
 
 
-@router.get("/api/buscar", response_model=RespostaBusca)
+@router.get("/api/buscar", response_model=RespostaBusca, response_model_exclude_unset=True)
 async def buscar_produtos(
     q: str = Query(..., description="Termo de busca", min_length=1),
-    limit: int = Query(10, ge=1, le=50)
+    limit: int = Query(10, ge=1, le=LIMITE_MAXIMO),
+    enriquecer: bool = Query(False, description="Completar dados ausentes com os detalhes de /items"),
+    offset: int = Query(0, ge=0, lt=OFFSET_MAXIMO, description="Posição do primeiro resultado"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (proximo_cursor da resposta anterior)"),
+    tempos: bool = Query(False, description="Incluir em tempos_ms o tempo de cada etapa da busca"),
+    produtos_service: ProdutosMercadoLivre = Depends(obter_produtos_service),
+    orcamento: Optional[Orcamento] = Depends(orcamento_busca),
+    response: Response = None,
 ):
 
     """
@@ -50,22 +75,102 @@ async def buscar_produtos(
     Use os filtros da interface para filtrar por status específico.
     Sempre retorna o mesmo formato de resposta.
 
+    Para ir além dos primeiros resultados, use offset ou o cursor
+    devolvido em proximo_cursor (que substitui offset e limit).
+
+    Erros vêm no campo erro com status 200, exceto o limite de requisições
+    e o circuito aberto no Mercado Livre (503) e o timeout ou orçamento
+    esgotado (504), que mantêm o mesmo corpo.
+
+    A busca inteira tem um orçamento de tempo (ML_PRAZO_BUSCA); os
+    cabeçalhos X-Orcamento-* mostram o orçamento e quanto sobrou, e
+    X-Upstream-Retentativas quantas chamadas ao Mercado Livre foram repetidas.
+
+    O cabeçalho Server-Timing traz o tempo de cada etapa (token, upstream,
+    json, formatar, ordenar, validacao/serializacao); com tempos=true eles
+    também vêm no campo tempos_ms.
+
     """
 
-    resultado = produtos_service.buscar_produtos(q, limit)
+    offset, limit = _posicao_da_busca(q, offset, limit, cursor)
+    resultado = await produtos_service.buscar_produtos_async(q, limit, enriquecer, offset)
 
 
     # Mesmo em erro, o schema é respeitado
-    return {
+    resposta = {
         "total": resultado.get("total", 0),
         "produtos": resultado.get("produtos", []),
-        "erro": resultado.get("erro")
+        "erro": resultado.get("erro"),
+        "proximo_cursor": resultado.get("proximo_cursor")
     }
+    if tempos:
+        resposta["tempos_ms"] = tempos_ms()
+
+    cabecalhos = orcamento.cabecalhos() if orcamento else {}
+    status_code = resultado.get("status_code", 200)
+    if VALIDAR_RESPOSTA:
+        response.headers.update(cabecalhos)
+        response.status_code = status_code
+        # Valida aqui para medir a etapa; o FastAPI não revalida uma instância do próprio modelo
+        with medir("validacao"):
+            return RespostaBusca.model_validate(resposta)
+
+    # Os produtos já saem de _formatar_produtos no formato de Produto:
+    # codifica direto, sem revalidar cada item contra o response_model
+    with medir("serializacao"):
+        return RespostaJSONRapida(resposta, status_code=status_code, headers=cabecalhos)
 
 
 
+@router.get("/api/buscar/stream")
+async def buscar_produtos_stream(
+    q: str = Query(..., description="Termo de busca", min_length=1),
+    limit: int = Query(10, ge=1, le=LIMITE_MAXIMO),
+    enriquecer: bool = Query(False, description="Completar dados ausentes com os detalhes de /items"),
+    offset: int = Query(0, ge=0, lt=OFFSET_MAXIMO, description="Posição do primeiro resultado"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (proximo_cursor de uma resposta anterior)"),
+    produtos_service: ProdutosMercadoLivre = Depends(obter_produtos_service),
+    orcamento: Optional[Orcamento] = Depends(orcamento_busca_stream),
+):
+
+    """
+    Busca produtos em fluxo NDJSON (um JSON por linha).
+
+    Cada linha é um Produto, enviado assim que a página dele chega do
+    Mercado Livre. A última linha é o resumo, com total, erro e
+    proximo_cursor.
+
+    O orçamento de tempo (ML_PRAZO_BUSCA_STREAM) vai em X-Orcamento-Ms;
+    páginas que não chegam dentro dele encerram o fluxo.
+
+    """
+
+    offset, limit = _posicao_da_busca(q, offset, limit, cursor)
+
+    async def linhas():
+        async for item in produtos_service.buscar_produtos_stream(q, limit, enriquecer, offset):
+            yield codificar_json(item) + b"\n"
+
+    cabecalhos = {"X-Orcamento-Ms": orcamento.cabecalhos()["X-Orcamento-Ms"]} if orcamento else {}
+    return StreamingResponse(linhas(), media_type="application/x-ndjson", headers=cabecalhos)
+
+
+def _posicao_da_busca(q: str, offset: int, limit: int, cursor: Optional[str]):
+    """Resolve (offset, limit) da busca; o cursor, se enviado, tem precedência."""
+    if not cursor:
+        return offset, limit
+
+    try:
+        posicao = decodificar_cursor(cursor)
+    except ValueError as e:
+        raise tratar_erro_api(ErroValidacao(str(e)))
+    if posicao["termo"] != CacheBusca.normalizar(q):
+        raise tratar_erro_api(ErroValidacao("Cursor não corresponde ao termo de busca."))
+    return posicao["offset"], posicao["limit"]
+
+
 @router.get("/api/autorizar")
-async def obter_url_autorizacao():
+async def obter_url_autorizacao(auth_service: AutenticacaoMercadoLivre = Depends(obter_auth_service)):
 
     """    
 
@@ -87,7 +192,10 @@ async def obter_url_autorizacao():
 
 
 @router.get("/api/callback")
-async def callback_oauth(code: Optional[str] = None):
+async def callback_oauth(
+    code: Optional[str] = None,
+    auth_service: AutenticacaoMercadoLivre = Depends(obter_auth_service)
+):
     """
     
     Endpoint de callback para receber o código de autorização OAuth.
@@ -104,7 +212,7 @@ async def callback_oauth(code: Optional[str] = None):
         raise ErroValidacao("Código de autorização não fornecido")
     
     try:
-        token_data = auth_service.trocar_codigo_por_token(code)
+        token_data = await auth_service.trocar_codigo_por_token_async(code)
         return {
             "mensagem": "Autenticação realizada com sucesso!",
             "access_token": token_data.get("access_token"),
@@ -117,14 +225,92 @@ async def callback_oauth(code: Optional[str] = None):
 
 
 @router.get("/api/saude")
-async def health_check():
+async def health_check(produtos_service: ProdutosMercadoLivre = Depends(obter_produtos_service)):
     """
 
     Endpoint de health check da aplicação.
     
     Returns:
-        Status de saúde da aplicação
+        Status de saúde da aplicação e o estado dos circuitos de cada
+        endpoint do Mercado Livre ("degradado" se algum não estiver fechado)
+
+
+    """
+    return verificar_saude(produtos_service.estado_circuitos())
+
+
+@router.get("/api/saude/vivo")
+async def liveness():
+    """
+
+    Liveness: responde enquanto o processo estiver de pé.
+    
+    Não consulta o Mercado Livre nem o token; use para decidir reinícios.
+
+
+    """
+    return verificar_vida()
+
+
+@router.get("/api/saude/pronto")
+async def readiness(prontidao: VerificadorProntidao = Depends(obter_prontidao)):
+    """
+
+    Readiness: indica se o processo consegue atender buscas agora.
+    
+    Returns:
+        200 com status "pronto" ou "degradado", 503 com "indisponivel"; as
+        verificações de token, sonda ao upstream (reaproveitada por alguns
+        segundos), pool/limite de taxa e circuitos vêm em verificacoes
+
+
+    """
+    resultado = await prontidao.verificar()
+    return JSONResponse(resultado, status_code=200 if resultado["pronto"] else 503)
+
+
+@router.get("/api/saude/conexoes")
+async def estatisticas_conexoes(transporte: TransporteHTTP = Depends(obter_transporte_http)):
+    """
+
+    Estatísticas do pool de conexões HTTP com o Mercado Livre.
+    
+    Returns:
+        Conexões abertas/ociosas, taxa de reuso, limites configurados e o
+        limite de taxa (taxa atual, fila e descartes)
+
+
+    """
+    return transporte.estatisticas()
+
+
+@router.get("/api/saude/busca")
+async def estatisticas_busca(produtos_service: ProdutosMercadoLivre = Depends(obter_produtos_service)):
+    """
+
+    Estatísticas internas do serviço de busca.
+    
+    Returns:
+        Cache (acertos, falhas, descartes, ocupação), buscas coalescidas
+        e a fila do registro (logs na fila e descartados)
+
+
+    """
+    return {**produtos_service.estatisticas(), "registro": estatisticas_registro()}
+
+
+@router.get("/metrics", include_in_schema=False)
+def metricas_prometheus():
+    """
+
+    Métricas no formato de exposição do Prometheus.
+    
+    Returns:
+        Latência das buscas e de cada endpoint do upstream, uso do fallback,
+        buscas vazias, 401s, consultas ao cache e produtos por busca
+        (somadas entre os workers com PROMETHEUS_MULTIPROC_DIR)
 
 
     """
-    return verificar_saude()
+    conteudo, tipo = exportar()
+    return Response(content=conteudo, media_type=tipo)
@@ -0,0 +1,55 @@
+"""
+Middleware que devolve o tempo de cada etapa no cabeçalho Server-Timing.
+
+Abre o acumulador de etapas (app.utils.etapas) no início da requisição e,
+quando a resposta começa, adiciona Server-Timing com as etapas medidas até
+ali e o total. Em respostas em fluxo o cabeçalho sai antes do corpo, então
+traz só o que foi feito até o primeiro byte.
+
+Também aciona o Perfilador: requisições sorteadas rodam sob o profiler e
+as que passam do limiar têm o perfil gravado em disco.
+"""
+import asyncio
+import logging
+import time
+
+from app.utils.etapas import iniciar_etapas, server_timing
+from app.utils.perfilador import Perfilador
+from app.utils.registro import anotar
+
+logger = logging.getLogger(__name__)
+
+
+class TemposRequisicao:
+    def __init__(self, app) -> None:
+        self.app = app
+        self.perfilador = Perfilador()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        acumulador = iniciar_etapas()
+        inicio = time.perf_counter()
+
+        async def enviar(mensagem) -> None:
+            if mensagem["type"] == "http.response.start":
+                valor = server_timing(acumulador, time.perf_counter() - inicio)
+                mensagem["headers"] = [*mensagem.get("headers", []), (b"server-timing", valor.encode("latin-1"))]
+            await send(mensagem)
+
+        profiler = self.perfilador.iniciar()
+        if profiler is None:
+            await self.app(scope, receive, enviar)
+            return
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            if self.perfilador.parar(profiler, duracao):
+                descricao = f"{scope['method']} {scope['path']}"
+                caminho = await asyncio.to_thread(self.perfilador.gravar, profiler, descricao, duracao)
+                anotar(perfil=caminho)
+                logger.warning("🐢 %s levou %.0f ms; perfil gravado em %s", descricao, duracao * 1000, caminho)
@@ -10,6 +10,9 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
 from app.api.routes import router
+from app.api.dependencias import ciclo_de_vida
+from app.api.registro_requisicoes import RegistroRequisicoes
+from app.api.tempos_requisicao import TemposRequisicao
 
 # Criar instância da aplicação FastAPI
 app = FastAPI(
@@ -31,9 +34,15 @@ app = FastAPI(
 
 * **GET /**: Interface visual para busca de produtos
 * **GET /api/buscar**: Endpoint de busca de produtos (JSON)
+* **GET /api/buscar/stream**: Busca de produtos em fluxo NDJSON (um produto por linha)
 * **GET /api/autorizar**: Obtém URL de autorização OAuth
 * **GET /api/callback**: Callback OAuth para receber tokens
 * **GET /api/saude**: Health check da aplicação
+* **GET /api/saude/vivo**: Liveness (processo de pé)
+* **GET /api/saude/pronto**: Readiness (token, Mercado Livre, recursos e circuitos; 503 se indisponível)
+* **GET /api/saude/conexoes**: Estatísticas do pool de conexões HTTP
+* **GET /api/saude/busca**: Estatísticas do cache e da coalescência de buscas
+* **GET /metrics**: Métricas no formato do Prometheus
 
 ## Como Usar
 
@@ -45,7 +54,8 @@ app = FastAPI(
 """,
     version="1.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=ciclo_de_vida
 )
 
 # Configurar CORS para permitir requisições de qualquer origem
@@ -57,6 +67,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tempo de cada etapa em Server-Timing e perfil das requisições lentas
+app.add_middleware(TemposRequisicao)
+
+# Uma linha de resumo (JSON) por requisição (o mais externo, mede tudo)
+app.add_middleware(RegistroRequisicoes)
+
 # Montar arquivos estáticos
 static_path = Path(__file__).parent.parent / "static"
 if static_path.exists():
@@ -77,9 +93,15 @@ def api_info():
         "endpoints": {
             "interface": "/",
             "buscar_produtos": "/api/buscar?q=<termo>",
+            "buscar_produtos_stream": "/api/buscar/stream?q=<termo>",
             "autorizar": "/api/autorizar",
             "callback": "/api/callback?code=<codigo>",
             "saude": "/api/saude",
+            "vivo": "/api/saude/vivo",
+            "pronto": "/api/saude/pronto",
+            "conexoes": "/api/saude/conexoes",
+            "busca": "/api/saude/busca",
+            "metricas": "/metrics",
             "documentacao": "/docs"
         },
         "instrucoes": "Acesse / para ver a interface visual ou /docs para a documentação completa da API"
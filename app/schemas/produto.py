@@ -5,7 +5,7 @@ Define os modelos de dados utilizados na API para garantir
 validação e documentação automática.
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class Atributo(BaseModel):
@@ -45,12 +45,17 @@ class RespostaBusca(BaseModel):
     total: int = Field(..., description="Número total de produtos encontrados", ge=0)
     produtos: List[Produto] = Field(..., description="Lista de produtos encontrados")
     erro: Optional[str] = Field(None, description="Mensagem de erro, se houver")
+    proximo_cursor: Optional[str] = Field(None, description="Cursor para buscar a próxima página, se houver mais resultados")
+    tempos_ms: Optional[Dict[str, float]] = Field(
+        None, description="Milissegundos gastos em cada etapa da busca (só com tempos=true)"
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
                 "total": 5,
                 "produtos": [],
-                "erro": None
+                "erro": None,
+                "proximo_cursor": None
             }
         }
@@ -0,0 +1,297 @@
+"""
+Aquecimento do cache de buscas a partir dos termos mais buscados.
+
+Responsável por:
+- Contar quantas vezes cada termo foi buscado em /api/buscar e /api/buscar/stream
+- Gravar as contagens em um arquivo JSON compacto, somando as de outros workers
+- No startup (e, se configurado, periodicamente), buscar a primeira página dos
+  termos mais buscados que não estejam frescos no cache, com concorrência
+  limitada e prioridade baixa no limite de taxa, para que o cache já esteja
+  quente quando o processo ficar pronto
+
+Configuração por ambiente:
+    ML_AQUECIMENTO_ARQUIVO: arquivo das contagens; vazio guarda só em memória (padrão vazio)
+    ML_AQUECIMENTO_MAX_TERMOS: termos distintos mantidos nas contagens (padrão 1000)
+    ML_AQUECIMENTO_TERMOS: termos aquecidos por rodada; 0 desliga o aquecimento (padrão 20)
+    ML_AQUECIMENTO_CONCORRENCIA: buscas de aquecimento simultâneas (padrão 4)
+    ML_AQUECIMENTO_PRAZO: segundos que o aquecimento do startup pode segurar a prontidão (padrão 30)
+    ML_AQUECIMENTO_INTERVALO: segundos entre novas rodadas; 0 aquece só no startup (padrão 0)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from app.services.cache_busca import CacheBusca
+from app.services.limitador_taxa import BAIXA, prioridade_upstream
+from app.utils.erros import ErroAPI
+from app.utils.prazo import iniciar_orcamento
+from app.utils.tarefas import cancelar_tarefas
+
+if TYPE_CHECKING:
+    from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+
+logger = logging.getLogger(__name__)
+
+# Termos maiores que isso não são contados (dificilmente estarão entre os mais buscados)
+MAX_TAMANHO_TERMO = 100
+
+# Segundos entre gravações das contagens no arquivo
+INTERVALO_GRAVACAO = 60.0
+
+
+class FrequenciaBuscas:
+    """
+    Contagem de buscas por termo normalizado.
+
+    Guarda no máximo 2 * max_termos termos; ao passar disso, mantém os
+    max_termos mais buscados com as contagens pela metade, de modo que
+    termos antigos percam peso para os que estão em alta.
+
+    Com arquivo, gravar() relê as contagens gravadas e soma as buscas
+    registradas desde a última gravação, então workers que compartilham o
+    arquivo acumulam as contagens uns dos outros (uma gravação simultânea
+    de outro worker pode se perder; são só estatísticas).
+    """
+
+    def __init__(self, caminho: Optional[str] = None, max_termos: Optional[int] = None) -> None:
+        self.caminho = caminho if caminho is not None else os.getenv("ML_AQUECIMENTO_ARQUIVO", "")
+        self.max_termos = max_termos or int(os.getenv("ML_AQUECIMENTO_MAX_TERMOS", "1000"))
+        self._contagens: Counter = Counter()
+        self._pendentes: Counter = Counter()
+        self._trava = threading.Lock()
+
+        if self.caminho:
+            self._contagens = self._ler() or Counter()
+
+    def registrar(self, termo_busca: str) -> None:
+        """Conta uma busca do termo."""
+        termo = CacheBusca.normalizar(termo_busca)
+        if not termo or len(termo) > MAX_TAMANHO_TERMO:
+            return
+        with self._trava:
+            self._contagens[termo] += 1
+            self._pendentes[termo] += 1
+            if len(self._contagens) > 2 * self.max_termos:
+                self._contagens = self._podar(self._contagens)
+            if len(self._pendentes) > 2 * self.max_termos:
+                self._pendentes = self._podar(self._pendentes)
+
+    def mais_buscados(self, quantidade: int) -> List[str]:
+        """Os termos mais buscados, do mais para o menos buscado."""
+        with self._trava:
+            return [termo for termo, _ in self._contagens.most_common(quantidade)]
+
+    def __len__(self) -> int:
+        return len(self._contagens)
+
+    def gravar(self) -> None:
+        """Soma as buscas registradas desde a última gravação às do arquivo e grava."""
+        if not self.caminho:
+            return
+        with self._trava:
+            pendentes, self._pendentes = self._pendentes, Counter()
+            memoria = Counter(self._contagens)
+        if not pendentes:
+            return
+
+        gravadas = self._ler()
+        if gravadas is None:
+            # Arquivo ausente ou ilegível: as contagens em memória já incluem as pendentes
+            contagens = memoria
+        else:
+            contagens = gravadas
+            contagens.update(pendentes)
+        if len(contagens) > self.max_termos:
+            contagens = Counter(dict(contagens.most_common(self.max_termos)))
+
+        conteudo = json.dumps(
+            {"termos": contagens.most_common()}, ensure_ascii=False, separators=(",", ":")
+        )
+        diretorio = os.path.dirname(os.path.abspath(self.caminho))
+        try:
+            os.makedirs(diretorio, exist_ok=True)
+            descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".buscas-")
+            with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, self.caminho)
+        except OSError as e:
+            logger.warning(
+                "⚠️ Não foi possível gravar as buscas frequentes em %s: %s", self.caminho, e
+            )
+            with self._trava:
+                self._pendentes.update(pendentes)
+            return
+
+        with self._trava:
+            self._contagens = contagens + self._pendentes
+
+    def _ler(self) -> Optional[Counter]:
+        """Contagens do arquivo; None se ele não existir ou estiver ilegível."""
+        try:
+            with open(self.caminho, encoding="utf-8") as arquivo:
+                dados = json.load(arquivo)
+            return Counter({
+                termo: contagem for termo, contagem in dados["termos"]
+                if isinstance(termo, str) and isinstance(contagem, int) and contagem > 0
+            })
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("⚠️ Arquivo de buscas frequentes ilegível (%s): %s", self.caminho, e)
+            return None
+
+    def _podar(self, contagens: Counter) -> Counter:
+        mantidas = contagens.most_common(self.max_termos)
+        return Counter({termo: max(1, contagem // 2) for termo, contagem in mantidas})
+
+
+class AquecedorCache:
+    """
+    Tarefa em segundo plano que aquece o cache com os termos mais buscados.
+
+    Cada termo tem a primeira página buscada com o limite mínimo do cache
+    (a mesma entrada que as buscas de usuários consultam), no máximo
+    `concorrencia` por vez, com prioridade baixa no limite de taxa e sem
+    orçamento de tempo por busca; termos ainda frescos no cache são
+    pulados. A rodada do startup é limitada a `prazo` segundos; até ela
+    terminar, `concluido` fica False e a prontidão informa que o cache
+    está aquecendo.
+
+    A mesma tarefa grava as contagens de busca a cada INTERVALO_GRAVACAO
+    segundos e no shutdown.
+    """
+
+    def __init__(
+        self,
+        produtos: "ProdutosMercadoLivre",
+        termos: Optional[int] = None,
+        concorrencia: Optional[int] = None,
+        prazo: Optional[float] = None,
+        intervalo: Optional[float] = None,
+    ) -> None:
+        self.produtos = produtos
+        self.frequencias = produtos.frequencias
+        self.termos = (
+            termos if termos is not None else int(os.getenv("ML_AQUECIMENTO_TERMOS", "20"))
+        )
+        self.concorrencia = max(
+            1, concorrencia or int(os.getenv("ML_AQUECIMENTO_CONCORRENCIA", "4"))
+        )
+        self.prazo = prazo if prazo is not None else float(os.getenv("ML_AQUECIMENTO_PRAZO", "30"))
+        self.intervalo = (
+            intervalo if intervalo is not None
+            else float(os.getenv("ML_AQUECIMENTO_INTERVALO", "0"))
+        )
+
+        self.concluido = False
+        self.rodadas = 0
+        self.aquecidos = 0
+        self.falhas = 0
+        self.ja_frescos = 0
+        self._restantes = 0
+        self._tarefas = set()
+
+    @property
+    def ativo(self) -> bool:
+        return self.termos > 0 and self.produtos.cache.ativo
+
+    def iniciar(self) -> None:
+        """Agenda o aquecimento do startup e as rodadas seguintes (chamado no lifespan)."""
+        termos = self.frequencias.mais_buscados(self.termos) if self.ativo else []
+        if not termos:
+            # Nada a aquecer: pronto desde já, sem depender de a tarefa rodar
+            self.concluido = True
+            if not (self.frequencias.caminho or (self.ativo and self.intervalo > 0)):
+                return
+
+        self._restantes = len(termos)
+        tarefa = asyncio.get_running_loop().create_task(self._executar(termos))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _executar(self, termos: List[str]) -> None:
+        if termos:
+            try:
+                await asyncio.wait_for(self.aquecer(termos), self.prazo or None)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "⚠️ Aquecimento do cache passou de %.0fs; pronto com %d termo(s) aquecido(s)",
+                    self.prazo, self.aquecidos,
+                )
+            finally:
+                self.concluido = True
+
+        reaquecer = self.ativo and self.intervalo > 0
+        espera = min(self.intervalo, INTERVALO_GRAVACAO) if reaquecer else INTERVALO_GRAVACAO
+        proxima_rodada = time.monotonic() + self.intervalo
+        while True:
+            await asyncio.sleep(espera)
+            await asyncio.to_thread(self.frequencias.gravar)
+            if reaquecer and time.monotonic() >= proxima_rodada:
+                proxima_rodada = time.monotonic() + self.intervalo
+                await self.aquecer(self.frequencias.mais_buscados(self.termos))
+
+    async def aquecer(self, termos: List[str]) -> None:
+        """Uma rodada: busca a primeira página de cada termo, no máximo `concorrencia` por vez."""
+        if not termos:
+            return
+        semaforo = asyncio.Semaphore(self.concorrencia)
+        self.rodadas += 1
+        self._restantes = len(termos)
+        inicio = time.perf_counter()
+        aquecidos, falhas, ja_frescos = self.aquecidos, self.falhas, self.ja_frescos
+
+        async def aquecer_termo(termo: str) -> None:
+            async with semaforo:
+                # Cede a vez às buscas de usuários no limite de taxa e não tem prazo por busca
+                prioridade_upstream.set(BAIXA)
+                iniciar_orcamento(None)
+                try:
+                    cache = self.produtos.cache
+                    if cache.fresco(termo, cache.limite_minimo, self.produtos.site_id):
+                        # Ainda no TTL (ex.: buscado por um usuário): não gasta cota do upstream
+                        self.ja_frescos += 1
+                        return
+                    await self.produtos.aquecer(termo)
+                    self.aquecidos += 1
+                except ErroAPI as e:
+                    self.falhas += 1
+                    logger.warning("⚠️ Falha ao aquecer o cache com '%s': %s", termo, e.mensagem)
+                except Exception as e:
+                    # Um termo com erro inesperado não pode encerrar a tarefa de segundo plano
+                    self.falhas += 1
+                    logger.exception("❌ Erro inesperado ao aquecer o cache com '%s': %s", termo, e)
+                finally:
+                    self._restantes -= 1
+
+        await asyncio.gather(*(aquecer_termo(termo) for termo in termos))
+        logger.info(
+            "🔥 Cache aquecido: %d de %d termo(s) em %.1fs (%d já fresco(s), %d falha(s))",
+            self.aquecidos - aquecidos, len(termos), time.perf_counter() - inicio,
+            self.ja_frescos - ja_frescos, self.falhas - falhas,
+        )
+
+    def estado(self) -> Dict[str, Any]:
+        """Situação do aquecimento para a prontidão."""
+        return {
+            "ativo": self.ativo,
+            "concluido": self.concluido,
+            "rodadas": self.rodadas,
+            "aquecidos": self.aquecidos,
+            "falhas": self.falhas,
+            "ja_frescos": self.ja_frescos,
+            "restantes": self._restantes,
+            "termos_contados": len(self.frequencias),
+        }
+
+    async def fechar(self) -> None:
+        """Cancela o aquecimento em andamento e grava as contagens (shutdown da aplicação)."""
+        await cancelar_tarefas(self._tarefas)
+        await asyncio.to_thread(self.frequencias.gravar)
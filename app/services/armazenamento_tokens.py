@@ -0,0 +1,272 @@
+"""
+Armazenamento dos tokens OAuth compartilhado entre processos.
+
+Responsável por:
+- Guardar access_token, refresh_token e expiração fora do processo
+- Detectar tokens gravados por outro worker sem reiniciar a aplicação
+- Oferecer uma trava com prazo (lease) para que só um processo renove por vez
+
+Backends (ML_TOKEN_ARMAZENAMENTO):
+    memoria: só no processo (padrão; comportamento de um worker único)
+    arquivo: JSON em ML_TOKEN_ARQUIVO, trocado atomicamente e relido quando muda
+    sqlite: banco em ML_TOKEN_ARQUIVO, para workers e réplicas com volume compartilhado
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+# Tempo máximo que uma trava de renovação vale se o dono morrer sem liberá-la
+DURACAO_TRAVA = 30.0
+
+
+class ArmazenamentoTokens(ABC):
+    """
+    Interface dos armazenamentos de token.
+
+    ler() devolve (versao, dados); a versão muda a cada gravação, de modo
+    que quem lê sabe se precisa aplicar os dados de novo. dados é
+    {"access_token", "refresh_token", "expira_em"} ou None se vazio.
+
+    Os métodos podem bloquear (disco, trava do SQLite); no laço de eventos,
+    chame-os com asyncio.to_thread.
+    """
+
+    tipo = "base"
+
+    @abstractmethod
+    def ler(self) -> Tuple[Optional[Hashable], Optional[Dict]]:
+        """Versão e tokens gravados."""
+
+    def versao(self) -> Optional[Hashable]:
+        """Versão atual, sem ler os tokens (consulta barata para saber se algo mudou)."""
+        return self.ler()[0]
+
+    @abstractmethod
+    def gravar(self, dados: Dict) -> Hashable:
+        """Grava os tokens e retorna a nova versão."""
+
+    @abstractmethod
+    def adquirir_trava(self, dono: str, duracao: float = DURACAO_TRAVA) -> bool:
+        """Tenta obter a trava de renovação sem esperar por ela."""
+
+    @abstractmethod
+    def liberar_trava(self, dono: str) -> None:
+        """Libera a trava de renovação, se for do dono."""
+
+    def fechar(self) -> None:
+        """Libera recursos do backend (conexões, arquivos)."""
+
+
+class ArmazenamentoMemoria(ArmazenamentoTokens):
+    """Tokens só no processo atual."""
+
+    tipo = "memoria"
+
+    def __init__(self) -> None:
+        self._dados: Optional[Dict] = None
+        self._versao = 0
+        self._dono: Optional[str] = None
+        self._ate = 0.0
+        self._trava = threading.Lock()
+
+    def ler(self):
+        with self._trava:
+            return self._versao, self._dados
+
+    def gravar(self, dados: Dict):
+        with self._trava:
+            self._dados = dict(dados)
+            self._versao += 1
+            return self._versao
+
+    def adquirir_trava(self, dono: str, duracao: float = DURACAO_TRAVA) -> bool:
+        with self._trava:
+            agora = time.monotonic()
+            if self._dono is not None and self._dono != dono and self._ate > agora:
+                return False
+            self._dono, self._ate = dono, agora + duracao
+            return True
+
+    def liberar_trava(self, dono: str) -> None:
+        with self._trava:
+            if self._dono == dono:
+                self._dono = None
+
+
+class ArmazenamentoArquivo(ArmazenamentoTokens):
+    """
+    Tokens em um arquivo JSON.
+
+    A gravação escreve um arquivo temporário (permissão 600) e o troca com
+    os.replace, então leitores nunca veem um arquivo pela metade. A leitura
+    só reabre o arquivo quando mtime, tamanho ou inode mudam. A trava é um
+    arquivo criado com O_EXCL ao lado do arquivo de tokens.
+    """
+
+    tipo = "arquivo"
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = os.path.abspath(caminho)
+        self.caminho_trava = self.caminho + ".trava"
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self._assinatura = None
+        self._dados: Optional[Dict] = None
+        self._trava = threading.Lock()
+
+    def ler(self):
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None, None
+
+        assinatura = (info.st_mtime_ns, info.st_size, info.st_ino)
+        with self._trava:
+            if assinatura != self._assinatura:
+                try:
+                    with open(self.caminho, "r", encoding="utf-8") as f:
+                        self._dados = json.load(f)
+                    self._assinatura = assinatura
+                except (OSError, ValueError):
+                    pass
+            return self._assinatura, self._dados
+
+    def versao(self):
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+    def gravar(self, dados: Dict):
+        descritor, temporario = tempfile.mkstemp(
+            dir=os.path.dirname(self.caminho), prefix=".tokens-", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descritor, "w", encoding="utf-8") as f:
+                json.dump(dados, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        return self.ler()[0]
+
+    def adquirir_trava(self, dono: str, duracao: float = DURACAO_TRAVA) -> bool:
+        for _ in range(2):
+            try:
+                descritor = os.open(self.caminho_trava, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # Trava de um processo que morreu sem liberar: descarta depois do prazo
+                try:
+                    if time.time() - os.path.getmtime(self.caminho_trava) <= duracao:
+                        return False
+                    os.remove(self.caminho_trava)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(descritor, "w") as f:
+                f.write(dono)
+            return True
+        return False
+
+    def liberar_trava(self, dono: str) -> None:
+        try:
+            with open(self.caminho_trava, "r") as f:
+                if f.read() != dono:
+                    return
+            os.remove(self.caminho_trava)
+        except FileNotFoundError:
+            pass
+
+
+class ArmazenamentoSQLite(ArmazenamentoTokens):
+    """
+    Tokens em um banco SQLite (modo WAL), com um contador de versão por
+    gravação e a trava como uma linha com dono e prazo.
+    """
+
+    tipo = "sqlite"
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = os.path.abspath(caminho)
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho, timeout=5, check_same_thread=False, isolation_level=None)
+        self._trava = threading.Lock()
+        with self._trava:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                " id INTEGER PRIMARY KEY CHECK (id = 1), versao INTEGER NOT NULL,"
+                " access_token TEXT, refresh_token TEXT, expira_em REAL)"
+            )
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS trava_renovacao ("
+                " id INTEGER PRIMARY KEY CHECK (id = 1), dono TEXT, ate REAL)"
+            )
+            self._conexao.execute("INSERT OR IGNORE INTO trava_renovacao (id, dono, ate) VALUES (1, NULL, 0)")
+
+    def ler(self):
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT versao, access_token, refresh_token, expira_em FROM tokens WHERE id = 1"
+            ).fetchone()
+        if linha is None:
+            return None, None
+        return linha[0], {"access_token": linha[1], "refresh_token": linha[2], "expira_em": linha[3]}
+
+    def versao(self):
+        with self._trava:
+            linha = self._conexao.execute("SELECT versao FROM tokens WHERE id = 1").fetchone()
+        return linha[0] if linha else None
+
+    def gravar(self, dados: Dict):
+        with self._trava:
+            self._conexao.execute(
+                "INSERT INTO tokens (id, versao, access_token, refresh_token, expira_em) VALUES (1, 1, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET versao = versao + 1, access_token = excluded.access_token,"
+                " refresh_token = excluded.refresh_token, expira_em = excluded.expira_em",
+                (dados.get("access_token"), dados.get("refresh_token"), dados.get("expira_em")),
+            )
+            return self._conexao.execute("SELECT versao FROM tokens WHERE id = 1").fetchone()[0]
+
+    def adquirir_trava(self, dono: str, duracao: float = DURACAO_TRAVA) -> bool:
+        agora = time.time()
+        with self._trava:
+            cursor = self._conexao.execute(
+                "UPDATE trava_renovacao SET dono = ?, ate = ? WHERE id = 1 AND (dono IS NULL OR dono = ? OR ate < ?)",
+                (dono, agora + duracao, dono, agora),
+            )
+            return cursor.rowcount == 1
+
+    def liberar_trava(self, dono: str) -> None:
+        with self._trava:
+            self._conexao.execute("UPDATE trava_renovacao SET dono = NULL WHERE id = 1 AND dono = ?", (dono,))
+
+    def fechar(self) -> None:
+        with self._trava:
+            self._conexao.close()
+
+
+def criar_armazenamento(tipo: Optional[str] = None, caminho: Optional[str] = None) -> ArmazenamentoTokens:
+    """
+    Cria o armazenamento configurado em ML_TOKEN_ARMAZENAMENTO / ML_TOKEN_ARQUIVO.
+
+    Raises:
+        ValueError: tipo desconhecido
+    """
+    tipo = tipo or os.getenv("ML_TOKEN_ARMAZENAMENTO", "memoria")
+    if tipo == "memoria":
+        return ArmazenamentoMemoria()
+    if tipo == "arquivo":
+        return ArmazenamentoArquivo(caminho or os.getenv("ML_TOKEN_ARQUIVO", "tokens.json"))
+    if tipo == "sqlite":
+        return ArmazenamentoSQLite(caminho or os.getenv("ML_TOKEN_ARQUIVO", "tokens.db"))
+    raise ValueError(f"ML_TOKEN_ARMAZENAMENTO inválido: {tipo} (use memoria, arquivo ou sqlite)")
@@ -4,31 +4,89 @@ Serviço de autenticação OAuth com a API do Mercado Livre.
 Responsável por:
 - Gerar a URL de autorização OAuth
 - Trocar o authorization code por um access_token
+- Renovar o access_token com o refresh_token antes de expirar
+- Compartilhar os tokens entre workers pelo armazenamento configurado
 """
 
+import asyncio
+import logging
 import os
-import requests
-from typing import Dict
-from dotenv import load_dotenv
+import threading
+import time
+from typing import Dict, Optional
+from app.services.armazenamento_tokens import ArmazenamentoTokens, criar_armazenamento
+from app.services.cliente_http import TransporteHTTP, obter_transporte
+from app.services.coalescencia import Coalescencia
+from app.utils.erros import ErroAutenticacao
+from app.utils.prazo import iniciar_orcamento
+from app.utils.tarefas import cancelar_tarefas
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 
 class AutenticacaoMercadoLivre:
-    def __init__(self) -> None:
+    """
+    Configuração por ambiente:
+        ML_ACCESS_TOKEN / ML_REFRESH_TOKEN: tokens iniciais
+        ML_TOKEN_EXPIRA_EM: expiração do ML_ACCESS_TOKEN (epoch, opcional)
+        ML_TOKEN_MARGEM_RENOVACAO: segundos antes da expiração em que a
+            renovação em segundo plano começa (padrão 300)
+        ML_TOKEN_ARMAZENAMENTO / ML_TOKEN_ARQUIVO: onde os tokens são
+            compartilhados entre processos (ver armazenamento_tokens)
+        ML_TOKEN_ESPERA_TRAVA: segundos esperando outro processo terminar
+            uma renovação (padrão 10)
+        ML_TOKEN_SINCRONIZACAO: intervalo mínimo, em segundos, entre consultas
+            ao armazenamento em busca de tokens de outro processo (padrão 2);
+            renovações sempre consultam
+    """
+
+    def __init__(
+        self,
+        armazenamento: Optional[ArmazenamentoTokens] = None,
+        transporte: Optional[TransporteHTTP] = None,
+    ) -> None:
         self.client_id: str | None = os.getenv("ML_CLIENT_ID")
         self.client_secret: str | None = os.getenv("ML_CLIENT_SECRET")
         self.redirect_uri: str | None = os.getenv("ML_REDIRECT_URI")
         self.access_token: str | None = os.getenv("ML_ACCESS_TOKEN")
+        self.refresh_token: str | None = os.getenv("ML_REFRESH_TOKEN")
+
+        # Expiração em relógio de parede; desconhecida para o token do ambiente
+        # até a primeira renovação, a menos que ML_TOKEN_EXPIRA_EM seja informado
+        expira_em = os.getenv("ML_TOKEN_EXPIRA_EM")
+        self.expira_em: float | None = float(expira_em) if expira_em else None
+        self.margem_renovacao = float(os.getenv("ML_TOKEN_MARGEM_RENOVACAO", "300"))
 
         self.url_autorizacao = "https://auth.mercadolivre.com.br/authorization"
-        self.url_token = "https://api.mercadolibre.com/oauth/token"
+        api_url = os.getenv("ML_API_BASE_URL", "https://api.mercadolibre.com").rstrip("/")
+        self.url_token = f"{api_url}/oauth/token"
+        self.transporte = transporte or obter_transporte()
+
+        # Renovações simultâneas (várias buscas com 401 ao mesmo tempo) viram uma só
+        self._coalescencia = Coalescencia()
+        self._tarefas = set()
+        self._trava = threading.Lock()
+        self.renovacoes = 0
+        self.falhas_renovacao = 0
 
         if not self.client_id or not self.client_secret:
             raise RuntimeError(
                 "Credenciais do Mercado Livre não configuradas no ambiente"
             )
 
+        self.armazenamento = armazenamento or criar_armazenamento()
+        self.espera_trava = float(os.getenv("ML_TOKEN_ESPERA_TRAVA", "10"))
+        self.intervalo_sincronizacao = float(os.getenv("ML_TOKEN_SINCRONIZACAO", "2"))
+        self._versao_tokens = None
+        self._proxima_sincronizacao = 0.0
+        self._dono_trava = f"{os.getpid()}-{id(self)}"
+
+        # Tokens já gravados por outro worker são mais novos que os do ambiente
+        if self.armazenamento.ler()[1]:
+            self._sincronizar(forcar=True)
+        elif self.access_token or self.refresh_token:
+            self._versao_tokens = self.armazenamento.gravar(self._dados_tokens())
+
     def gerar_url_autorizacao(self) -> str:
         """
         Gera a URL para o usuário autorizar a aplicação no Mercado Livre.
@@ -53,6 +111,12 @@ class AutenticacaoMercadoLivre:
         Returns:
             Dicionário contendo o access_token e metadados
         """
+        return self.transporte.executar(self.trocar_codigo_por_token_async(code))
+
+    async def trocar_codigo_por_token_async(self, code: str) -> Dict:
+        """
+        Versão assíncrona de trocar_codigo_por_token, usando o pool de conexões compartilhado.
+        """
         payload = {
             "grant_type": "authorization_code",
             "client_id": self.client_id,
@@ -61,22 +125,227 @@ class AutenticacaoMercadoLivre:
             "redirect_uri": self.redirect_uri,
         }
 
-        resposta = requests.post(self.url_token, data=payload, timeout=10)
+        resposta = await self.transporte.cliente().post(self.url_token, data=payload)
 
         if resposta.status_code != 200:
             raise RuntimeError(
                 f"Erro ao obter token ({resposta.status_code})"
             )
 
-        return resposta.json()
+        dados = resposta.json()
+        if dados.get("access_token"):
+            await asyncio.to_thread(self._aplicar_tokens, dados)
+        return dados
 
     def obter_access_token(self) -> str:
         """
-        Retorna o access_token configurado no ambiente.
+        Retorna o access_token atual, sem renovar.
+        """
+        self._sincronizar()
+        return self._token_configurado()
+
+    async def obter_access_token_async(self) -> str:
         """
+        Retorna um access_token válido.
+
+        Dentro da margem de renovação, devolve o token atual e agenda a
+        renovação em segundo plano; se o token já expirou (ou não existe),
+        renova antes de devolver. Sem refresh_token, equivale a
+        obter_access_token.
+        """
+        await self._sincronizar_async()
+        if not self.pode_renovar:
+            return self._token_configurado()
+        if not self.access_token:
+            return await self.renovar_token_async()
+
+        restante = self.segundos_para_expirar()
+        if restante is not None:
+            if restante <= 0:
+                logger.info("🔑 Access token expirado, renovando antes da busca")
+                return await self.renovar_token_async(self.access_token)
+            if restante <= self.margem_renovacao:
+                self._renovar_em_segundo_plano()
+
+        return self.access_token
+
+    async def renovar_token_async(self, token_rejeitado: Optional[str] = None) -> str:
+        """
+        Renova o access_token com o refresh_token, uma vez só entre chamadas simultâneas.
+
+        Args:
+            token_rejeitado: token que a API recusou; se outra chamada já o
+                substituiu, o token novo é devolvido sem nova renovação
+
+        Raises:
+            ErroAutenticacao: sem refresh_token ou renovação recusada
+        """
+        await self._sincronizar_async(forcar=True)
+        if token_rejeitado and self.access_token and self.access_token != token_rejeitado:
+            return self.access_token
+        if not self.pode_renovar:
+            raise ErroAutenticacao("Token inválido ou expirado.")
+
+        token_antigo = token_rejeitado or self.access_token
+        return await self._coalescencia.executar("renovar", lambda: self._renovar(token_antigo))
+
+    @property
+    def pode_renovar(self) -> bool:
+        return bool(self.refresh_token and self.client_id and self.client_secret)
+
+    def segundos_para_expirar(self) -> Optional[float]:
+        if self.expira_em is None:
+            return None
+        return self.expira_em - time.time()
+
+    def estatisticas(self) -> Dict:
+        restante = self.segundos_para_expirar()
+        return {
+            "renovacao_automatica": self.pode_renovar,
+            "expira_em_segundos": round(restante) if restante is not None else None,
+            "margem_renovacao": self.margem_renovacao,
+            "renovacoes": self.renovacoes,
+            "falhas_renovacao": self.falhas_renovacao,
+            "renovacoes_em_andamento": self._coalescencia.em_voo(),
+            "armazenamento": self.armazenamento.tipo,
+        }
+
+    async def fechar(self) -> None:
+        """Cancela renovações em andamento e fecha o armazenamento de tokens."""
+        await cancelar_tarefas(self._tarefas)
+        await self._coalescencia.cancelar()
+        await asyncio.to_thread(self.armazenamento.fechar)
+
+    def _renovar_em_segundo_plano(self) -> None:
+        if self._coalescencia.em_voo():
+            return
+        tarefa = asyncio.get_running_loop().create_task(self._renovar_silenciosamente())
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _renovar_silenciosamente(self) -> None:
+        try:
+            await self.renovar_token_async()
+        except ErroAutenticacao as e:
+            logger.warning("⚠️ Renovação do token em segundo plano falhou: %s", e.mensagem)
+
+    async def _renovar(self, token_antigo: Optional[str]) -> str:
+        """
+        Renova sob a trava do armazenamento, para que só um processo gaste o
+        refresh_token (o Mercado Livre o invalida a cada uso). Se outro
+        processo renovou enquanto esperávamos, usa o token dele.
+        """
+        # Sem o orçamento da busca que disparou a renovação: um timeout depois
+        # de o Mercado Livre aceitar o POST queimaria o refresh_token
+        iniciar_orcamento(None)
+        # O armazenamento (arquivo, SQLite) faz E/S e espera travas: fora do laço de eventos
+        prazo = time.monotonic() + self.espera_trava
+        while not await asyncio.to_thread(self.armazenamento.adquirir_trava, self._dono_trava):
+            if time.monotonic() > prazo:
+                raise ErroAutenticacao("Tempo esgotado aguardando a renovação do token em outro processo.")
+            await asyncio.sleep(0.05)
+
+        try:
+            await self._sincronizar_async(forcar=True)
+            restante = self.segundos_para_expirar()
+            renovado_por_outro = self.access_token and self.access_token != token_antigo
+            if renovado_por_outro and (restante is None or restante > self.margem_renovacao):
+                logger.info("🔑 Token já renovado por outro processo")
+                return self.access_token
+            return await self._renovar_com_refresh_token()
+        finally:
+            await asyncio.to_thread(self.armazenamento.liberar_trava, self._dono_trava)
+
+    async def _renovar_com_refresh_token(self) -> str:
+        payload = {
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "refresh_token": self.refresh_token,
+        }
+
+        logger.info("🔑 Renovando access token com o refresh token")
+        try:
+            resposta = await self.transporte.cliente().post(self.url_token, data=payload)
+            if resposta.status_code != 200:
+                raise ErroAutenticacao(f"Renovação do token recusada ({resposta.status_code})")
+            dados = resposta.json()
+            if not dados.get("access_token"):
+                raise ErroAutenticacao("Renovação do token sem access_token na resposta")
+        except ErroAutenticacao as e:
+            with self._trava:
+                self.falhas_renovacao += 1
+            logger.error("❌ %s", e.mensagem)
+            raise
+        except Exception as e:
+            with self._trava:
+                self.falhas_renovacao += 1
+            logger.error("❌ Erro ao renovar token: %s", e)
+            raise ErroAutenticacao("Não foi possível renovar o token.")
+
+        await asyncio.to_thread(self._aplicar_tokens, dados)
+        with self._trava:
+            self.renovacoes += 1
+        logger.info("✅ Access token renovado (expira em %s s)", dados.get("expires_in", "?"))
+        return self.access_token
+
+    def _aplicar_tokens(self, dados: Dict) -> None:
+        """Passa a usar os tokens de uma resposta de /oauth/token e os publica no armazenamento."""
+        with self._trava:
+            self.access_token = dados["access_token"]
+            # O Mercado Livre troca o refresh_token a cada uso
+            if dados.get("refresh_token"):
+                self.refresh_token = dados["refresh_token"]
+            expira = dados.get("expires_in")
+            self.expira_em = time.time() + float(expira) if expira else None
+            self._versao_tokens = self.armazenamento.gravar(self._dados_tokens())
+
+    def _token_configurado(self) -> str:
         if not self.access_token:
             raise RuntimeError(
                 "Access token não configurado. Execute o fluxo OAuth."
             )
-
         return self.access_token
+
+    def _sincronizar(self, forcar: bool = False) -> None:
+        """
+        Aplica tokens gravados por outro processo, se a versão do armazenamento mudou.
+
+        Sem forcar, consulta o armazenamento no máximo uma vez a cada
+        intervalo_sincronizacao segundos, e só lê os tokens quando a versão
+        (stat do arquivo, contador do SQLite) é outra.
+        """
+        if self._sincronizacao_devida(forcar):
+            self._aplicar_armazenamento()
+
+    async def _sincronizar_async(self, forcar: bool = False) -> None:
+        """Como _sincronizar, com a consulta ao armazenamento fora do laço de eventos."""
+        if self._sincronizacao_devida(forcar):
+            await asyncio.to_thread(self._aplicar_armazenamento)
+
+    def _sincronizacao_devida(self, forcar: bool) -> bool:
+        agora = time.monotonic()
+        if not forcar and agora < self._proxima_sincronizacao:
+            return False
+        self._proxima_sincronizacao = agora + self.intervalo_sincronizacao
+        return True
+
+    def _aplicar_armazenamento(self) -> None:
+        if self._versao_tokens is not None and self.armazenamento.versao() == self._versao_tokens:
+            return
+
+        versao, dados = self.armazenamento.ler()
+        if not dados or versao == self._versao_tokens:
+            return
+        with self._trava:
+            self.access_token = dados.get("access_token")
+            self.refresh_token = dados.get("refresh_token") or self.refresh_token
+            self.expira_em = dados.get("expira_em")
+            self._versao_tokens = versao
+
+    def _dados_tokens(self) -> Dict:
+        return {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "expira_em": self.expira_em,
+        }
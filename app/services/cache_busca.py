@@ -0,0 +1,254 @@
+"""
+Cache em memória dos resultados de busca do Mercado Livre.
+
+Responsável por:
+- Guardar a saída já formatada de _formatar_produtos por termo normalizado e página,
+  em registros compactos (ProdutoCompacto)
+- Expirar entradas por TTL e descartar as menos usadas (LRU) por quantidade e tamanho
+- Classificar entradas em frescas, velhas (servir e revalidar) e vencidas (só em erro)
+- Atender limites menores a partir de uma entrada buscada com limite maior
+- Contabilizar acertos, falhas e descartes
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.produto_compacto import ProdutoCompacto, compactar, expandir
+
+FRESCO = "fresco"
+VELHO = "velho"
+VENCIDO = "vencido"
+
+# Bytes de um produto e de um atributo em JSON além do texto dos campos
+# (chaves, aspas, separadores e o preço), usados para estimar o tamanho das entradas
+TAMANHO_BASE_PRODUTO = 100
+TAMANHO_BASE_ATRIBUTO = 27
+
+
+class _Entrada:
+    __slots__ = ("produtos", "limite", "criado_em", "tamanho", "itens_upstream")
+
+    def __init__(
+        self, produtos: Tuple[ProdutoCompacto, ...], limite: int, criado_em: float, tamanho: int,
+        itens_upstream: int,
+    ):
+        self.produtos = produtos
+        self.limite = limite
+        self.criado_em = criado_em
+        self.tamanho = tamanho
+        self.itens_upstream = itens_upstream
+
+
+class CacheBusca:
+    """
+    Cache TTL + LRU de buscas.
+
+    A chave é (termo normalizado, site_id, página); cada entrada lembra o
+    limite com que foi buscada e atende qualquer limite menor ou igual com
+    uma fatia. Páginas são guardadas separadamente, de modo que rolar a
+    lista não busca de novo as páginas anteriores.
+    Os produtos ficam guardados como ProdutoCompacto e cada consulta
+    devolve dicionários novos no formato de Produto; os dicionários de
+    atributo são compartilhados e devem ser tratados como somente leitura.
+
+    Pela idade, uma entrada é:
+        fresca: até ttl
+        velha: até ttl + janela_revalidacao (servida enquanto é revalidada)
+        vencida: até ttl + janela_erro (servida só se o upstream falhar)
+
+    Configuração por ambiente:
+        ML_CACHE_TTL: segundos de validade de uma entrada; 0 desativa o cache (padrão 300)
+        ML_CACHE_SWR: janela de revalidação em segundo plano após o TTL (padrão 60)
+        ML_CACHE_STALE_ERRO: janela para servir dados vencidos em erro do upstream (padrão 3600)
+        ML_CACHE_MAX_ENTRADAS: número máximo de páginas guardadas (padrão 1000)
+        ML_CACHE_MAX_BYTES: tamanho máximo estimado do cache (padrão 50 MB)
+        ML_CACHE_LIMITE_MINIMO: limite mínimo pedido ao upstream em uma falha (padrão 50)
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_entradas: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        limite_minimo: Optional[int] = None,
+        janela_revalidacao: Optional[float] = None,
+        janela_erro: Optional[float] = None,
+    ) -> None:
+        self.ttl = ttl if ttl is not None else float(os.getenv("ML_CACHE_TTL", "300"))
+        self.janela_revalidacao = (
+            janela_revalidacao if janela_revalidacao is not None else float(os.getenv("ML_CACHE_SWR", "60"))
+        )
+        self.janela_erro = janela_erro if janela_erro is not None else float(os.getenv("ML_CACHE_STALE_ERRO", "3600"))
+        self.max_entradas = max_entradas or int(os.getenv("ML_CACHE_MAX_ENTRADAS", "1000"))
+        self.max_bytes = max_bytes or int(os.getenv("ML_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.limite_minimo = limite_minimo or int(os.getenv("ML_CACHE_LIMITE_MINIMO", "50"))
+
+        self._entradas: "OrderedDict[Tuple[str, str, int], _Entrada]" = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+
+        self.acertos = 0
+        self.acertos_velhos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self.expiradas = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def normalizar(termo_busca: str) -> str:
+        """Normaliza o termo: minúsculas e espaços colapsados."""
+        return " ".join(termo_busca.lower().split())
+
+    def consultar(
+        self, termo_busca: str, limit: int, site_id: str = "MLB", pagina: int = 0
+    ) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """
+        Procura a página do termo no cache.
+
+        Returns:
+            (produtos cortados em limit, estado) onde estado é FRESCO, VELHO
+            ou VENCIDO; (None, None) se não houver entrada que cubra o limite.
+        """
+        if not self.ativo:
+            return None, None
+
+        chave = (self.normalizar(termo_busca), site_id, pagina)
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada.limite < limit:
+                self.falhas += 1
+                return None, None
+
+            idade = time.monotonic() - entrada.criado_em
+            if idade > self.ttl + max(self.janela_revalidacao, self.janela_erro):
+                self._remover(chave)
+                self.expiradas += 1
+                self.falhas += 1
+                return None, None
+
+            self._entradas.move_to_end(chave)
+            if idade <= self.ttl:
+                self.acertos += 1
+                estado = FRESCO
+            elif idade <= self.ttl + self.janela_revalidacao:
+                self.acertos_velhos += 1
+                estado = VELHO
+            else:
+                self.falhas += 1
+                estado = VENCIDO
+
+            registros = entrada.produtos[:limit]
+
+        return expandir(registros), estado
+
+    def itens_upstream(self, termo_busca: str, site_id: str = "MLB", pagina: int = 0) -> int:
+        """Itens que o upstream devolveu para a página guardada (0 se ela não estiver no cache)."""
+        with self._trava:
+            entrada = self._entradas.get((self.normalizar(termo_busca), site_id, pagina))
+            return entrada.itens_upstream if entrada is not None else 0
+
+    def fresco(self, termo_busca: str, limit: int, site_id: str = "MLB", pagina: int = 0) -> bool:
+        """Se há entrada fresca que cubra o limite, sem contar acerto nem mexer na ordem LRU."""
+        if not self.ativo:
+            return False
+        with self._trava:
+            entrada = self._entradas.get((self.normalizar(termo_busca), site_id, pagina))
+            return (
+                entrada is not None and entrada.limite >= limit
+                and time.monotonic() - entrada.criado_em <= self.ttl
+            )
+
+    def guardar(
+        self,
+        termo_busca: str,
+        limit: int,
+        produtos: List[Dict],
+        site_id: str = "MLB",
+        pagina: int = 0,
+        itens_upstream: Optional[int] = None,
+    ) -> None:
+        """
+        Guarda os produtos formatados de uma página buscada com o limite informado.
+
+        itens_upstream é quantos itens o upstream devolveu antes da formatação
+        descartar os sem id (padrão: len(produtos)); mostra se a página veio cheia.
+        """
+        if not self.ativo:
+            return
+
+        tamanho = _estimar_tamanho(produtos)
+        if tamanho > self.max_bytes:
+            return
+        registros = compactar(produtos)
+
+        chave = (self.normalizar(termo_busca), site_id, pagina)
+        with self._trava:
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = _Entrada(
+                registros, limit, time.monotonic(), tamanho,
+                len(produtos) if itens_upstream is None else itens_upstream,
+            )
+            self._bytes += tamanho
+
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                self._remover(next(iter(self._entradas)))
+                self.descartes += 1
+
+    def limpar(self) -> None:
+        """Remove todas as entradas, mantendo os contadores."""
+        with self._trava:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna contadores e ocupação do cache."""
+        with self._trava:
+            acertos = self.acertos + self.acertos_velhos
+            consultas = acertos + self.falhas
+            return {
+                "ativo": self.ativo,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "acertos": self.acertos,
+                "acertos_velhos": self.acertos_velhos,
+                "falhas": self.falhas,
+                "taxa_acerto": round(acertos / consultas, 4) if consultas else None,
+                "descartes": self.descartes,
+                "expiradas": self.expiradas,
+                "limites": {
+                    "ttl": self.ttl,
+                    "janela_revalidacao": self.janela_revalidacao,
+                    "janela_erro": self.janela_erro,
+                    "max_entradas": self.max_entradas,
+                    "max_bytes": self.max_bytes,
+                    "limite_minimo": self.limite_minimo,
+                },
+            }
+
+    def _remover(self, chave: Tuple[str, str, int]) -> None:
+        entrada = self._entradas.pop(chave)
+        self._bytes -= entrada.tamanho
+
+
+def _texto(valor: Any) -> int:
+    return len(valor) if valor.__class__ is str else 0
+
+
+def _estimar_tamanho(produtos: List[Dict]) -> int:
+    """Tamanho aproximado dos produtos em JSON, somando o texto dos campos sem serializar."""
+    tamanho = TAMANHO_BASE_PRODUTO * len(produtos)
+    for produto in produtos:
+        tamanho += (
+            _texto(produto["id"]) + _texto(produto["nome"]) + _texto(produto["status"])
+            + _texto(produto["imagem"]) + _texto(produto["url"])
+        )
+        for atributo in produto["atributos"]:
+            tamanho += TAMANHO_BASE_ATRIBUTO + _texto(atributo["nome"]) + _texto(atributo["valor"])
+    return tamanho
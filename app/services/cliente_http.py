@@ -0,0 +1,423 @@
+"""
+Camada de transporte HTTP compartilhada para a API do Mercado Livre.
+
+Responsável por:
+- Manter um pool de conexões keep-alive por processo (um cliente httpx por laço de eventos)
+- Limitar conexões totais e requisições simultâneas por host
+- Aplicar o limite de taxa do upstream (fila com prioridade e respeito a 429/Retry-After)
+- Repetir falhas transitórias com espera aleatória, dentro do orçamento da requisição
+- Separar timeout de conexão e de leitura, limitados ao tempo que resta do orçamento
+- Usar HTTP/2 quando o pacote h2 estiver instalado e o servidor suportar
+- Pedir respostas comprimidas (br com o pacote brotli instalado, senão gzip)
+- Executar corrotinas a partir de código síncrono em um laço de fundo
+- Expor estatísticas do pool para dimensionamento sob carga
+- Medir a latência e os bytes recebidos de cada chamada por endpoint (métricas do Prometheus)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.services.limitador_taxa import LimitadorTaxa, LimiteTaxaExcedido, criar_limitador
+from app.services.retentativas import STATUS_RETENTAVEIS, PoliticaRetentativa
+from app.utils.metricas import classe_status, registrar_bytes_upstream, registrar_upstream
+from app.utils.prazo import PrazoEsgotado, orcamento_atual
+from app.utils.registro import contar, detalhar
+
+try:
+    import h2  # noqa: F401
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
+try:
+    import brotli  # noqa: F401
+    BROTLI_DISPONIVEL = True
+except ImportError:
+    BROTLI_DISPONIVEL = False
+
+# O httpx só descomprime br com o pacote brotli instalado
+ACEITA_COMPRESSAO = "br, gzip" if BROTLI_DISPONIVEL else "gzip"
+
+logger = logging.getLogger(__name__)
+
+
+def _ler_int(nome: str, padrao: int) -> int:
+    valor = os.getenv(nome)
+    return int(valor) if valor else padrao
+
+
+def _ler_float(nome: str, padrao: float) -> float:
+    valor = os.getenv(nome)
+    return float(valor) if valor else padrao
+
+
+class _StreamLiberavel(httpx.AsyncByteStream):
+    """
+    Corpo de resposta que devolve a vaga do host quando é fechado e
+    informa quantos bytes chegaram (antes da descompressão).
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, liberar: Callable[[int], None]):
+        self._stream = stream
+        self._liberar = liberar
+        self._recebidos = 0
+
+    async def __aiter__(self):
+        async for parte in self._stream:
+            self._recebidos += len(parte)
+            yield parte
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._liberar(self._recebidos)
+
+
+class _TransporteInstrumentado(httpx.AsyncBaseTransport):
+    """
+    Envolve o transporte do httpx para aplicar o orçamento da requisição,
+    as novas tentativas, o limite de taxa e o limite por host, e
+    contabilizar requisições e conexões novas.
+
+    Um GET que recebe 429 é repetido uma vez, depois da pausa do Retry-After,
+    se ela couber na espera máxima do limitador e no orçamento.
+    """
+
+    def __init__(self, interno: httpx.AsyncBaseTransport, dono: "TransporteHTTP"):
+        self._interno = interno
+        self._dono = dono
+        self._semaforos: Dict[str, asyncio.Semaphore] = {}
+        self._conexoes_vistas: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+    def conexoes(self) -> list:
+        pool = getattr(self._interno, "_pool", None)
+        return list(pool.connections) if pool is not None else []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        politica = self._dono.retentativas
+        orcamento = orcamento_atual.get()
+        tentativa = 0
+        while True:
+            timeouts = self._limitar_timeouts(request, orcamento)
+            try:
+                resposta = await self._com_limite_de_taxa(request, orcamento)
+            except (LimiteTaxaExcedido, PrazoEsgotado):
+                raise
+            except httpx.TransportError as erro:
+                espera = politica.espera(request, tentativa)
+                if espera is None:
+                    raise
+                motivo = type(erro).__name__
+            else:
+                if resposta.status_code not in STATUS_RETENTAVEIS:
+                    return resposta
+                espera = politica.espera(request, tentativa)
+                if espera is None:
+                    return resposta
+                motivo = str(resposta.status_code)
+                await resposta.aclose()
+            finally:
+                request.extensions["timeout"] = timeouts
+
+            tentativa += 1
+            self._dono._registrar_retentativa()
+            if orcamento is not None:
+                orcamento.registrar_retentativa()
+            contar("upstream_retentativas")
+            if detalhar():
+                logger.debug("🔁 %s: %s, tentativa %d em %.0f ms", request.url.path, motivo, tentativa + 1, espera * 1000)
+            await asyncio.sleep(espera)
+
+    def _limitar_timeouts(self, request: httpx.Request, orcamento) -> Dict[str, Optional[float]]:
+        """
+        Reduz os timeouts da tentativa ao que resta do orçamento e devolve os
+        originais (para a próxima tentativa recalcular a partir deles).
+
+        Raises:
+            PrazoEsgotado: o orçamento já acabou
+        """
+        originais = request.extensions.get("timeout", {})
+        if orcamento is None:
+            return originais
+        restante = orcamento.restante()
+        if restante <= 0:
+            raise PrazoEsgotado("Orçamento da requisição esgotado", request=request)
+        request.extensions["timeout"] = {
+            chave: restante if valor is None else min(valor, restante) for chave, valor in originais.items()
+        }
+        return originais
+
+    async def _com_limite_de_taxa(self, request: httpx.Request, orcamento) -> httpx.Response:
+        limitador = self._dono.limitador
+        if limitador is None:
+            return await self._enviar(request)
+
+        for tentativa in range(2):
+            await limitador.adquirir()
+            resposta = await self._enviar(request)
+            if resposta.status_code != 429:
+                limitador.registrar_resposta()
+                return resposta
+
+            pausa = limitador.registrar_429(resposta.headers.get("Retry-After"))
+            restante = orcamento.restante() if orcamento is not None else pausa
+            if tentativa or request.method != "GET" or pausa > min(limitador.espera_maxima, restante):
+                return resposta
+            await resposta.aclose()
+
+    async def _enviar(self, request: httpx.Request) -> httpx.Response:
+        semaforo = self._semaforos.get(request.url.host)
+        if semaforo is None:
+            semaforo = asyncio.Semaphore(self._dono.max_por_host)
+            self._semaforos[request.url.host] = semaforo
+
+        contar("upstream_chamadas")
+        await semaforo.acquire()
+        inicio = time.perf_counter()
+        try:
+            resposta = await self._interno.handle_async_request(request)
+        except BaseException:
+            semaforo.release()
+            registrar_upstream(request.url.path, "erro", time.perf_counter() - inicio)
+            raise
+        registrar_upstream(request.url.path, classe_status(resposta.status_code), time.perf_counter() - inicio)
+
+        novas = 0
+        for conexao in self.conexoes():
+            if conexao not in self._conexoes_vistas:
+                self._conexoes_vistas.add(conexao)
+                novas += 1
+        self._dono._registrar(novas, resposta.extensions.get("http_version") == b"HTTP/2")
+
+        liberado = False
+
+        def liberar(recebidos: int) -> None:
+            nonlocal liberado
+            if not liberado:
+                liberado = True
+                semaforo.release()
+                registrar_bytes_upstream(request.url.path, recebidos)
+                contar("upstream_bytes", recebidos)
+                self._dono._registrar_bytes(recebidos)
+
+        return httpx.Response(
+            status_code=resposta.status_code,
+            headers=resposta.headers,
+            stream=_StreamLiberavel(resposta.stream, liberar),
+            extensions=resposta.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._interno.aclose()
+
+
+class TransporteHTTP:
+    """
+    Pool de conexões HTTP único do processo.
+
+    Cada laço de eventos recebe seu próprio httpx.AsyncClient (conexões não
+    podem atravessar laços), todos com os mesmos limites e contabilizados
+    juntos. O código síncrono usa um laço de fundo dedicado via executar().
+
+    Configuração por ambiente:
+        ML_HTTP_MAX_CONEXOES: conexões abertas no total (padrão 100)
+        ML_HTTP_MAX_KEEPALIVE: conexões ociosas mantidas abertas (padrão 20)
+        ML_HTTP_MAX_POR_HOST: requisições simultâneas por host (padrão 50)
+        ML_HTTP_KEEPALIVE_EXPIRY: segundos até fechar uma conexão ociosa (padrão 30)
+        ML_HTTP2: "0" desativa HTTP/2 mesmo com h2 instalado
+        ML_HTTP_COMPRESSAO: valor do Accept-Encoding (padrão "br, gzip" com brotli instalado, senão "gzip")
+        ML_HTTP_TIMEOUT_CONEXAO: segundos para abrir uma conexão (padrão 2)
+        ML_HTTP_TIMEOUT_LEITURA: segundos de espera por dados do upstream (padrão 5)
+        ML_RETENTATIVA*: novas tentativas (ver PoliticaRetentativa)
+        ML_LIMITE_*: limite de taxa do upstream (ver LimitadorTaxa)
+    """
+
+    def __init__(
+        self,
+        max_conexoes: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        max_por_host: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        timeout_conexao: Optional[float] = None,
+        timeout_leitura: Optional[float] = None,
+        transporte_interno: Optional[httpx.AsyncBaseTransport] = None,
+        limitador: Optional[LimitadorTaxa] = None,
+        retentativas: Optional[PoliticaRetentativa] = None,
+    ) -> None:
+        self.max_conexoes = max_conexoes or _ler_int("ML_HTTP_MAX_CONEXOES", 100)
+        self.max_keepalive = max_keepalive or _ler_int("ML_HTTP_MAX_KEEPALIVE", 20)
+        self.max_por_host = max_por_host or _ler_int("ML_HTTP_MAX_POR_HOST", 50)
+        self.keepalive_expiry = keepalive_expiry or _ler_float("ML_HTTP_KEEPALIVE_EXPIRY", 30.0)
+        if http2 is None:
+            http2 = os.getenv("ML_HTTP2", "1") != "0"
+        self.http2 = http2 and HTTP2_DISPONIVEL
+        self.aceita_compressao = os.getenv("ML_HTTP_COMPRESSAO", ACEITA_COMPRESSAO)
+        self.timeout_conexao = timeout_conexao or _ler_float("ML_HTTP_TIMEOUT_CONEXAO", 2.0)
+        self.timeout_leitura = timeout_leitura or _ler_float("ML_HTTP_TIMEOUT_LEITURA", 5.0)
+        self.timeout = httpx.Timeout(self.timeout_leitura, connect=self.timeout_conexao)
+        self._transporte_interno = transporte_interno
+        self.limitador = limitador or criar_limitador()
+        self.retentativas = retentativas or PoliticaRetentativa()
+
+        self._clientes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._transportes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _TransporteInstrumentado]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._laco_fundo: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_fundo: Optional[threading.Thread] = None
+        self._trava = threading.Lock()
+
+        self._requisicoes = 0
+        self._conexoes_novas = 0
+        self._requisicoes_http2 = 0
+        self._retentativas = 0
+        self._bytes_recebidos = 0
+
+    def cliente(self) -> httpx.AsyncClient:
+        """
+        Retorna o cliente do laço de eventos atual, criando-o se necessário.
+
+        Deve ser chamado de dentro de uma corrotina.
+        """
+        laco = asyncio.get_running_loop()
+        cliente = self._clientes.get(laco)
+        if cliente is None or cliente.is_closed:
+            limites = httpx.Limits(
+                max_connections=self.max_conexoes,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            )
+            interno = self._transporte_interno or httpx.AsyncHTTPTransport(
+                limits=limites, http2=self.http2
+            )
+            transporte = _TransporteInstrumentado(interno, self)
+            cliente = httpx.AsyncClient(
+                timeout=self.timeout, transport=transporte, headers={"Accept-Encoding": self.aceita_compressao}
+            )
+            self._clientes[laco] = cliente
+            self._transportes[laco] = transporte
+        return cliente
+
+    def executar(self, corrotina: Awaitable) -> Any:
+        """
+        Executa uma corrotina no laço de fundo e bloqueia até o resultado.
+
+        Permite que métodos síncronos reaproveitem o mesmo pool de conexões.
+        """
+        laco = self._obter_laco_fundo()
+        try:
+            atual = asyncio.get_running_loop()
+        except RuntimeError:
+            atual = None
+        if atual is laco:
+            raise RuntimeError("executar() não pode ser chamado de dentro do laço de fundo")
+        return asyncio.run_coroutine_threadsafe(corrotina, laco).result()
+
+    async def fechar(self) -> None:
+        """Fecha o cliente do laço de eventos atual, se existir."""
+        laco = asyncio.get_running_loop()
+        self._transportes.pop(laco, None)
+        cliente = self._clientes.pop(laco, None)
+        if cliente is not None:
+            await cliente.aclose()
+
+    async def encerrar(self) -> None:
+        """
+        Fecha o cliente do laço atual e o do laço de fundo, e para o laço de fundo.
+
+        Usado no shutdown da aplicação; o transporte pode ser reaberto depois
+        (um novo cliente é criado no próximo uso).
+        """
+        await self.fechar()
+
+        with self._trava:
+            laco, thread = self._laco_fundo, self._thread_fundo
+            self._laco_fundo = self._thread_fundo = None
+        if laco is None:
+            return
+
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.fechar(), laco))
+        laco.call_soon_threadsafe(laco.stop)
+        await asyncio.get_running_loop().run_in_executor(None, thread.join, 5)
+        laco.close()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna contadores e estado atual do pool de conexões."""
+        conexoes = [c for t in list(self._transportes.values()) for c in t.conexoes()]
+        with self._trava:
+            requisicoes = self._requisicoes
+            novas = self._conexoes_novas
+            http2 = self._requisicoes_http2
+            retentativas = self._retentativas
+            recebidos = self._bytes_recebidos
+
+        return {
+            "requisicoes": requisicoes,
+            "conexoes_novas": novas,
+            "taxa_reuso": round(1 - novas / requisicoes, 4) if requisicoes else None,
+            "conexoes_abertas": sum(1 for c in conexoes if not c.is_closed()),
+            "conexoes_ociosas": sum(1 for c in conexoes if c.is_idle()),
+            "requisicoes_http2": http2,
+            "retentativas": retentativas,
+            "bytes_recebidos": recebidos,
+            "clientes": len(self._clientes),
+            "limite_taxa": self.limitador.estatisticas() if self.limitador else None,
+            "limites": {
+                "max_conexoes": self.max_conexoes,
+                "max_keepalive": self.max_keepalive,
+                "max_por_host": self.max_por_host,
+                "keepalive_expiry": self.keepalive_expiry,
+                "http2": self.http2,
+                "timeout_conexao": self.timeout_conexao,
+                "timeout_leitura": self.timeout_leitura,
+                "retentativas": self.retentativas.maximo,
+            },
+        }
+
+    def _registrar(self, conexoes_novas: int, http2: bool) -> None:
+        with self._trava:
+            self._requisicoes += 1
+            self._conexoes_novas += conexoes_novas
+            if http2:
+                self._requisicoes_http2 += 1
+
+    def _registrar_bytes(self, recebidos: int) -> None:
+        with self._trava:
+            self._bytes_recebidos += recebidos
+
+    def _registrar_retentativa(self) -> None:
+        with self._trava:
+            self._retentativas += 1
+
+    def _obter_laco_fundo(self) -> asyncio.AbstractEventLoop:
+        with self._trava:
+            if self._laco_fundo is None:
+                laco = asyncio.new_event_loop()
+                self._thread_fundo = threading.Thread(
+                    target=laco.run_forever, name="transporte-http", daemon=True
+                )
+                self._thread_fundo.start()
+                self._laco_fundo = laco
+            return self._laco_fundo
+
+
+_transporte: Optional[TransporteHTTP] = None
+
+
+def obter_transporte() -> TransporteHTTP:
+    """Retorna o transporte HTTP do processo, criando-o na primeira chamada."""
+    global _transporte
+    if _transporte is None:
+        _transporte = TransporteHTTP()
+    return _transporte
@@ -0,0 +1,82 @@
+"""
+Coalescência de chamadas simultâneas (single-flight).
+
+Chamadas concorrentes com a mesma chave compartilham uma única execução:
+a primeira dispara o trabalho e as demais aguardam o mesmo resultado.
+Funciona entre laços de eventos diferentes (rota assíncrona e laço de
+fundo usado pelo caminho síncrono), pois o resultado é publicado em um
+concurrent.futures.Future.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set
+
+from app.utils.tarefas import cancelar_tarefas
+
+
+class Coalescencia:
+    """Agrupa chamadas simultâneas idênticas em uma só execução."""
+
+    def __init__(self) -> None:
+        self._em_voo: Dict[Hashable, concurrent.futures.Future] = {}
+        self._tarefas: Set[asyncio.Task] = set()
+        self._trava = threading.Lock()
+
+        self.execucoes = 0
+        self.coalescidas = 0
+
+    async def executar(self, chave: Hashable, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executa fabrica() uma vez por chave entre as chamadas simultâneas.
+
+        A execução roda em uma tarefa própria: se quem a disparou for
+        cancelado, as demais chamadas continuam recebendo o resultado.
+        """
+        with self._trava:
+            futuro = self._em_voo.get(chave)
+            if futuro is None:
+                futuro = concurrent.futures.Future()
+                self._em_voo[chave] = futuro
+                self.execucoes += 1
+                lider = True
+            else:
+                self.coalescidas += 1
+                lider = False
+
+        if lider:
+            tarefa = asyncio.get_running_loop().create_task(fabrica())
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(lambda t: self._concluir(chave, futuro, t))
+
+        return await asyncio.shield(asyncio.wrap_future(futuro))
+
+    async def cancelar(self) -> None:
+        """Cancela as execuções em andamento; quem as aguarda recebe CancelledError."""
+        await cancelar_tarefas(self._tarefas)
+
+    def em_voo(self) -> int:
+        with self._trava:
+            return len(self._em_voo)
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna execuções reais, chamadas coalescidas e chamadas em andamento."""
+        with self._trava:
+            return {
+                "execucoes": self.execucoes,
+                "coalescidas": self.coalescidas,
+                "em_voo": len(self._em_voo),
+            }
+
+    def _concluir(self, chave: Hashable, futuro: concurrent.futures.Future, tarefa: asyncio.Task) -> None:
+        with self._trava:
+            self._em_voo.pop(chave, None)
+        self._tarefas.discard(tarefa)
+
+        if tarefa.cancelled():
+            futuro.cancel()
+        elif tarefa.exception() is not None:
+            futuro.set_exception(tarefa.exception())
+        else:
+            futuro.set_result(tarefa.result())
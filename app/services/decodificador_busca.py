@@ -0,0 +1,79 @@
+"""
+Decodificação das respostas de busca do Mercado Livre.
+
+Responsável por:
+- Decodificar de /products/search e /sites/MLB/search apenas os campos
+  lidos pelo FormatadorProdutos, pulando o resto do payload sem criar objetos
+- Cair para a decodificação completa quando o payload foge do formato esperado
+
+A decodificação parcial usa msgspec, guiada por um schema derivado das
+regras de extração do formatador (CHAVES_NOME, CHAVES_URL...), então um
+campo novo nas regras entra no schema sem outra mudança. Os itens saem
+como dicionários comuns, só com as chaves conhecidas, e seguem o mesmo
+caminho de antes (formatador, cache, enriquecimento).
+
+Sem msgspec instalado, ou quando um campo vem com tipo inesperado (ex.:
+"attributes" que não é lista), o payload inteiro é decodificado com
+orjson (ou json da biblioteca padrão), como antes.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, TypedDict, Union
+
+from app.services.formatador_produtos import CHAVES_NOME, CHAVES_URL, CHAVES_URL_IMAGEM
+from app.utils.json_rapido import decodificar_json
+
+try:
+    import msgspec
+    MSGSPEC_DISPONIVEL = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    msgspec = None
+    MSGSPEC_DISPONIVEL = False
+
+logger = logging.getLogger(__name__)
+
+# Valores escalares ficam como Any: o formatador já trata tipos inesperados
+# (preço em texto, status numérico...) e não vale a pena cair na decodificação completa por eles
+FotoBusca = TypedDict("FotoBusca", {chave: Any for chave in CHAVES_URL_IMAGEM}, total=False)
+PrecoBusca = TypedDict("PrecoBusca", {"amount": Any}, total=False)
+AtributoBusca = TypedDict("AtributoBusca", {"name": Any, "value_name": Any}, total=False)
+CaixaBusca = TypedDict("CaixaBusca", {"permalink": Any}, total=False)
+
+ItemBusca = TypedDict(
+    "ItemBusca",
+    {
+        "id": Any,
+        **{chave: Any for chave in CHAVES_NOME + CHAVES_URL},
+        "secure_thumbnail": Any,
+        "thumbnail": Any,
+        "pictures": Optional[List[Union[FotoBusca, str, None]]],
+        "buy_box_winner": Optional[CaixaBusca],
+        "price": Any,
+        "prices": Optional[List[PrecoBusca]],
+        "status": Any,
+        "attributes": Optional[List[AtributoBusca]],
+    },
+    total=False,
+)
+RespostaBuscaBruta = TypedDict("RespostaBuscaBruta", {"results": Optional[List[ItemBusca]]}, total=False)
+
+_decodificador = msgspec.json.Decoder(RespostaBuscaBruta) if MSGSPEC_DISPONIVEL else None
+
+
+def decodificar_resultados(conteudo: bytes) -> List[Dict]:
+    """
+    Lista "results" de uma resposta de busca, só com os campos usados na formatação.
+
+    Raises:
+        ValueError: conteúdo não é JSON válido (json.JSONDecodeError)
+        AttributeError: o JSON não é um objeto (mesmo erro de response.json().get)
+    """
+    if _decodificador is not None:
+        try:
+            return _decodificador.decode(conteudo).get("results") or []
+        except msgspec.ValidationError as e:
+            logger.debug("⚠️ Payload fora do schema de busca (%s); decodificando completo", e)
+        except msgspec.DecodeError:
+            # JSON inválido: a decodificação completa levanta o mesmo erro de antes
+            pass
+    return decodificar_json(conteudo).get("results", []) or []
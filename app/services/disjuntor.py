@@ -0,0 +1,193 @@
+"""
+Disjuntor (circuit breaker) por endpoint do upstream.
+
+Responsável por:
+- Abrir o circuito após falhas seguidas ou respostas lentas demais
+- Recusar chamadas na hora enquanto aberto, sem esperar o timeout do upstream
+- Liberar sondas depois de um tempo (meio-aberto) e fechar quando elas passam
+- Registrar as transições de estado no log e expô-las nas estatísticas
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from app.services.limitador_taxa import LimiteTaxaExcedido
+from app.utils.erros import ErroCircuitoAberto
+from app.utils.prazo import PrazoEsgotado
+
+logger = logging.getLogger(__name__)
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+
+class _Chamada:
+    """
+    Uma chamada protegida pelo disjuntor, usada como gerenciador de contexto.
+
+    Erros do httpx (exceto o descarte do limite de taxa e o fim do
+    orçamento, que são locais) e chamadas marcadas com falhou contam como
+    falha; cancelamentos e outros erros só contam se a chamada já tiver
+    passado do limite de latência.
+    """
+
+    def __init__(self, disjuntor: "Disjuntor", sonda: bool) -> None:
+        self._disjuntor = disjuntor
+        self._sonda = sonda
+        self._inicio = time.monotonic()
+        self.falhou = False
+
+    def __enter__(self) -> "_Chamada":
+        return self
+
+    def __exit__(self, tipo, erro, rastro) -> bool:
+        duracao = time.monotonic() - self._inicio
+        if tipo is None:
+            self._disjuntor._concluir(self._sonda, not self.falhou, duracao)
+        elif issubclass(tipo, httpx.HTTPError) and not issubclass(tipo, (LimiteTaxaExcedido, PrazoEsgotado)):
+            self._disjuntor._concluir(self._sonda, False, duracao)
+        else:
+            self._disjuntor._abandonar(self._sonda, duracao)
+        return False
+
+
+class Disjuntor:
+    """
+    Circuito de um endpoint: fechado → aberto → meio-aberto → fechado.
+
+    Fechado, conta falhas seguidas (erro de rede, 5xx ou resposta acima do
+    limite de latência) e abre ao atingir o limite. Aberto, recusa chamadas
+    com ErroCircuitoAberto até passar o tempo de abertura. Meio-aberto,
+    deixa passar poucas sondas ao mesmo tempo: se todas as necessárias dão
+    certo o circuito fecha; qualquer falha o reabre.
+
+    Configuração por ambiente:
+        ML_DISJUNTOR_FALHAS: falhas seguidas para abrir (padrão 5)
+        ML_DISJUNTOR_LATENCIA: segundos acima dos quais uma resposta conta como falha (padrão 5)
+        ML_DISJUNTOR_ABERTO: segundos aberto antes de liberar sondas (padrão 30)
+        ML_DISJUNTOR_SONDAS: sondas bem-sucedidas para fechar (padrão 1)
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        limite_falhas: Optional[int] = None,
+        limite_latencia: Optional[float] = None,
+        tempo_aberto: Optional[float] = None,
+        sondas: Optional[int] = None,
+    ) -> None:
+        self.nome = nome
+        self.limite_falhas = limite_falhas or int(os.getenv("ML_DISJUNTOR_FALHAS", "5"))
+        self.limite_latencia = limite_latencia or float(os.getenv("ML_DISJUNTOR_LATENCIA", "5"))
+        self.tempo_aberto = tempo_aberto if tempo_aberto is not None else float(os.getenv("ML_DISJUNTOR_ABERTO", "30"))
+        self.sondas = sondas or int(os.getenv("ML_DISJUNTOR_SONDAS", "1"))
+
+        self._estado = FECHADO
+        self._falhas_seguidas = 0
+        self._aberto_ate = 0.0
+        self._sondas_em_andamento = 0
+        self._sondas_ok = 0
+        self._trava = threading.Lock()
+
+        self.aberturas = 0
+        self.recusadas = 0
+        self.falhas = 0
+        self.lentas = 0
+
+    @property
+    def estado(self) -> str:
+        with self._trava:
+            self._verificar_reabertura(time.monotonic())
+            return self._estado
+
+    def chamada(self) -> _Chamada:
+        """
+        Reserva uma chamada ao endpoint.
+
+        Raises:
+            ErroCircuitoAberto: circuito aberto, ou meio-aberto sem vaga para sonda
+        """
+        with self._trava:
+            agora = time.monotonic()
+            self._verificar_reabertura(agora)
+            if self._estado == FECHADO:
+                return _Chamada(self, sonda=False)
+            if self._estado == MEIO_ABERTO and self._sondas_em_andamento < self.sondas - self._sondas_ok:
+                self._sondas_em_andamento += 1
+                return _Chamada(self, sonda=True)
+            self.recusadas += 1
+        raise ErroCircuitoAberto(self.nome)
+
+    def estatisticas(self) -> Dict:
+        with self._trava:
+            agora = time.monotonic()
+            self._verificar_reabertura(agora)
+            return {
+                "estado": self._estado,
+                "falhas_seguidas": self._falhas_seguidas,
+                "reabre_em": round(self._aberto_ate - agora, 3) if self._estado == ABERTO else None,
+                "aberturas": self.aberturas,
+                "recusadas": self.recusadas,
+                "falhas": self.falhas,
+                "respostas_lentas": self.lentas,
+                "limites": {
+                    "falhas": self.limite_falhas,
+                    "latencia": self.limite_latencia,
+                    "tempo_aberto": self.tempo_aberto,
+                    "sondas": self.sondas,
+                },
+            }
+
+    def _concluir(self, sonda: bool, sucesso: bool, duracao: float) -> None:
+        with self._trava:
+            if sonda:
+                self._sondas_em_andamento -= 1
+            if sucesso and duracao > self.limite_latencia:
+                sucesso = False
+                self.lentas += 1
+            if sucesso:
+                self._registrar_sucesso(sonda)
+            else:
+                self._registrar_falha(duracao)
+
+    def _abandonar(self, sonda: bool, duracao: float) -> None:
+        """Chamada cancelada ou interrompida por erro local: só conta se já estava lenta."""
+        with self._trava:
+            if sonda:
+                self._sondas_em_andamento -= 1
+            if duracao > self.limite_latencia:
+                self.lentas += 1
+                self._registrar_falha(duracao)
+
+    def _registrar_sucesso(self, sonda: bool) -> None:
+        self._falhas_seguidas = 0
+        if sonda and self._estado == MEIO_ABERTO:
+            self._sondas_ok += 1
+            if self._sondas_ok >= self.sondas:
+                self._estado = FECHADO
+                logger.info("🟢 Circuito '%s' fechado: sondas bem-sucedidas", self.nome)
+
+    def _registrar_falha(self, duracao: float) -> None:
+        self.falhas += 1
+        self._falhas_seguidas += 1
+        if self._estado == MEIO_ABERTO or (self._estado == FECHADO and self._falhas_seguidas >= self.limite_falhas):
+            motivo = "sonda falhou" if self._estado == MEIO_ABERTO else f"{self._falhas_seguidas} falhas seguidas"
+            self._estado = ABERTO
+            self._aberto_ate = time.monotonic() + self.tempo_aberto
+            self.aberturas += 1
+            logger.warning(
+                "🔴 Circuito '%s' aberto (%s, última em %.2fs); recusando chamadas por %gs",
+                self.nome, motivo, duracao, self.tempo_aberto,
+            )
+
+    def _verificar_reabertura(self, agora: float) -> None:
+        if self._estado == ABERTO and agora >= self._aberto_ate:
+            self._estado = MEIO_ABERTO
+            self._sondas_ok = 0
+            logger.info("🟡 Circuito '%s' meio-aberto: liberando sondas", self.nome)
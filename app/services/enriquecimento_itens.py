@@ -0,0 +1,216 @@
+"""
+Enriquecimento de produtos com os detalhes de /items do Mercado Livre.
+
+Responsável por:
+- Buscar detalhes de vários itens por requisição (/items?ids=...), só com
+  os campos usados na formatação
+- Disparar os lotes em paralelo dentro de um orçamento total de tempo
+- Guardar os detalhes por ID com TTL (inclusive itens inexistentes)
+- Preencher nome, imagem, URL, preço e atributos ausentes
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from app.services.formatador_produtos import NAO_INFORMADO
+from app.services.selecao_campos import ITENS, SelecaoCampos, get_com_selecao
+
+logger = logging.getLogger(__name__)
+
+# Máximo de IDs aceito pela API em uma chamada multi-get
+MAX_IDS_POR_LOTE = 20
+
+
+class EnriquecimentoItens:
+    """
+    Completa produtos formatados com os detalhes do endpoint /items.
+
+    Configuração por ambiente:
+        ML_ENRIQUECIMENTO_ORCAMENTO: tempo máximo total gasto com /items por busca (padrão 0.8 s)
+        ML_ITENS_CACHE_TTL: segundos de validade dos detalhes em cache (padrão 600)
+        ML_ITENS_CACHE_MAX: quantidade máxima de itens em cache (padrão 5000)
+    """
+
+    def __init__(
+        self,
+        obter_cliente: Callable[[], httpx.AsyncClient],
+        api_url: str,
+        formatar: Callable[[List[Dict]], List[Dict]],
+        orcamento: Optional[float] = None,
+        ttl: Optional[float] = None,
+        max_itens: Optional[int] = None,
+        selecao: Optional[SelecaoCampos] = None,
+    ) -> None:
+        self._obter_cliente = obter_cliente
+        self.selecao = selecao or SelecaoCampos()
+        self.url_itens = f"{api_url}/items"
+        self._formatar = formatar
+        self.orcamento = orcamento if orcamento is not None else float(os.getenv("ML_ENRIQUECIMENTO_ORCAMENTO", "0.8"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("ML_ITENS_CACHE_TTL", "600"))
+        self.max_itens = max_itens or int(os.getenv("ML_ITENS_CACHE_MAX", "5000"))
+
+        # id -> (criado_em, produto formatado ou None se o item não existe)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._trava = threading.Lock()
+
+        self.itens_do_cache = 0
+        self.itens_consultados = 0
+        self.lotes = 0
+        self.lotes_com_erro = 0
+        self.orcamentos_estourados = 0
+
+    async def enriquecer(self, produtos: List[Dict], token: str, orcamento: Optional[float] = None) -> List[Dict]:
+        """
+        Retorna uma nova lista com os campos ausentes preenchidos.
+
+        Os dicionários originais não são alterados (podem estar no cache de
+        buscas). Itens cujos detalhes não chegarem dentro do orçamento
+        ficam como estão.
+        """
+        ids = [p["id"] for p in produtos if self._incompleto(p)]
+        if not ids:
+            return produtos
+
+        detalhes = await self.buscar_detalhes(ids, token, orcamento)
+        return [
+            self._completar(p, detalhes[p["id"]]) if detalhes.get(p["id"]) else p
+            for p in produtos
+        ]
+
+    async def buscar_detalhes(self, ids: List[str], token: str, orcamento: Optional[float] = None) -> Dict[str, Optional[Dict]]:
+        """
+        Retorna {id: produto formatado ou None} para os IDs obtidos dentro do orçamento.
+        """
+        detalhes, faltantes = self._consultar_cache(ids)
+        if not faltantes:
+            return detalhes
+
+        orcamento = self.orcamento if orcamento is None else orcamento
+        headers = {"Authorization": f"Bearer {token}"}
+        lotes = [faltantes[i:i + MAX_IDS_POR_LOTE] for i in range(0, len(faltantes), MAX_IDS_POR_LOTE)]
+        tarefas = [asyncio.create_task(self._buscar_lote(lote, headers)) for lote in lotes]
+
+        concluidas, pendentes = await asyncio.wait(tarefas, timeout=orcamento)
+        if pendentes:
+            with self._trava:
+                self.orcamentos_estourados += 1
+            logger.warning(
+                "⏱️ Enriquecimento: %d de %d lotes fora do orçamento de %.0f ms", len(pendentes), len(tarefas), orcamento * 1000
+            )
+            for tarefa in pendentes:
+                tarefa.cancel()
+
+        for tarefa in concluidas:
+            detalhes.update(tarefa.result())
+        return detalhes
+
+    def estatisticas(self) -> Dict:
+        with self._trava:
+            return {
+                "itens_em_cache": len(self._cache),
+                "itens_do_cache": self.itens_do_cache,
+                "itens_consultados": self.itens_consultados,
+                "lotes": self.lotes,
+                "lotes_com_erro": self.lotes_com_erro,
+                "orcamentos_estourados": self.orcamentos_estourados,
+                "orcamento": self.orcamento,
+            }
+
+    async def _buscar_lote(self, ids: List[str], headers: Dict) -> Dict[str, Optional[Dict]]:
+        """Busca até MAX_IDS_POR_LOTE itens em uma chamada; erros resultam em lote vazio."""
+        with self._trava:
+            self.lotes += 1
+            self.itens_consultados += len(ids)
+
+        try:
+            response = await get_com_selecao(
+                self._obter_cliente(), self.selecao, ITENS, self.url_itens, headers, {"ids": ",".join(ids)}
+            )
+            if response.status_code != 200:
+                logger.warning("❌ /items respondeu %s para lote de %d itens", response.status_code, len(ids))
+                with self._trava:
+                    self.lotes_com_erro += 1
+                return {}
+            respostas = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("❌ Erro ao buscar lote de %d itens: %s", len(ids), e)
+            with self._trava:
+                self.lotes_com_erro += 1
+            return {}
+        if not isinstance(respostas, list):
+            # Ex.: {"message": ...} com status 200; os demais lotes continuam valendo
+            logger.warning(
+                "❌ /items respondeu %s em vez de uma lista para lote de %d itens", type(respostas).__name__, len(ids)
+            )
+            with self._trava:
+                self.lotes_com_erro += 1
+            return {}
+
+        detalhes = {}
+        for item_id, resposta in zip(ids, respostas):
+            if not isinstance(resposta, dict):
+                continue
+            corpo = resposta.get("body")
+            if not isinstance(corpo, dict):
+                corpo = {}
+            if resposta.get("code") == 200:
+                formatados = self._formatar([corpo])
+                detalhes[corpo.get("id", item_id)] = formatados[0] if formatados else None
+            elif resposta.get("code") == 404:
+                # Item removido ou inacessível: guardar para não consultar de novo
+                detalhes[item_id] = None
+
+        self._guardar(detalhes)
+        return detalhes
+
+    def _consultar_cache(self, ids: List[str]):
+        agora = time.monotonic()
+        detalhes, faltantes = {}, []
+        with self._trava:
+            for item_id in ids:
+                entrada = self._cache.get(item_id)
+                if entrada is not None and agora - entrada[0] <= self.ttl:
+                    self._cache.move_to_end(item_id)
+                    detalhes[item_id] = entrada[1]
+                    self.itens_do_cache += 1
+                else:
+                    faltantes.append(item_id)
+        return detalhes, faltantes
+
+    def _guardar(self, detalhes: Dict[str, Optional[Dict]]) -> None:
+        agora = time.monotonic()
+        with self._trava:
+            for item_id, detalhe in detalhes.items():
+                self._cache[item_id] = (agora, detalhe)
+                self._cache.move_to_end(item_id)
+            while len(self._cache) > self.max_itens:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _incompleto(produto: Dict) -> bool:
+        return (
+            produto["nome"] == NAO_INFORMADO
+            or produto["imagem"] == NAO_INFORMADO
+            or produto.get("url") == NAO_INFORMADO
+            or produto.get("preco") is None
+            or all(a["nome"] == NAO_INFORMADO for a in produto["atributos"])
+        )
+
+    @staticmethod
+    def _completar(produto: Dict, detalhe: Dict) -> Dict:
+        novo = dict(produto)
+        for campo in ("nome", "imagem", "url"):
+            if novo.get(campo) == NAO_INFORMADO and detalhe.get(campo) != NAO_INFORMADO:
+                novo[campo] = detalhe[campo]
+        if novo.get("preco") is None:
+            novo["preco"] = detalhe.get("preco")
+        if all(a["nome"] == NAO_INFORMADO for a in novo["atributos"]):
+            novo["atributos"] = detalhe["atributos"]
+        return novo
@@ -0,0 +1,188 @@
+"""
+Formatação dos itens brutos do Mercado Livre no formato de Produto.
+
+Responsável por:
+- Declarar as regras de extração (de quais chaves vem cada campo, em ordem)
+- Formatar uma página inteira em uma passada, já separando os produtos
+  com imagem dos sem imagem (ordenação estável sem sort)
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+NAO_INFORMADO = "Não informado"
+
+# Regras de extração: a primeira chave com valor vence
+CHAVES_NOME = ("title", "name", "product_name")
+CHAVES_URL = ("permalink", "url", "product_url")
+CHAVES_URL_IMAGEM = ("secure_url", "url")
+MAX_ATRIBUTOS = 3
+
+# Status já normalizados, para não repetir strip/lower nos valores comuns
+_STATUS_NORMALIZADOS = frozenset(("active", "paused", "closed", "under_review", "inactive"))
+
+
+class PaginaFormatada(NamedTuple):
+    produtos: List[Dict]
+    sem_id: int
+    incompletos: int
+
+
+class FormatadorProdutos:
+    """
+    Formata listas de itens brutos (de /products/search, /sites/MLB/search
+    ou /items) em dicionários no formato de Produto.
+
+    Itens sem id são descartados; nome, imagem e url ausentes viram
+    "Não informado", status ausente vira "unknown" e os atributos são
+    completados até max_atributos.
+    """
+
+    def __init__(
+        self,
+        chaves_nome: Sequence[str] = CHAVES_NOME,
+        chaves_url: Sequence[str] = CHAVES_URL,
+        chaves_url_imagem: Sequence[str] = CHAVES_URL_IMAGEM,
+        max_atributos: int = MAX_ATRIBUTOS,
+    ) -> None:
+        self.chaves_nome = tuple(chaves_nome)
+        self.chaves_url = tuple(chaves_url)
+        self.chaves_url_imagem = tuple(chaves_url_imagem)
+        self.max_atributos = int(max_atributos)
+
+    def formatar(self, resultados: Optional[List[Dict]], ordenar: bool = True) -> PaginaFormatada:
+        """
+        Formata uma página de itens em uma passada.
+
+        Args:
+            resultados: itens brutos do upstream
+            ordenar: se True, produtos com imagem vêm primeiro (estável:
+                mantém a ordem do upstream entre os de cada grupo)
+
+        Returns:
+            Produtos, quantidade de itens sem id e de produtos incompletos
+            (sem nome ou sem imagem)
+        """
+        # Uma passada por item, com a extração de cada campo em linha (sem uma
+        # chamada por campo) e as regras em variáveis locais; a primeira chave
+        # de nome e de url é consultada direto, as outras só se ela faltar
+        nao_informado = NAO_INFORMADO
+        normalizados = _STATUS_NORMALIZADOS
+        chave_nome, *outras_chaves_nome = self.chaves_nome
+        chave_url, *outras_chaves_url = self.chaves_url
+        chaves_url_imagem, max_atributos = self.chaves_url_imagem, self.max_atributos
+        com_imagem: List[Dict] = []
+        sem_imagem = [] if ordenar else com_imagem
+        guardar_com, guardar_sem = com_imagem.append, sem_imagem.append
+        sem_id = incompletos = 0
+
+        for item in resultados or ():
+            produto_id = item.get("id")
+            if not produto_id:
+                sem_id += 1
+                continue
+
+            nome = item.get(chave_nome) or _primeiro_valor(item.get, outras_chaves_nome)
+            nome = nome.strip() if nome else None
+            if not nome:
+                nome = nao_informado
+
+            # secure_thumbnail, thumbnail ou a primeira foto, sempre em https
+            imagem = item.get("secure_thumbnail")
+            imagem = (imagem.strip() or None) if imagem else None
+            if imagem is None:
+                imagem = item.get("thumbnail")
+                imagem = (imagem.strip() or None) if imagem else None
+                if imagem is None:
+                    fotos = item.get("pictures")
+                    foto = fotos[0] if fotos else None
+                    if isinstance(foto, dict):
+                        foto = _primeiro_valor(foto.get, chaves_url_imagem)
+                        imagem = (foto.strip() or None) if foto else None
+                    elif isinstance(foto, str):
+                        imagem = foto.strip()
+                if imagem and imagem.startswith("http://"):
+                    imagem = "https://" + imagem[7:]
+            sem_foto = imagem is None
+            if sem_foto:
+                imagem = nao_informado
+                incompletos += 1
+            elif nome == nao_informado:
+                incompletos += 1
+
+            # Permalink do buy_box_winner ou do próprio item, se for http(s)
+            caixa = item.get("buy_box_winner")
+            url = caixa.get("permalink") if isinstance(caixa, dict) else None
+            if not url:
+                url = item.get(chave_url) or _primeiro_valor(item.get, outras_chaves_url)
+            if url:
+                url = url.strip() if url.__class__ is str else str(url).strip()
+                if not url.startswith("http"):
+                    url = nao_informado
+            else:
+                url = nao_informado
+
+            status = item.get("status")
+            if status.__class__ is not str or status not in normalizados:
+                status = _status(status)
+
+            # price, ou o primeiro amount de prices; None se ausente ou inválido
+            try:
+                preco = item.get("price")
+                if preco:
+                    if preco.__class__ is not float:
+                        preco = float(preco)
+                else:
+                    precos = item.get("prices")
+                    preco = precos[0].get("amount") if precos else None
+                    preco = float(preco) if preco else None
+            except (ValueError, TypeError, AttributeError):
+                preco = None
+
+            # Até max_atributos pares nome/valor preenchidos, completados com "Não informado"
+            atributos = []
+            brutos = item.get("attributes")
+            if brutos:
+                for atributo in brutos[:max_atributos]:
+                    valor = atributo.get("value_name")
+                    if valor:
+                        nome_atributo = atributo.get("name")
+                        if nome_atributo:
+                            atributos.append({"nome": nome_atributo, "valor": valor})
+            while len(atributos) < max_atributos:
+                atributos.append({"nome": nao_informado, "valor": nao_informado})
+
+            (guardar_sem if sem_foto else guardar_com)({
+                "id": produto_id,
+                "nome": nome,
+                "status": status,
+                "imagem": imagem,
+                "url": url,
+                "preco": preco,
+                "atributos": atributos,
+            })
+
+        if sem_imagem is not com_imagem:
+            com_imagem += sem_imagem
+        return PaginaFormatada(com_imagem, sem_id, incompletos)
+
+
+def _status(status) -> str:
+    status = str(status).strip().lower() if status else ""
+    return status or "unknown"
+
+
+def _primeiro_valor(get, chaves: Sequence[str]):
+    """Valor da primeira chave preenchida."""
+    for chave in chaves:
+        valor = get(chave)
+        if valor:
+            return valor
+    return None
+
+
+def ordenar_por_imagem(produtos: List[Dict]) -> List[Dict]:
+    """Produtos com imagem primeiro, mantendo a ordem dentro de cada grupo."""
+    sem_imagem = [p for p in produtos if p["imagem"] == NAO_INFORMADO]
+    if not sem_imagem:
+        return list(produtos)
+    return [p for p in produtos if p["imagem"] != NAO_INFORMADO] + sem_imagem
@@ -0,0 +1,229 @@
+"""
+Limite de taxa das chamadas à API do Mercado Livre.
+
+Responsável por:
+- Espaçar as requisições ao upstream com um balde de fichas (token bucket)
+- Pausar tudo pelo tempo pedido em Retry-After quando a API responde 429
+- Reduzir a taxa a cada 429 e recuperá-la aos poucos com respostas normais
+- Enfileirar requisições por um tempo máximo, descartando as que não cabem
+- Atender buscas de usuários antes de atualizações de cache em segundo plano
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+from app.utils.prazo import tempo_restante
+
+# Prioridades: menor número é atendido primeiro
+ALTA = 0
+BAIXA = 1
+
+# Prioridade das requisições da tarefa atual; revalidações do cache usam BAIXA
+prioridade_upstream: contextvars.ContextVar[int] = contextvars.ContextVar("prioridade_upstream", default=ALTA)
+
+# Fração da taxa mantida a cada 429 e fração da taxa máxima recuperada por resposta normal
+FATOR_REDUCAO = 0.5
+RECUPERACAO_POR_RESPOSTA = 0.01
+
+# Pausa usada quando o 429 vem sem Retry-After
+PAUSA_PADRAO_429 = 1.0
+
+
+class LimiteTaxaExcedido(httpx.TransportError):
+    """A requisição não conseguiu uma vaga no limite de taxa a tempo e foi descartada."""
+
+
+def interpretar_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Converte Retry-After (segundos ou data HTTP) em segundos a partir de agora."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, data.timestamp() - time.time())
+
+
+class _Vaga:
+    """Lugar de uma requisição na fila do limitador."""
+
+    __slots__ = ("prioridade",)
+
+    def __init__(self, prioridade: int) -> None:
+        self.prioridade = prioridade
+
+
+class LimitadorTaxa:
+    """
+    Balde de fichas compartilhado por todas as chamadas ao upstream do processo.
+
+    Cada requisição consome uma ficha; as fichas voltam à taxa atual até o
+    tamanho da rajada. Sem ficha, a requisição espera na fila da sua
+    prioridade, em ordem de chegada, e é descartada (LimiteTaxaExcedido) se
+    a espera prevista passar de espera_maxima ou se a fila estiver cheia.
+
+    A taxa se adapta aos 429 do upstream (aumento aditivo, redução
+    multiplicativa): cada 429 corta a taxa pela metade e pausa o balde pelo
+    Retry-After; cada resposta normal devolve 1% da taxa configurada.
+
+    Pode ser usado a partir de vários laços de eventos ao mesmo tempo.
+
+    Configuração por ambiente:
+        ML_LIMITE_TAXA: requisições por segundo ao upstream (padrão 50; "0" desativa)
+        ML_LIMITE_RAJADA: requisições permitidas de uma vez (padrão 2x a taxa)
+        ML_LIMITE_TAXA_MINIMA: piso da taxa após 429s (padrão 1)
+        ML_LIMITE_ESPERA_MAXIMA: segundos máximos na fila (padrão 2)
+        ML_LIMITE_FILA_MAXIMA: requisições esperando ao mesmo tempo (padrão 200)
+    """
+
+    def __init__(
+        self,
+        taxa: Optional[float] = None,
+        rajada: Optional[float] = None,
+        taxa_minima: Optional[float] = None,
+        espera_maxima: Optional[float] = None,
+        fila_maxima: Optional[int] = None,
+    ) -> None:
+        self.taxa_maxima = taxa or float(os.getenv("ML_LIMITE_TAXA", "50"))
+        self.rajada = rajada or float(os.getenv("ML_LIMITE_RAJADA") or 2 * self.taxa_maxima)
+        self.taxa_minima = min(self.taxa_maxima, taxa_minima or float(os.getenv("ML_LIMITE_TAXA_MINIMA", "1")))
+        self.espera_maxima = espera_maxima if espera_maxima is not None else float(
+            os.getenv("ML_LIMITE_ESPERA_MAXIMA", "2")
+        )
+        self.fila_maxima = fila_maxima or int(os.getenv("ML_LIMITE_FILA_MAXIMA", "200"))
+
+        self.taxa_atual = self.taxa_maxima
+        self._fichas = self.rajada
+        self._reposto_em = time.monotonic()
+        self._pausado_ate = 0.0
+        self._filas = {ALTA: deque(), BAIXA: deque()}
+        self._trava = threading.Lock()
+
+        self.liberadas = 0
+        self.descartes = 0
+        self.respostas_429 = 0
+
+    async def adquirir(self, prioridade: Optional[int] = None) -> None:
+        """
+        Aguarda uma ficha para fazer uma requisição ao upstream.
+
+        Raises:
+            LimiteTaxaExcedido: fila cheia ou espera prevista acima de espera_maxima
+                (ou do que resta do orçamento da requisição)
+        """
+        if prioridade is None:
+            prioridade = prioridade_upstream.get()
+        vaga = _Vaga(prioridade)
+        restante = tempo_restante()
+        espera_maxima = self.espera_maxima if restante is None else min(self.espera_maxima, restante)
+        prazo = time.monotonic() + espera_maxima
+
+        with self._trava:
+            if sum(len(fila) for fila in self._filas.values()) >= self.fila_maxima:
+                self.descartes += 1
+                raise LimiteTaxaExcedido("Fila do limite de taxa cheia")
+            self._filas[prioridade].append(vaga)
+
+        try:
+            while True:
+                with self._trava:
+                    agora = time.monotonic()
+                    self._repor(agora)
+                    posicao = self._posicao(vaga)
+                    if posicao == 0 and agora >= self._pausado_ate and self._fichas >= 1:
+                        self._fichas -= 1
+                        self.liberadas += 1
+                        return
+                    # Tempo até haver fichas para quem está à frente e para esta requisição
+                    espera = max(self._pausado_ate - agora, 0.0) + max(posicao + 1 - self._fichas, 0.0) / self.taxa_atual
+                    if agora + espera > prazo:
+                        self.descartes += 1
+                        raise LimiteTaxaExcedido(
+                            f"Limite de taxa: espera prevista de {espera:.2f}s excede {espera_maxima:.2f}s"
+                        )
+                # Só quem está na frente dorme a espera inteira; os demais reavaliam antes
+                await asyncio.sleep(espera if posicao == 0 else min(espera, 1 / self.taxa_atual))
+        finally:
+            with self._trava:
+                self._filas[prioridade].remove(vaga)
+
+    def registrar_429(self, retry_after: Optional[str] = None) -> float:
+        """
+        Reduz a taxa e pausa o balde após um 429 do upstream.
+
+        Returns:
+            Segundos até o balde voltar a liberar requisições
+        """
+        pausa = interpretar_retry_after(retry_after)
+        if pausa is None:
+            pausa = PAUSA_PADRAO_429
+        with self._trava:
+            agora = time.monotonic()
+            self._repor(agora)
+            self.respostas_429 += 1
+            self.taxa_atual = max(self.taxa_minima, self.taxa_atual * FATOR_REDUCAO)
+            self._fichas = 0.0
+            self._pausado_ate = max(self._pausado_ate, agora + pausa)
+            return self._pausado_ate - agora
+
+    def registrar_resposta(self) -> None:
+        """Recupera parte da taxa após uma resposta que não foi 429."""
+        if self.taxa_atual >= self.taxa_maxima:
+            return
+        with self._trava:
+            self.taxa_atual = min(self.taxa_maxima, self.taxa_atual + self.taxa_maxima * RECUPERACAO_POR_RESPOSTA)
+
+    def estatisticas(self) -> Dict:
+        """Taxa atual, fichas, profundidade das filas e contadores de descarte e 429."""
+        with self._trava:
+            agora = time.monotonic()
+            self._repor(agora)
+            return {
+                "taxa_atual": round(self.taxa_atual, 3),
+                "taxa_maxima": self.taxa_maxima,
+                "rajada": self.rajada,
+                "fichas": round(self._fichas, 3),
+                "fila": len(self._filas[ALTA]) + len(self._filas[BAIXA]),
+                "fila_usuarios": len(self._filas[ALTA]),
+                "fila_segundo_plano": len(self._filas[BAIXA]),
+                "pausado_por": round(max(self._pausado_ate - agora, 0.0), 3),
+                "liberadas": self.liberadas,
+                "descartes": self.descartes,
+                "respostas_429": self.respostas_429,
+            }
+
+    def _repor(self, agora: float) -> None:
+        """Devolve as fichas acumuladas desde a última reposição; nada durante a pausa."""
+        desde = max(self._reposto_em, self._pausado_ate)
+        if agora > desde:
+            self._fichas = min(self.rajada, self._fichas + (agora - desde) * self.taxa_atual)
+        self._reposto_em = max(self._reposto_em, agora)
+
+    def _posicao(self, vaga: _Vaga) -> int:
+        """Quantas requisições serão atendidas antes desta (filas de maior prioridade primeiro)."""
+        posicao = 0
+        for prioridade in sorted(self._filas):
+            fila = self._filas[prioridade]
+            if prioridade == vaga.prioridade:
+                return posicao + fila.index(vaga)
+            posicao += len(fila)
+        return posicao
+
+
+def criar_limitador() -> Optional[LimitadorTaxa]:
+    """Cria o limitador configurado por ambiente, ou None se ML_LIMITE_TAXA for 0."""
+    if float(os.getenv("ML_LIMITE_TAXA", "50")) <= 0:
+        return None
+    return LimitadorTaxa()
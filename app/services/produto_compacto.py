@@ -0,0 +1,117 @@
+"""
+Representação compacta de produtos para guardar em memória por muito tempo.
+
+Responsável por:
+- Guardar cada produto em um objeto com __slots__ em vez de um dicionário
+- Guardar os atributos como uma tupla de dicionários {"nome", "valor"}
+  compartilhados entre todos os produtos com o mesmo par
+- Reaproveitar strings repetidas ("Não informado", status, nomes de atributo)
+- Converter de volta para o formato de Produto da API
+
+Usado pelo cache de buscas: os produtos entram no formato de Produto,
+ficam compactos enquanto estão guardados e saem de novo no formato de
+Produto a cada consulta, como dicionários novos. Os dicionários de
+atributo continuam compartilhados e devem ser tratados como somente leitura.
+"""
+
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.formatador_produtos import NAO_INFORMADO
+
+# Pares (nome, valor) e listas de atributos distintos guardados para
+# reaproveitamento; ao encher, a tabela recomeça
+MAX_INTERNADOS = 10000
+
+_pares: Dict[Tuple[str, str], Dict[str, str]] = {}
+_atributos: Dict[Tuple[int, ...], Tuple[Dict[str, str], ...]] = {}
+
+
+def _internar_texto(texto):
+    """Mesmo objeto para textos iguais ("active", "Marca"...); outros tipos passam direto."""
+    if texto.__class__ is not str:
+        return texto
+    return NAO_INFORMADO if texto == NAO_INFORMADO else sys.intern(texto)
+
+
+def _internar_atributos(atributos: Sequence[Dict]) -> Tuple[Dict[str, str], ...]:
+    """Tupla de atributos compartilhados; listas iguais de atributos viram a mesma tupla."""
+    pares = []
+    for atributo in atributos:
+        chave = (atributo["nome"], atributo["valor"])
+        par = _pares.get(chave)
+        if par is None:
+            if len(_pares) >= MAX_INTERNADOS:
+                _pares.clear()
+                _atributos.clear()
+            par = _pares[chave] = {"nome": _internar_texto(chave[0]), "valor": _internar_texto(chave[1])}
+        pares.append(par)
+
+    # Os pares já são únicos enquanto estão na tabela: a identidade basta como chave
+    chave = tuple(map(id, pares))
+    tupla = _atributos.get(chave)
+    if tupla is None:
+        if len(_atributos) >= MAX_INTERNADOS:
+            _atributos.clear()
+        tupla = _atributos[chave] = tuple(pares)
+    return tupla
+
+
+class ProdutoCompacto:
+    """Produto guardado com __slots__; os campos têm os mesmos nomes de Produto."""
+
+    __slots__ = ("id", "nome", "status", "imagem", "url", "preco", "atributos")
+
+    def __init__(
+        self,
+        id: str,
+        nome: str,
+        status: str,
+        imagem: str,
+        url: str,
+        preco: Optional[float],
+        atributos: Tuple[Dict[str, str], ...],
+    ):
+        self.id = id
+        self.nome = nome
+        self.status = status
+        self.imagem = imagem
+        self.url = url
+        self.preco = preco
+        self.atributos = atributos
+
+    @classmethod
+    def de_dict(cls, produto: Dict) -> "ProdutoCompacto":
+        """Compacta um produto no formato de Produto."""
+        nome, imagem, url = produto["nome"], produto["imagem"], produto["url"]
+        return cls(
+            produto["id"],
+            NAO_INFORMADO if nome == NAO_INFORMADO else nome,
+            _internar_texto(produto["status"]),
+            NAO_INFORMADO if imagem == NAO_INFORMADO else imagem,
+            NAO_INFORMADO if url == NAO_INFORMADO else url,
+            produto["preco"],
+            _internar_atributos(produto["atributos"]),
+        )
+
+    def como_dict(self) -> Dict:
+        """Produto no formato da API (dicionário e lista de atributos novos a cada chamada)."""
+        return {
+            "id": self.id,
+            "nome": self.nome,
+            "status": self.status,
+            "imagem": self.imagem,
+            "url": self.url,
+            "preco": self.preco,
+            "atributos": list(self.atributos),
+        }
+
+
+def compactar(produtos: Sequence[Dict]) -> Tuple[ProdutoCompacto, ...]:
+    """Compacta uma lista de produtos no formato de Produto."""
+    return tuple(map(ProdutoCompacto.de_dict, produtos))
+
+
+def expandir(registros: Sequence[ProdutoCompacto]) -> List[Dict]:
+    """Converte registros compactos de volta para o formato de Produto."""
+    return [registro.como_dict() for registro in registros]
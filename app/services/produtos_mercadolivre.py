@@ -6,351 +6,757 @@ Serviço de busca e processamento de produtos do Mercado Livre.
 
 Responsável por:
 - Buscar produtos ativos na API do Mercado Livre
+- Pedir ao upstream e decodificar das respostas só os campos usados na formatação
 - Tratar dados ausentes
 - Ordenar produtos (com imagem primeiro)
+- Manter buscas recentes em cache (revalidando em segundo plano)
+- Agrupar buscas idênticas simultâneas em uma só requisição
+- Completar dados ausentes com /items, sob demanda
+- Paginar além de 50 resultados, buscando as páginas em paralelo
+- Recusar na hora chamadas a endpoints instáveis (disjuntor por endpoint)
+- Contar os termos buscados, para o aquecimento do cache (ver aquecimento_cache)
 
 """
 
-import requests
+import os
+import time
+import asyncio
+import contextvars
+import threading
+import httpx
 import logging
-from typing import List, Dict
-from urllib.parse import quote
+from collections import Counter
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from app.services.aquecimento_cache import FrequenciaBuscas
 from app.services.autenticacao_mercadolivre import AutenticacaoMercadoLivre
+from app.services.cliente_http import TransporteHTTP, obter_transporte
+from app.services.cache_busca import CacheBusca, FRESCO, VELHO
+from app.services.coalescencia import Coalescencia
+from app.services.decodificador_busca import decodificar_resultados
+from app.services.disjuntor import Disjuntor
+from app.services.enriquecimento_itens import EnriquecimentoItens
+from app.services.formatador_produtos import NAO_INFORMADO, FormatadorProdutos, ordenar_por_imagem
+from app.services.limitador_taxa import BAIXA, LimiteTaxaExcedido, prioridade_upstream
+from app.services.selecao_campos import BUSCA, BUSCA_FALLBACK, SelecaoCampos, get_com_selecao
+from app.utils.etapas import medir
+from app.utils.erros import (
+    ErroAPI, ErroAutenticacao, ErroCircuitoAberto, ErroLimiteRequisicoes, ErroPrazoEsgotado, ErroServicoExterno
+)
+from app.utils.metricas import (
+    CACHE_ACERTO, CACHE_FALTA, CACHE_VELHO, FALLBACK_COM_RESULTADOS, FALLBACK_ERRO, FALLBACK_VAZIO, registrar_busca
+)
+from app.utils.prazo import iniciar_orcamento
+from app.utils.registro import anotar, contar, detalhar
+from app.utils.latencia import JanelaLatencia
+from app.utils.tarefas import cancelar_tarefas
+from app.utils.paginacao import (
+    LIMITE_MAXIMO, OFFSET_MAXIMO, TAMANHO_PAGINA, codificar_cursor, paginas_do_intervalo
+)
 
 logger = logging.getLogger(__name__)
 
+# sequencial: fallback só se o principal vier vazio
+# paralela: principal e fallback juntos, principal preferido
+# hedged: fallback disparado se o principal passar do p95 de latência
+ESTRATEGIAS = ("sequencial", "paralela", "hedged")
+
+# Erros que também mudam o status HTTP de /api/buscar (o corpo continua no formato de RespostaBusca)
+ERROS_COM_STATUS = (ErroLimiteRequisicoes, ErroCircuitoAberto, ErroPrazoEsgotado)
+
 
 class ProdutosMercadoLivre:
-    def __init__(self):
-        self.auth = AutenticacaoMercadoLivre()
-        self.base_url = "https://api.mercadolibre.com/products/search"
+    def __init__(
+        self,
+        auth: Optional[AutenticacaoMercadoLivre] = None,
+        transporte: Optional[TransporteHTTP] = None,
+        cache: Optional[CacheBusca] = None,
+    ):
+        """
+        Sem argumentos, cria a própria autenticação e usa o transporte
+        global do processo; a aplicação injeta as instâncias compartilhadas
+        (ver app.api.dependencias).
+        """
+        self.transporte = transporte or obter_transporte()
+        self.auth = auth or AutenticacaoMercadoLivre(transporte=self.transporte)
+        self.site_id = "MLB"
+        self.api_url = os.getenv("ML_API_BASE_URL", "https://api.mercadolibre.com").rstrip("/")
+        self.base_url = f"{self.api_url}/products/search"
+        self.fallback_url = f"{self.api_url}/sites/{self.site_id}/search"
 
-    def buscar_produtos(self, termo_busca: str, limit: int = 10) -> Dict:
-        # Validação:
-        if not termo_busca or not termo_busca.strip():
-            return {
-                "total": 0,
-                "erro": "O termo de busca não pode estar vazio.",
-                "produtos": []
-            }
+        self.cache = cache or CacheBusca()
+        self.coalescencia = Coalescencia()
+        self.frequencias = FrequenciaBuscas()
+        self.formatador = FormatadorProdutos()
+        self.selecao = SelecaoCampos()
+        self.enriquecimento = EnriquecimentoItens(
+            lambda: self.transporte.cliente(),
+            self.api_url,
+            lambda itens: self._formatar_produtos(itens, ordenar=False),
+            selecao=self.selecao,
+        )
+
+        self._revalidando = set()
+        self._tarefas = set()
+        self._trava = threading.Lock()
+        self.revalidacoes = 0
+        self.falhas_revalidacao = 0
+        self.servidos_em_erro = 0
+
+        self.estrategia = os.getenv("ML_BUSCA_ESTRATEGIA", "sequencial")
+        if self.estrategia not in ESTRATEGIAS:
+            raise ValueError(f"ML_BUSCA_ESTRATEGIA inválida: {self.estrategia} (use {', '.join(ESTRATEGIAS)})")
+        self.atraso_hedge_padrao = float(os.getenv("ML_BUSCA_HEDGE_ATRASO", "0.5"))
+        self.atraso_hedge_minimo = float(os.getenv("ML_BUSCA_HEDGE_ATRASO_MINIMO", "0.05"))
+        self.latencia_principal = JanelaLatencia()
+        self.contadores_estrategia = Counter(fallbacks_disparados=0, vitorias_fallback=0)
+
+        # Um circuito por endpoint: /products/search instável não derruba o fallback
+        self.disjuntores = {"principal": Disjuntor("principal"), "fallback": Disjuntor("fallback")}
+
+    def buscar_produtos(self, termo_busca: str, limit: int = 10, enriquecer: bool = False, offset: int = 0) -> Dict:
+        """
+        Versão síncrona da busca.
+
+        Executa buscar_produtos_async no laço de fundo do transporte HTTP,
+        reaproveitando o mesmo pool de conexões do caminho assíncrono.
+        """
+        return self.transporte.executar(self.buscar_produtos_async(termo_busca, limit, enriquecer, offset))
+
+    async def buscar_produtos_async(
+        self, termo_busca: str, limit: int = 10, enriquecer: bool = False, offset: int = 0
+    ) -> Dict:
+        """
+        Versão assíncrona de buscar_produtos.
+
+        Usa o pool de conexões compartilhado do transporte HTTP, de modo que
+        uma resposta lenta do Mercado Livre não bloqueia as demais requisições.
+        Resultados são servidos do cache quando possível: entradas velhas são
+        devolvidas na hora e revalidadas em segundo plano, e entradas vencidas
+        só são usadas se o upstream falhar.
+
+        Com offset ou limit acima de uma página (50), as páginas do upstream
+        são buscadas em paralelo e unidas sem IDs repetidos; a resposta traz
+        proximo_cursor enquanto houver mais resultados.
+
+        Com enriquecer=True, campos ausentes são completados com /items
+        dentro do orçamento de tempo do enriquecimento.
+        """
+        erro = self._validar_termo(termo_busca)
+        if erro:
+            return erro
+
+        limit = max(1, min(limit, LIMITE_MAXIMO))
+        offset = max(0, offset)
+        anotar(termo=termo_busca, limit=limit, offset=offset)
+
+        produtos = []
+        mais = False
+        try:
+            async for lote, mais in self.iterar_paginas_async(termo_busca, offset, limit):
+                produtos.extend(lote)
+        except ErroAPI as e:
+            anotar(total=0, erro=e.mensagem)
+            status = e.status_code if isinstance(e, ERROS_COM_STATUS) else None
+            return self._resposta_erro(e.mensagem, status)
+
+        if not produtos:
+            anotar(total=0)
+            registrar_busca(0)
+            if offset:
+                # Além do último resultado: fim da paginação, não é erro
+                return {"total": 0, "produtos": [], "proximo_cursor": None}
+            anotar(erro="sem_resultados")
+            return self._resposta_erro(self._mensagem_sem_resultados(termo_busca))
+
+        if enriquecer:
+            produtos = await self._enriquecer(produtos)
+
+        resposta = self._resposta_produtos(produtos)
+        resposta["proximo_cursor"] = self.proximo_cursor(termo_busca, offset, limit, mais)
+        anotar(total=resposta["total"])
+        registrar_busca(resposta["total"])
+        if not offset:
+            self.frequencias.registrar(termo_busca)
+        return resposta
+
+    async def buscar_produtos_stream(
+        self, termo_busca: str, limit: int = 10, enriquecer: bool = False, offset: int = 0
+    ) -> AsyncIterator[Dict]:
+        """
+        Versão em fluxo de buscar_produtos_async.
+
+        Entrega cada produto assim que a página dele chega (ordenado com
+        imagem primeiro dentro da página) e termina com um resumo
+        {"total", "erro", "proximo_cursor"}. Erros também chegam no resumo,
+        pois o início da resposta pode já ter sido enviado.
+        """
+        erro = self._validar_termo(termo_busca)
+        if erro:
+            yield {"total": 0, "erro": erro["erro"], "proximo_cursor": None}
+            return
+
+        limit = max(1, min(limit, LIMITE_MAXIMO))
+        offset = max(0, offset)
+        anotar(termo=termo_busca, limit=limit, offset=offset)
+        total = 0
+        mais = False
+
+        try:
+            async for lote, mais in self.iterar_paginas_async(termo_busca, offset, limit):
+                if enriquecer and lote:
+                    lote = await self._enriquecer(lote)
+                with medir("ordenar"):
+                    lote = self._ordenar_produtos(lote)
+                for produto in lote:
+                    total += 1
+                    yield produto
+        except ErroAPI as e:
+            anotar(total=total, erro=e.mensagem)
+            yield {"total": total, "erro": e.mensagem, "proximo_cursor": None}
+            return
+
+        erro = None
+        anotar(total=total)
+        registrar_busca(total)
+        if total and not offset:
+            self.frequencias.registrar(termo_busca)
+        if not total and not offset:
+            anotar(erro="sem_resultados")
+            erro = self._mensagem_sem_resultados(termo_busca)
+        yield {"total": total, "erro": erro, "proximo_cursor": self.proximo_cursor(termo_busca, offset, limit, mais)}
+
+    async def iterar_paginas_async(
+        self, termo_busca: str, offset: int, limit: int
+    ) -> AsyncIterator[Tuple[List[Dict], bool]]:
+        """
+        Entrega os produtos de [offset, offset + limit) página a página, como
+        (produtos, mais): mais diz se o upstream ainda tem resultados depois
+        do que já foi entregue (vale o do último lote).
+
+        Todas as páginas do intervalo são disparadas juntas (cada uma passando
+        pelo cache e pela coalescência) e entregues na ordem assim que cada
+        uma e as anteriores chegam. IDs já entregues são descartados, pois o
+        upstream pode repetir itens na fronteira entre páginas. Para ao fim
+        dos resultados, que vem da quantidade de itens devolvida pelo
+        upstream (e não da de produtos, que perde os itens sem id); falha em
+        uma página seguinte encerra a iteração com o que já foi entregue.
+
+        Raises:
+            ErroAPI: se a primeira página falhar
+        """
+        paginas = paginas_do_intervalo(offset, limit)
+        if not paginas:
+            return
+
+        # Uma página só a partir do início: respeita o limite pedido (o cache amplia se ativo)
+        limite_pagina = limit if offset == 0 and limit <= TAMANHO_PAGINA else TAMANHO_PAGINA
+        tarefas = [
+            asyncio.create_task(self._obter_pagina(termo_busca, pagina, limite_pagina))
+            for pagina in paginas
+        ]
+        vistos = set()
+        pular = offset - paginas[0] * TAMANHO_PAGINA
+        restante = limit
+
+        try:
+            for pagina, tarefa in zip(paginas, tarefas):
+                try:
+                    produtos, itens_upstream = await tarefa
+                except ErroAPI as e:
+                    if pagina == paginas[0]:
+                        raise
+                    logger.warning("⚠️ Página %s de '%s' falhou, encerrando paginação: %s", pagina, termo_busca, e.mensagem)
+                    yield [], False
+                    return
+
+                novos = [p for p in produtos if p["id"] not in vistos]
+                vistos.update(p["id"] for p in novos)
+                if pular:
+                    descartados = min(pular, len(novos))
+                    novos = novos[descartados:]
+                    pular -= descartados
+                novos = novos[:restante]
+                restante -= len(novos)
+
+                fim = itens_upstream < limite_pagina
+                yield novos, not fim
+                if restante <= 0 or fim:
+                    return
+        finally:
+            for tarefa in tarefas:
+                if not tarefa.done():
+                    tarefa.cancel()
+                elif not tarefa.cancelled():
+                    # Marca o erro de páginas não consumidas como tratado
+                    tarefa.exception()
+
+    async def _obter_pagina(self, termo_busca: str, pagina: int, limit: int) -> Tuple[List[Dict], int]:
+        """
+        Retorna os produtos de uma página, do cache ou do upstream, e quantos
+        itens o upstream devolveu para ela.
+
+        Entradas velhas são devolvidas e revalidadas em segundo plano; entradas
+        vencidas só são usadas se o upstream falhar.
+
+        Raises:
+            ErroAPI: falha no upstream sem entrada vencida para servir
+        """
+        produtos, estado = self.cache.consultar(termo_busca, limit, self.site_id, pagina)
+        if estado == FRESCO:
+            contar("cache_acertos")
+            CACHE_ACERTO.inc()
+        elif estado == VELHO:
+            contar("cache_velhos")
+            CACHE_VELHO.inc()
+            self._revalidar_em_segundo_plano(termo_busca, limit, pagina)
+        else:
+            contar("cache_faltas")
+            CACHE_FALTA.inc()
+            try:
+                return await self._buscar_coalescido(termo_busca, limit, pagina)
+            except ErroAPI as e:
+                if produtos is None:
+                    raise
+                # Upstream indisponível: melhor um resultado vencido que uma lista vazia
+                with self._trava:
+                    self.servidos_em_erro += 1
+                contar("cache_vencidos_em_erro")
+                logger.warning("⚠️ %s Servindo resultado vencido do cache para '%s'", e.mensagem, termo_busca)
+
+        # Página curta do cache: pode ter perdido itens sem id na formatação
+        itens_upstream = len(produtos)
+        if itens_upstream < limit:
+            itens_upstream = self.cache.itens_upstream(termo_busca, self.site_id, pagina)
+        return produtos, itens_upstream
+
+    def proximo_cursor(self, termo_busca: str, offset: int, limit: int, mais: bool) -> Optional[str]:
+        """Cursor da página seguinte, ou None no fim dos resultados ou no limite da API."""
+        proximo = offset + limit
+        if not mais or proximo >= OFFSET_MAXIMO:
+            return None
+        return codificar_cursor(CacheBusca.normalizar(termo_busca), proximo, limit)
+
+    async def _enriquecer(self, produtos: List[Dict]) -> List[Dict]:
+        """Completa produtos com /items; qualquer falha mantém os produtos como estão."""
+        try:
+            with medir("enriquecer"):
+                token = await self.auth.obter_access_token_async()
+                return await self.enriquecimento.enriquecer(produtos, token)
+        except Exception as e:
+            logger.warning("⚠️ Enriquecimento ignorado: %s", e)
+            return produtos
+
+    def _revalidar_em_segundo_plano(self, termo_busca: str, limit: int, pagina: int = 0) -> None:
+        """Agenda a atualização de uma entrada velha do cache, no máximo uma por termo e página."""
+        chave = (CacheBusca.normalizar(termo_busca), self.site_id, pagina)
+        with self._trava:
+            if chave in self._revalidando:
+                return
+            self._revalidando.add(chave)
+            self.revalidacoes += 1
+
+        # Contexto novo: a tarefa não herda os campos do registro, as etapas, o
+        # orçamento nem a prioridade da requisição que encontrou a entrada velha
+        tarefa = asyncio.get_running_loop().create_task(
+            self._revalidar(termo_busca, limit, pagina, chave), context=contextvars.Context()
+        )
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _revalidar(self, termo_busca: str, limit: int, pagina: int, chave) -> None:
+        # Atualizações de cache cedem a vez às buscas de usuários no limite de taxa
+        # e não têm orçamento de tempo
+        prioridade_upstream.set(BAIXA)
+        iniciar_orcamento(None)
+        try:
+            await self._buscar_coalescido(termo_busca, limit, pagina)
+        except ErroAPI as e:
+            with self._trava:
+                self.falhas_revalidacao += 1
+            logger.warning("⚠️ Falha ao revalidar '%s' em segundo plano: %s", termo_busca, e.mensagem)
+        finally:
+            with self._trava:
+                self._revalidando.discard(chave)
+
+    async def aquecer(self, termo_busca: str) -> int:
+        """
+        Busca a primeira página do termo só para deixá-la no cache.
+
+        Returns:
+            Quantidade de produtos guardados
+
+        Raises:
+            ErroAPI: se a busca no upstream falhar
+        """
+        produtos, _ = await self._buscar_coalescido(termo_busca, self.cache.limite_minimo)
+        return len(produtos)
+
+    async def _buscar_coalescido(
+        self, termo_busca: str, limit: int, pagina: int = 0
+    ) -> Tuple[List[Dict], int]:
+        """
+        Busca no upstream, compartilhando a requisição entre buscas idênticas simultâneas.
+
+        Busca com o limite mínimo do cache para que a mesma entrada atenda
+        limites menores depois. Retorna os produtos na ordem do upstream e
+        quantos itens o upstream devolveu.
+        """
+        limite_busca = max(limit, self.cache.limite_minimo) if self.cache.ativo else limit
+        chave = (CacheBusca.normalizar(termo_busca), self.site_id, pagina, limite_busca)
+        return await self.coalescencia.executar(
+            chave, lambda: self._buscar_e_guardar(termo_busca, limite_busca, pagina)
+        )
+
+    async def _buscar_e_guardar(
+        self, termo_busca: str, limite_busca: int, pagina: int = 0
+    ) -> Tuple[List[Dict], int]:
+        """Busca uma página no upstream, formata e guarda no cache (com a quantidade de itens brutos)."""
+        resultados = await self._buscar_upstream(termo_busca, limite_busca, pagina * TAMANHO_PAGINA)
+        try:
+            with medir("formatar"):
+                produtos = self._formatar_produtos(resultados, ordenar=False)
+        except Exception as e:
+            # Item malformado (ex.: payload completo do fallback de decodificação)
+            logger.exception("❌ Erro inesperado ao formatar produtos: %s", e)
+            raise ErroAPI("Erro inesperado ao buscar produtos.")
+
+        if produtos:
+            self.cache.guardar(termo_busca, limite_busca, produtos, self.site_id, pagina, len(resultados))
+
+        return produtos, len(resultados)
+
+    async def _buscar_upstream(self, termo_busca: str, limit: int, offset: int = 0) -> List[Dict]:
+        """
+        Consulta /products/search e o fallback /sites/MLB/search conforme a
+        estratégia configurada em ML_BUSCA_ESTRATEGIA.
+
+        Returns:
+            Lista de itens brutos (possivelmente vazia)
+
+        Um 401 do upstream leva a uma renovação do token (compartilhada entre
+        buscas simultâneas) e a uma nova tentativa, uma vez só.
+
+        Raises:
+            ErroAutenticacao: token ausente, inválido ou expirado
+            ErroServicoExterno: falha de comunicação com a API
+            ErroLimiteRequisicoes: 429 do upstream ou fila do limite de taxa cheia
+            ErroCircuitoAberto: circuitos do principal e do fallback abertos
+            ErroPrazoEsgotado: timeout do upstream ou orçamento da requisição esgotado
+            ErroAPI: erro inesperado
+        """
+        try:
+            with medir("token"):
+                token = await self.auth.obter_access_token_async()
+        except ErroAPI:
+            raise
+        except Exception as e:
+            raise ErroAutenticacao(str(e))
+
+        try:
+            return await self._buscar_com_token(token, termo_busca, limit, offset)
+        except ErroAutenticacao:
+            if not self.auth.pode_renovar:
+                raise
+            logger.warning("🔑 Token recusado pela API, renovando e repetindo a busca")
+            anotar(token_renovado=True)
+
+        with medir("token"):
+            token = await self.auth.renovar_token_async(token)
+        return await self._buscar_com_token(token, termo_busca, limit, offset)
+
+    async def _buscar_com_token(self, token: str, termo_busca: str, limit: int, offset: int) -> List[Dict]:
+        """Uma tentativa de busca conforme a estratégia, com o token informado."""
+        headers, params, fallback_params = self._montar_requisicao(token, termo_busca, limit, offset)
 
-        # Obter token
         try:
-            token = self.auth.obter_access_token()
+            if self.estrategia == "paralela":
+                return await self._buscar_paralela(headers, params, fallback_params)
+            if self.estrategia == "hedged":
+                return await self._buscar_hedged(headers, params, fallback_params)
+
+            try:
+                resultados = await self._consultar_principal(headers, params)
+            except ErroCircuitoAberto:
+                anotar(circuito_principal="aberto")
+                resultados = await self._consultar_fallback(headers, fallback_params)
+                if not resultados:
+                    raise
+                return resultados
+
+            if not resultados:
+                resultados = await self._consultar_fallback(headers, fallback_params)
+            return resultados
+
+        except ErroAPI:
+            raise
+        except LimiteTaxaExcedido as e:
+            anotar(erro_upstream=str(e))
+            raise ErroLimiteRequisicoes()
+        except httpx.TimeoutException as e:
+            anotar(erro_upstream=f"{type(e).__name__}: {e}")
+            raise ErroPrazoEsgotado()
+        except httpx.HTTPError as e:
+            anotar(erro_upstream=f"{type(e).__name__}: {e}")
+            raise ErroServicoExterno("Erro ao comunicar com a API do Mercado Livre.")
         except Exception as e:
-            return {
-                "total": 0,
-                "erro": str(e),
-                "produtos": []
-            }
+            logger.exception("❌ Erro inesperado ao buscar produtos: %s", e)
+            raise ErroAPI("Erro inesperado ao buscar produtos.")
+
+    async def _buscar_paralela(self, headers: Dict, params: Dict, fallback_params: Dict) -> List[Dict]:
+        """Dispara principal e fallback juntos; prefere o principal se ele tiver resultados."""
+        principal = asyncio.create_task(self._consultar_principal(headers, params))
+        fallback = asyncio.create_task(self._consultar_fallback(headers, fallback_params))
+        self._contar("fallbacks_disparados")
+        return await self._escolher_resultado(principal, fallback, preferir_principal=True)
+
+    async def _buscar_hedged(self, headers: Dict, params: Dict, fallback_params: Dict) -> List[Dict]:
+        """
+        Dispara o principal e, se ele não responder dentro do atraso de hedge
+        (p95 da latência recente do principal), dispara também o fallback.
+        """
+        principal = asyncio.create_task(self._consultar_principal(headers, params))
+        atraso = self.atraso_hedge()
+        await asyncio.wait({principal}, timeout=atraso)
+
+        if principal.done() and not principal.exception():
+            resultados = principal.result()
+            if resultados:
+                return resultados
+            return await self._consultar_fallback(headers, fallback_params)
+
+        if not principal.done():
+            anotar(hedge_ms=round(atraso * 1000))
+        fallback = asyncio.create_task(self._consultar_fallback(headers, fallback_params))
+        self._contar("fallbacks_disparados")
+        return await self._escolher_resultado(principal, fallback, preferir_principal=False)
+
+    async def _escolher_resultado(
+        self, principal: asyncio.Task, fallback: asyncio.Task, preferir_principal: bool
+    ) -> List[Dict]:
+        """
+        Aguarda as duas consultas e devolve o resultado vencedor, cancelando a outra.
+
+        Com preferir_principal, o fallback só é usado se o principal vier vazio
+        ou falhar; sem ele, vence a primeira consulta com resultados. Erro de
+        autenticação no principal sempre é propagado.
+        """
+        pendentes = {principal, fallback}
+        try:
+            while pendentes:
+                if preferir_principal and not principal.done():
+                    await asyncio.wait({principal})
+                else:
+                    await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+
+                if principal.done() and principal in pendentes:
+                    pendentes.discard(principal)
+                    erro = principal.exception()
+                    if isinstance(erro, ErroAutenticacao):
+                        raise erro
+                    if erro is None and principal.result():
+                        return principal.result()
+
+                if fallback.done() and fallback in pendentes:
+                    pendentes.discard(fallback)
+                    if fallback.result():
+                        self._contar("vitorias_fallback")
+                        return fallback.result()
+
+            # Nenhuma das consultas trouxe resultados: propaga o erro do principal, se houver
+            if principal.exception():
+                raise principal.exception()
+            return []
+        finally:
+            for tarefa in (principal, fallback):
+                if not tarefa.done():
+                    tarefa.cancel()
+
+    async def _consultar_principal(self, headers: Dict, params: Dict) -> List[Dict]:
+        """
+        Consulta /products/search e registra a latência para o cálculo do hedge.
+
+        Raises:
+            ErroCircuitoAberto: circuito do principal aberto (nenhuma requisição é feita)
+        """
+        with self.disjuntores["principal"].chamada() as chamada:
+            if detalhar():
+                logger.debug("🔍 GET %s %s", self.base_url, params)
+
+            # Registra também consultas canceladas pelo hedge, senão a cauda some do p95
+            inicio = time.perf_counter()
+            try:
+                with medir("upstream"):
+                    response = await get_com_selecao(
+                        self.transporte.cliente(), self.selecao, BUSCA, self.base_url, headers, params
+                    )
+            finally:
+                self.latencia_principal.registrar(time.perf_counter() - inicio)
+            chamada.falhou = response.status_code >= 500
+
+        anotar(status_principal=response.status_code)
+
+        if response.status_code == 401:
+            raise ErroAutenticacao("Token inválido ou expirado.")
+
+        if response.status_code == 429:
+            raise ErroLimiteRequisicoes()
+
+        response.raise_for_status()
+        with medir("json"):
+            resultados = decodificar_resultados(response.content)
+        contar("resultados_principal", len(resultados))
+        return resultados
+
+    async def _consultar_fallback(self, headers: Dict, fallback_params: Dict) -> List[Dict]:
+        """Consulta /sites/MLB/search; falhas do fallback (e circuito aberto) resultam em lista vazia."""
+        try:
+            with self.disjuntores["fallback"].chamada() as chamada, medir("fallback"):
+                fallback_response = await get_com_selecao(
+                    self.transporte.cliente(), self.selecao, BUSCA_FALLBACK, self.fallback_url, headers, fallback_params
+                )
+                chamada.falhou = fallback_response.status_code >= 500
+            resultados = self._resultados_fallback(fallback_response.status_code, fallback_response.content)
+        except Exception as e:
+            anotar(erro_fallback=f"{type(e).__name__}: {e}")
+            FALLBACK_ERRO.inc()
+            return []
+        (FALLBACK_COM_RESULTADOS if resultados else FALLBACK_VAZIO).inc()
+        return resultados
+
+    def atraso_hedge(self) -> float:
+        """
+        Atraso antes de disparar o fallback no modo hedged: p95 da latência
+        recente do principal, ou o atraso configurado enquanto há poucas amostras.
+        """
+        if len(self.latencia_principal) < 20:
+            return self.atraso_hedge_padrao
+        return max(self.atraso_hedge_minimo, self.latencia_principal.percentil(95))
+
+    def _contar(self, contador: str) -> None:
+        with self._trava:
+            self.contadores_estrategia[contador] += 1
+
+    async def fechar(self) -> None:
+        """Cancela revalidações e buscas em andamento (shutdown da aplicação)."""
+        await cancelar_tarefas(self._tarefas)
+        await self.coalescencia.cancelar()
+
+    def estado_circuitos(self) -> Dict[str, str]:
+        """Estado atual (fechado, aberto ou meio_aberto) do circuito de cada endpoint."""
+        return {nome: disjuntor.estado for nome, disjuntor in self.disjuntores.items()}
 
+    def estatisticas(self) -> Dict:
+        """Estatísticas internas da busca: cache, revalidação, coalescência, enriquecimento, token e circuitos."""
+        return {
+            "cache": self.cache.estatisticas(),
+            "revalidacao": {
+                "em_segundo_plano": self.revalidacoes,
+                "falhas": self.falhas_revalidacao,
+                "em_andamento": len(self._revalidando),
+                "servidos_vencidos_em_erro": self.servidos_em_erro,
+            },
+            "coalescencia": self.coalescencia.estatisticas(),
+            "enriquecimento": self.enriquecimento.estatisticas(),
+            "autenticacao": self.auth.estatisticas(),
+            "circuitos": {nome: disjuntor.estatisticas() for nome, disjuntor in self.disjuntores.items()},
+            "selecao_campos": self.selecao.estado(),
+            "estrategia": {
+                "modo": self.estrategia,
+                "atraso_hedge": round(self.atraso_hedge(), 4),
+                "p95_principal": self.latencia_principal.percentil(95),
+                **self.contadores_estrategia,
+            },
+        }
+
+    def _validar_termo(self, termo_busca: str) -> Optional[Dict]:
+        """Retorna a resposta de erro para termos vazios, ou None se o termo for válido."""
+        if not termo_busca or not termo_busca.strip():
+            return self._resposta_erro("O termo de busca não pode estar vazio.")
+        return None
+
+    def _mensagem_sem_resultados(self, termo_busca: str) -> str:
+        return (
+            f"Nenhum produto encontrado para '{termo_busca}'. Verifique a ortografia ou tente termos mais genéricos (ex: 'iphone' em vez de 'iphone 17')."
+        )
+
+    def _resposta_erro(self, mensagem: str, status_code: Optional[int] = None) -> Dict:
+        resposta = {
+            "total": 0,
+            "erro": mensagem,
+            "produtos": []
+        }
+        if status_code:
+            resposta["status_code"] = status_code
+        return resposta
+
+    def _montar_requisicao(self, token: str, termo_busca: str, limit: int, offset: int = 0):
+        """Monta headers e parâmetros da busca principal e do fallback."""
         headers = {
             "Authorization": f"Bearer {token}"
         }
 
         params = {
-            "site_id": "MLB",
+            "site_id": self.site_id,
             "q": termo_busca.strip(),
             "limit": min(limit, 50)
         }
 
-        try:
-            logger.info(f"🔍 Fazendo requisição para: {self.base_url}")
-            logger.info(f"📋 Parâmetros: {params}")
-            logger.info(f"🔑 Headers: Authorization Bearer {token[:20]}...")
-            
-            response = requests.get(
-                self.base_url,
-                headers=headers,
-                params=params,
-                timeout=10
-            )
-            
-            logger.info(f"📊 Status da resposta: {response.status_code}")
-            logger.info(f"📄 Headers resposta: {dict(response.headers)}")
-
-            if response.status_code == 401:
-                logger.error("❌ Token inválido ou expirado")
-                return {
-                    "total": 0,
-                    "erro": "Token inválido ou expirado.",
-                    "produtos": []
-            }
-
-            response.raise_for_status()
-            dados = response.json()
-            
-            logger.info(f"📦 Estrutura da resposta: {list(dados.keys())}")
-            logger.info(f"📊 Total de resultados recebidos: {len(dados.get('results', []))}")
-
-            resultados = dados.get("results", [])
-            logger.info(f"🔍 Buscando produtos: '{termo_busca}' (limite: {min(limit, 50)})")
-            logger.info(f"📊 Total de resultados recebidos: {len(resultados)}")
-            
-            # Se não encontrou resultados com /products/search, tentar com /sites/MLB/search
-            if not resultados:
-                logger.warning("⚠️ Nenhum resultado com /products/search, tentando fallback para /sites/MLB/search")
-                fallback_url = "https://api.mercadolibre.com/sites/MLB/search"
-                fallback_params = {
-                    "q": termo_busca.strip(),
-                    "limit": min(limit, 50)
-                }
-                
-                try:
-                    fallback_response = requests.get(
-                        fallback_url,
-                        headers=headers,
-                        params=fallback_params,
-                        timeout=10
-                    )
-                    
-                    logger.info(f"📊 Fallback status: {fallback_response.status_code}")
-                    
-                    if fallback_response.status_code == 200:
-                        fallback_dados = fallback_response.json()
-                        fallback_results = fallback_dados.get("results", [])
-                        logger.info(f"📦 Fallback encontrou {len(fallback_results)} resultados")
-                        
-                        if fallback_results:
-                            resultados = fallback_results
-                            dados = fallback_dados
-                        else:
-                            logger.warning("📦 Fallback também não encontrou resultados")
-                    else:
-                        logger.error(f"❌ Fallback falhou: {fallback_response.status_code}")
-                        
-                except Exception as e:
-                    logger.error(f"❌ Erro no fallback: {e}")
-            
-            if not resultados:
-                logger.warning(f"📦 Nenhum resultado encontrado para '{termo_busca}'")
-                return {
-                    "total": 0,
-                    "erro": f"Nenhum produto encontrado para '{termo_busca}'. Verifique a ortografia ou tente termos mais genéricos (ex: 'iphone' em vez de 'iphone 17').",
-                    "produtos": []
-                }
-            
-            # Debug: verificar estrutura do primeiro resultado
-            if resultados:
-                primeiro_item = resultados[0]
-                logger.debug(f"📋 Estrutura do primeiro item:")
-                logger.debug(f"   - ID: {primeiro_item.get('id', 'N/A')}")
-                logger.debug(f"   - Título: {primeiro_item.get('title', 'N/A')}")
-                logger.debug(f"   - Tem thumbnail: {'Sim' if primeiro_item.get('thumbnail') else 'Não'}")
-                logger.debug(f"   - Tem pictures: {'Sim' if primeiro_item.get('pictures') else 'Não'}")
-            
-            # A API /products/search já retorna dados básicos, vamos usar diretamente
-            # sem buscar detalhes individuais para evitar 404s
-            produtos = self._formatar_produtos(resultados)
-            
-            # Debug: verificar produtos formatados
-            produtos_sem_nome = [p for p in produtos if p.get("nome") == "Não informado"]
-            produtos_sem_imagem = [p for p in produtos if p.get("imagem") == "Não informado"]
-            logger.info(f"Produtos formatados: {len(produtos)} total, {len(produtos_sem_nome)} sem nome, {len(produtos_sem_imagem)} sem imagem")
-            
-            # Debug: listar todos os status encontrados
-            status_encontrados = set(p.get("status", "unknown") for p in produtos)
-            logger.info(f"🔍 Status encontrados na busca: {sorted(status_encontrados)}")
-            
-            # Contar produtos por status
-            from collections import Counter
+        fallback_params = {
+            "q": termo_busca.strip(),
+            "limit": min(limit, 50)
+        }
+
+        if offset:
+            params["offset"] = offset
+            fallback_params["offset"] = offset
+
+        return headers, params, fallback_params
+
+    def _resultados_fallback(self, status_code: int, conteudo: bytes) -> List[Dict]:
+        """Interpreta a resposta de /sites/MLB/search; o conteúdo só é decodificado em caso de sucesso."""
+        anotar(status_fallback=status_code)
+
+        if status_code != 200:
+            return []
+
+        with medir("json"):
+            fallback_results = decodificar_resultados(conteudo)
+        contar("resultados_fallback", len(fallback_results))
+        return fallback_results
+
+    def _resposta_produtos(self, produtos: List[Dict]) -> Dict:
+        """Ordena os produtos (com imagem primeiro) e monta o dicionário de resposta."""
+        with medir("ordenar"):
+            produtos = self._ordenar_produtos(produtos)
+
+        if detalhar():
             status_counts = Counter(p.get("status", "unknown") for p in produtos)
-            logger.info(f"📊 Contagem por status: {dict(status_counts)}")
-
-            return {
-                "total": len(produtos),
-                "produtos": produtos
-            }
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Erro de requisição: {e}")
-            return {
-                "total": 0,
-                "erro": "Erro ao comunicar com a API do Mercado Livre.",
-                "produtos": []
-            }
-        except Exception as e:
-            logger.error(f"❌ Erro inesperado: {e}")
-            return {
-                "total": 0,
-                "erro": "Erro inesperado ao buscar produtos.",
-                "produtos": []
-            }
-
-    def _formatar_produtos(self, resultados: List[Dict]) -> List[Dict]:
-        produtos = []
+            logger.debug("📊 Contagem por status: %s", dict(status_counts))
 
-        for item in resultados:
-            produto_id = item.get("id")
-            if not produto_id:
-                logger.warning("Item sem ID encontrado, pulando...")
-                continue
-            
-            # Extrair nome do produto - verificar vários campos possíveis
-            nome = (item.get("title") or 
-                   item.get("name") or 
-                   item.get("product_name") or
-                   "").strip()
-            
-            # Se ainda não tiver nome, tentar buscar novamente
-            if not nome:
-                logger.warning(f"Produto {produto_id} sem nome após formatação, tentando buscar novamente...")
-                # Não buscar aqui para evitar loop, apenas logar
-                nome = "Não informado"
-            
-            # Extrair imagem - tentar várias fontes
-            imagem = self._extrair_imagem(item)
-            
-            # Log se ainda estiver sem dados
-            if nome == "Não informado" or imagem == "Não informado":
-                logger.warning(f"Produto {produto_id} ainda sem dados completos - nome: {nome != 'Não informado'}, imagem: {imagem != 'Não informado'}")
-            
-            # Extrair URL do produto (permalink)
-            # Preferir permalink do anúncio (página de venda) quando disponível
-            buy_box = item.get("buy_box_winner") if isinstance(item.get("buy_box_winner"), dict) else {}
-            permalink_venda = buy_box.get("permalink")
-            permalink = permalink_venda or item.get("permalink") or item.get("url") or item.get("product_url")
-            if permalink and str(permalink).strip().startswith("http"):
-                url_produto = str(permalink).strip()
-            else:
-                url_produto = "Não informado"
-            
-            # Extrair preço se disponível
-            preco = None
-            try:
-                if item.get("price"):
-                    preco = float(item.get("price"))
-                elif item.get("prices") and len(item.get("prices", [])) > 0:
-                    preco_valor = item.get("prices")[0].get("amount")
-                    if preco_valor:
-                        preco = float(preco_valor)
-            except (ValueError, TypeError):
-                preco = None
-
-            status = item.get("status")
-            if not status or not str(status).strip():
-                status = "unknown"
-            else:
-                status = str(status).strip().lower()
-            
-            # Não sobrescrever status para inactive - produtos já vêm como active da API
-            # if item.get("_detalhes_status") == 404:
-            #     status = "inactive"
-            #     logger.debug(f"Produto {produto_id} marcado como inactive devido a 404 no detalhe do anúncio")
-
-            produtos.append({
-                "id": produto_id,
-                "nome": nome,
-                "status": status,
-                "imagem": imagem,
-                "url": url_produto,
-                "preco": preco,
-                "atributos": self._extrair_atributos(item)
-            })
-
-        # Ordenar: com imagem primeiro
-        produtos.sort(key=lambda p: p["imagem"] == "Não informado")
-
-        return produtos
-    
-    def _buscar_detalhes_produto(self, produto_id: str, token: str) -> Dict:
-        
-        try:
-            url = f"https://api.mercadolibre.com/items/{produto_id}"
-            headers = {"Authorization": f"Bearer {token}"}
-            response = requests.get(url, headers=headers, timeout=5)  # Timeout menor para não travar
-            
-            if response.status_code == 200:
-                dados = response.json()
-                title = dados.get('title', '').strip()
-                thumbnail = dados.get('thumbnail') or dados.get('secure_thumbnail') or ''
-                has_pictures = bool(dados.get('pictures') and len(dados.get('pictures', [])) > 0)
-                
-                logger.debug(f"Detalhes obtidos para {produto_id}: title={bool(title)}, thumbnail={bool(thumbnail)}, pictures={has_pictures}")
-                
-                if not title:
-                    logger.warning(f"Produto {produto_id} retornado sem title do endpoint /items")
-                if not thumbnail and not has_pictures:
-                    logger.warning(f"Produto {produto_id} retornado sem thumbnail/pictures do endpoint /items")
-                
-                return {"_http_status": 200, **dados}
-            elif response.status_code == 404:
-                # 404 é comum - produto pode não existir mais ou não estar acessível
-                logger.debug(f"Produto {produto_id} não encontrado (404) - pode ter sido removido")
-                return {"_http_status": 404}
-            elif response.status_code == 401:
-                logger.error(f"Token inválido ao buscar detalhes de {produto_id}")
-                return {"_http_status": 401}
-            else:
-                logger.debug(f"Erro ao buscar detalhes para {produto_id}: status {response.status_code}")
-                return {"_http_status": response.status_code}
-        except requests.exceptions.Timeout:
-            logger.debug(f"Timeout ao buscar detalhes para {produto_id}")
-            return {"_http_status": 408}
-        except requests.exceptions.RequestException as e:
-            logger.debug(f"Erro de requisição ao buscar detalhes para {produto_id}: {str(e)}")
-            return {"_http_status": 503}
-        except Exception as e:
-            logger.error(f"Exceção inesperada ao buscar detalhes para {produto_id}: {str(e)}")
-        return {"_http_status": 500}
-    
-    def _extrair_imagem(self, produto: Dict) -> str:
-        """Extrai a URL da imagem do produto, tentando várias fontes."""
-        # Tentar secure_thumbnail primeiro (HTTPS)
-        imagem = produto.get("secure_thumbnail")
-        if imagem and imagem.strip():
-            return imagem.strip()
-        
-        # Tentar thumbnail
-        imagem = produto.get("thumbnail")
-        if imagem and imagem.strip():
-            imagem = imagem.strip()
-            # Converter HTTP para HTTPS se necessário
-            if imagem.startswith("http://"):
-                imagem = imagem.replace("http://", "https://", 1)
-            return imagem
-        
-        # Tentar pegar a primeira imagem de pictures
-        pictures = produto.get("pictures", [])
-        if pictures and len(pictures) > 0:
-            primeira_imagem = pictures[0]
-            if isinstance(primeira_imagem, dict):
-                # Preferir secure_url
-                imagem = primeira_imagem.get("secure_url") or primeira_imagem.get("url")
-                if imagem and imagem.strip():
-                    imagem = imagem.strip()
-                    # Converter HTTP para HTTPS se necessário
-                    if imagem.startswith("http://"):
-                        imagem = imagem.replace("http://", "https://", 1)
-                    return imagem
-            elif isinstance(primeira_imagem, str):
-                # Se pictures for uma lista de strings
-                imagem = primeira_imagem.strip()
-                if imagem.startswith("http://"):
-                    imagem = imagem.replace("http://", "https://", 1)
-                return imagem
-        
-        return "Não informado"
-
-    def _extrair_atributos(self, produto: Dict, max_atributos: int = 3) -> List[Dict]:
-        atributos_formatados = []
-
-        atributos = produto.get("attributes", [])
-
-        for attr in atributos[:max_atributos]:
-            nome = attr.get("name")
-            valor = attr.get("value_name")
-
-            if nome and valor:
-                atributos_formatados.append({
-                    "nome": nome,
-                    "valor": valor
-                })
-
-        while len(atributos_formatados) < max_atributos:
-            atributos_formatados.append({
-                "nome": "Não informado",
-                "valor": "Não informado"
-            })
-
-        return atributos_formatados
+        return {
+            "total": len(produtos),
+            "produtos": produtos
+        }
+
+    def _formatar_produtos(self, resultados: List[Dict], ordenar: bool = True) -> List[Dict]:
+        """Formata os itens brutos pelo FormatadorProdutos e anota itens sem id e incompletos."""
+        pagina = self.formatador.formatar(resultados, ordenar)
+
+        if pagina.sem_id:
+            contar("itens_sem_id", pagina.sem_id)
+        if pagina.incompletos:
+            contar("produtos_incompletos", pagina.incompletos)
+            # O detalhe de cada item incompleto, só na amostra
+            if detalhar():
+                for produto in pagina.produtos:
+                    if produto["nome"] == NAO_INFORMADO or produto["imagem"] == NAO_INFORMADO:
+                        logger.debug(
+                            "Produto %s sem dados completos - nome: %s, imagem: %s", produto["id"],
+                            produto["nome"] != NAO_INFORMADO, produto["imagem"] != NAO_INFORMADO,
+                        )
+
+        return pagina.produtos
+
+    def _ordenar_produtos(self, produtos: List[Dict]) -> List[Dict]:
+        """Ordena com imagem primeiro (estável: mantém a ordem do upstream no empate)."""
+        return ordenar_por_imagem(produtos)
@@ -0,0 +1,217 @@
+"""
+Verificação de prontidão (readiness) do processo.
+
+Responsável por:
+- Conferir se há um access_token utilizável (ou como renová-lo)
+- Sondar a API do Mercado Livre com uma requisição leve, reaproveitando o
+  resultado por alguns segundos
+- Conferir a saturação do pool de conexões e da fila do limite de taxa
+- Conferir o estado dos disjuntores de cada endpoint
+- Segurar a prontidão até o aquecimento do cache no startup terminar
+
+Um processo "indisponivel" deve sair do balanceador; "degradado" continua
+atendendo (ex.: principal com circuito aberto, mas fallback funcionando).
+"""
+
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.services.aquecimento_cache import AquecedorCache
+from app.services.autenticacao_mercadolivre import AutenticacaoMercadoLivre
+from app.services.cliente_http import TransporteHTTP
+from app.services.coalescencia import Coalescencia
+from app.services.limitador_taxa import BAIXA, LimiteTaxaExcedido, prioridade_upstream
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.utils.prazo import iniciar_orcamento
+
+logger = logging.getLogger(__name__)
+
+PRONTO = "pronto"
+DEGRADADO = "degradado"
+INDISPONIVEL = "indisponivel"
+
+# Fila do limite de taxa acima desta fração da capacidade conta como saturada
+FRACAO_FILA_SATURADA = 0.9
+
+
+class VerificadorProntidao:
+    """
+    Monta o resultado de /api/saude/pronto.
+
+    As verificações locais (token, pool, disjuntores) são recalculadas a
+    cada chamada; a sonda ao upstream é feita no máximo uma vez a cada
+    `validade` segundos, compartilhada entre chamadas simultâneas, com
+    prioridade baixa no limite de taxa e prazo curto. Se o limite de taxa
+    descartar a sonda (processo ocupado), vale o último resultado.
+
+    Configuração por ambiente:
+        ML_PRONTIDAO_VALIDADE: segundos em que o resultado da sonda é reaproveitado (padrão 5)
+        ML_PRONTIDAO_TIMEOUT: prazo da sonda ao upstream em segundos (padrão 2)
+        ML_PRONTIDAO_SONDA: caminho consultado na sonda (padrão /users/me, que também valida o token)
+    """
+
+    def __init__(
+        self,
+        auth: AutenticacaoMercadoLivre,
+        transporte: TransporteHTTP,
+        produtos: ProdutosMercadoLivre,
+        validade: Optional[float] = None,
+        timeout: Optional[float] = None,
+        aquecimento: Optional[AquecedorCache] = None,
+    ) -> None:
+        self.auth = auth
+        self.transporte = transporte
+        self.produtos = produtos
+        self.aquecimento = aquecimento
+        self.validade = validade if validade is not None else float(os.getenv("ML_PRONTIDAO_VALIDADE", "5"))
+        self.timeout = timeout or float(os.getenv("ML_PRONTIDAO_TIMEOUT", "2"))
+        api_url = os.getenv("ML_API_BASE_URL", "https://api.mercadolibre.com").rstrip("/")
+        self.url_sonda = api_url + os.getenv("ML_PRONTIDAO_SONDA", "/users/me")
+
+        self._coalescencia = Coalescencia()
+        self._sonda: Optional[Dict[str, Any]] = None
+        self._sondado_em = 0.0
+        self.sondas = 0
+
+    async def verificar(self) -> Dict[str, Any]:
+        """
+        Executa as verificações e resume o status.
+
+        Returns:
+            {"status": pronto|degradado|indisponivel, "pronto": bool, "verificacoes": {...}}
+        """
+        token = self._verificar_token()
+        upstream = await self._verificar_upstream()
+        if upstream.get("status") == 401:
+            if self.auth.pode_renovar:
+                token = {**token, "aviso": "Token recusado pela API; será renovado na próxima busca"}
+            else:
+                token = {**token, "ok": False, "motivo": "Token recusado pela API do Mercado Livre"}
+        recursos = self._verificar_recursos()
+        circuitos = self._verificar_circuitos()
+
+        verificacoes = {"token": token, "upstream": upstream, "recursos": recursos, "circuitos": circuitos}
+        if self.aquecimento is not None:
+            verificacoes["aquecimento"] = self._verificar_aquecimento()
+        if not all(v["ok"] for v in verificacoes.values()):
+            status = INDISPONIVEL
+        elif circuitos["degradado"] or token.get("aviso"):
+            status = DEGRADADO
+        else:
+            status = PRONTO
+
+        return {
+            "status": status,
+            "pronto": status != INDISPONIVEL,
+            "timestamp": datetime.now().isoformat(),
+            "verificacoes": verificacoes,
+        }
+
+    def _verificar_token(self) -> Dict[str, Any]:
+        """Há token e, se expirado ou ausente, ele pode ser renovado."""
+        try:
+            self.auth.obter_access_token()
+            tem_token = True
+        except RuntimeError:
+            tem_token = False
+        pode_renovar = self.auth.pode_renovar
+        restante = self.auth.segundos_para_expirar()
+
+        resultado: Dict[str, Any] = {
+            "ok": True,
+            "renovacao_automatica": pode_renovar,
+            "expira_em_segundos": round(restante) if restante is not None else None,
+        }
+        if not tem_token and not pode_renovar:
+            resultado.update(ok=False, motivo="Access token não configurado")
+        elif restante is not None and restante <= 0 and not pode_renovar:
+            resultado.update(ok=False, motivo="Access token expirado e sem refresh_token")
+        elif restante is not None and restante <= self.auth.margem_renovacao and not pode_renovar:
+            resultado["aviso"] = "Access token perto de expirar e sem refresh_token"
+        return resultado
+
+    async def _verificar_upstream(self) -> Dict[str, Any]:
+        """Resultado da sonda, refeita só quando o anterior passou da validade."""
+        if self._sonda is None or time.monotonic() - self._sondado_em >= self.validade:
+            await self._coalescencia.executar("sonda", self._sondar)
+        return {**self._sonda, "idade_segundos": round(time.monotonic() - self._sondado_em, 3)}
+
+    async def _sondar(self) -> None:
+        """Uma requisição leve ao upstream, com prazo curto e prioridade de segundo plano."""
+        prioridade_upstream.set(BAIXA)
+        iniciar_orcamento(self.timeout)
+        self.sondas += 1
+
+        cabecalhos = {}
+        if self.auth.access_token:
+            cabecalhos["Authorization"] = f"Bearer {self.auth.access_token}"
+        inicio = time.perf_counter()
+        try:
+            resposta = await self.transporte.cliente().get(self.url_sonda, headers=cabecalhos)
+            await resposta.aclose()
+        except LimiteTaxaExcedido as e:
+            # Sonda descartada porque o processo está ocupado, não porque a API
+            # está fora: mantém o último resultado (ou ok, se ainda não houver)
+            logger.info("⏳ Sonda de prontidão descartada pelo limite de taxa: %s", e)
+            sonda = dict(self._sonda) if self._sonda is not None else {"ok": True}
+            sonda["aviso"] = "Sonda descartada pelo limite de taxa; mantido o último resultado"
+            self._sonda = sonda
+            self._sondado_em = time.monotonic()
+            return
+        except httpx.HTTPError as e:
+            sonda = {"ok": False, "motivo": f"{type(e).__name__}: {e}" if str(e) else type(e).__name__}
+        else:
+            # 429 mostra que a API está no ar; só 5xx conta como indisponível
+            sonda = {"ok": resposta.status_code < 500, "status": resposta.status_code}
+        sonda["latencia_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        if not sonda["ok"] and (self._sonda is None or self._sonda["ok"]):
+            logger.warning("⚠️ Sonda de prontidão falhou: %s", sonda.get("motivo") or sonda.get("status"))
+        self._sonda = sonda
+        self._sondado_em = time.monotonic()
+
+    def _verificar_recursos(self) -> Dict[str, Any]:
+        """Pool de conexões e fila do limite de taxa com folga; cache apenas informado."""
+        conexoes = self.transporte.estatisticas()
+        limite = conexoes["limite_taxa"]
+        cache = self.produtos.cache.estatisticas()
+
+        pool_cheio = conexoes["conexoes_abertas"] >= self.transporte.max_conexoes
+        fila_cheia = bool(limite) and limite["fila"] >= FRACAO_FILA_SATURADA * self.transporte.limitador.fila_maxima
+        resultado: Dict[str, Any] = {
+            "ok": not (pool_cheio or fila_cheia),
+            "conexoes_abertas": conexoes["conexoes_abertas"],
+            "max_conexoes": self.transporte.max_conexoes,
+            "fila_limite_taxa": limite["fila"] if limite else None,
+            "limite_taxa_pausado_por": limite["pausado_por"] if limite else None,
+            "cache_entradas": cache["entradas"],
+            "cache_bytes": cache["bytes"],
+        }
+        if pool_cheio:
+            resultado["motivo"] = "Pool de conexões esgotado"
+        elif fila_cheia:
+            resultado["motivo"] = "Fila do limite de taxa saturada"
+        return resultado
+
+    def _verificar_aquecimento(self) -> Dict[str, Any]:
+        """Indisponível enquanto o aquecimento do startup não termina (ou passa do prazo)."""
+        estado = self.aquecimento.estado()
+        resultado: Dict[str, Any] = {"ok": estado["concluido"], **estado}
+        if not estado["concluido"]:
+            resultado["motivo"] = f"Aquecendo o cache ({estado['restantes']} termo(s) restante(s))"
+        return resultado
+
+    def _verificar_circuitos(self) -> Dict[str, Any]:
+        """Indisponível só com todos os circuitos abertos; algum aberto degrada."""
+        estados = self.produtos.estado_circuitos()
+        fechados = [nome for nome, estado in estados.items() if estado == "fechado"]
+        return {
+            "ok": not estados or any(estado != "aberto" for estado in estados.values()),
+            "degradado": len(fechados) < len(estados),
+            "estados": estados,
+        }
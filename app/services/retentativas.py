@@ -0,0 +1,62 @@
+"""
+Política de novas tentativas das chamadas ao upstream.
+
+Repete só requisições idempotentes, após falhas transitórias (conexão
+recusada ou derrubada, timeout, 5xx de gateway), com espera exponencial
+aleatória ("full jitter") e apenas enquanto o orçamento da requisição
+comporta a espera e mais uma tentativa.
+"""
+
+import os
+import random
+from typing import Optional
+
+import httpx
+
+from app.utils.prazo import tempo_restante
+
+METODOS_IDEMPOTENTES = frozenset({"GET", "HEAD", "OPTIONS"})
+STATUS_RETENTAVEIS = frozenset({500, 502, 503, 504})
+
+
+class PoliticaRetentativa:
+    """
+    Decide se e quando repetir uma chamada ao upstream.
+
+    A espera da tentativa n é sorteada entre 0 e min(espera_maxima,
+    espera_base * 2^n), o que espalha as repetições de vários clientes.
+
+    Configuração por ambiente:
+        ML_RETENTATIVAS: novas tentativas por chamada (padrão 2; "0" desativa)
+        ML_RETENTATIVA_BASE: segundos da primeira espera (padrão 0.1)
+        ML_RETENTATIVA_MAXIMA: teto da espera entre tentativas (padrão 1)
+        ML_RETENTATIVA_MINIMO: tempo mínimo que deve sobrar para a tentativa (padrão 0.2)
+    """
+
+    def __init__(
+        self,
+        maximo: Optional[int] = None,
+        espera_base: Optional[float] = None,
+        espera_maxima: Optional[float] = None,
+        minimo_tentativa: Optional[float] = None,
+    ) -> None:
+        self.maximo = maximo if maximo is not None else int(os.getenv("ML_RETENTATIVAS", "2"))
+        self.espera_base = espera_base or float(os.getenv("ML_RETENTATIVA_BASE", "0.1"))
+        self.espera_maxima = espera_maxima or float(os.getenv("ML_RETENTATIVA_MAXIMA", "1"))
+        self.minimo_tentativa = (
+            minimo_tentativa if minimo_tentativa is not None else float(os.getenv("ML_RETENTATIVA_MINIMO", "0.2"))
+        )
+
+    def espera(self, request: httpx.Request, tentativa: int) -> Optional[float]:
+        """
+        Retorna quantos segundos esperar antes de repetir a requisição, ou
+        None se ela não deve ser repetida (não idempotente, tentativas
+        esgotadas ou sem orçamento para esperar e tentar de novo).
+        """
+        if request.method not in METODOS_IDEMPOTENTES or tentativa >= self.maximo:
+            return None
+        espera = random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** tentativa))
+        restante = tempo_restante()
+        if restante is not None and espera + self.minimo_tentativa > restante:
+            return None
+        return espera
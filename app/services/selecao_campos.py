@@ -0,0 +1,112 @@
+"""
+Seleção de campos nas chamadas ao Mercado Livre (parâmetro attributes=).
+
+Responsável por:
+- Pedir a /products/search, /sites/MLB/search e /items só os campos lidos
+  pela formatação (os mesmos do schema de decodificação)
+- Reconhecer quando um endpoint recusa ou ignora a seleção e, a partir
+  daí, pedir a ele os payloads completos
+
+Configuração por ambiente:
+    ML_SELECAO_CAMPOS: 0 desliga a seleção de campos em todos os endpoints (padrão 1)
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+from app.services.decodificador_busca import ItemBusca
+
+logger = logging.getLogger(__name__)
+
+BUSCA = "busca"
+BUSCA_FALLBACK = "busca_fallback"
+ITENS = "itens"
+
+CAMPOS_ITEM = tuple(ItemBusca.__annotations__)
+
+# Nas buscas os itens ficam em "results"; no multi-get de /items, o filtro vale para cada "body"
+PARAMETRO_CAMPOS = {
+    BUSCA: ",".join(f"results.{campo}" for campo in CAMPOS_ITEM),
+    BUSCA_FALLBACK: ",".join(f"results.{campo}" for campo in CAMPOS_ITEM),
+    ITENS: ",".join(CAMPOS_ITEM),
+}
+
+_RESULTADOS_VAZIOS = re.compile(rb'"results"\s*:\s*\[\s*\]')
+_ITEM_ENCONTRADO = re.compile(rb'"code"\s*:\s*200\b')
+
+
+class SelecaoCampos:
+    """
+    Acrescenta attributes= aos parâmetros de cada endpoint enquanto ele aceitar.
+
+    Um endpoint passa a receber pedidos completos quando responde 400 à
+    seleção (e 200 sem ela) ou quando responde 200 sem nenhum dos campos
+    pedidos (ex.: o filtro foi entendido de outro jeito). A decisão vale
+    até o processo reiniciar.
+    """
+
+    def __init__(self, ativa: Optional[bool] = None) -> None:
+        self.ativa = ativa if ativa is not None else os.getenv("ML_SELECAO_CAMPOS", "1") != "0"
+        self._recusada: Dict[str, str] = {}
+        self._trava = threading.Lock()
+
+    def parametros(self, endpoint: str, params: Dict) -> Dict:
+        """params com attributes=, ou o próprio params se a seleção estiver desligada no endpoint."""
+        if not self.ativa or endpoint in self._recusada:
+            return params
+        return {**params, "attributes": PARAMETRO_CAMPOS[endpoint]}
+
+    def ignorada(self, endpoint: str, resposta: httpx.Response) -> bool:
+        """Resposta 200 a um pedido com seleção que não traz nenhum dos campos pedidos."""
+        if resposta.status_code != 200:
+            return False
+        conteudo = resposta.content
+        if b'"id"' in conteudo:
+            return False
+        if endpoint == ITENS:
+            return _ITEM_ENCONTRADO.search(conteudo) is not None
+        return _RESULTADOS_VAZIOS.search(conteudo) is None
+
+    def recusar(self, endpoint: str, motivo: str) -> None:
+        """Passa a pedir payloads completos ao endpoint."""
+        with self._trava:
+            if endpoint in self._recusada:
+                return
+            self._recusada[endpoint] = motivo
+        logger.warning("⚠️ %s não aceitou a seleção de campos (%s); pedindo payloads completos", endpoint, motivo)
+
+    def estado(self) -> Dict[str, str]:
+        """{endpoint: "ativa" | "desligada" | motivo da recusa}"""
+        return {
+            endpoint: self._recusada.get(endpoint, "ativa" if self.ativa else "desligada")
+            for endpoint in PARAMETRO_CAMPOS
+        }
+
+
+async def get_com_selecao(
+    cliente: httpx.AsyncClient, selecao: SelecaoCampos, endpoint: str, url: str, headers: Dict, params: Dict
+) -> httpx.Response:
+    """
+    GET pedindo só os campos usados; se o endpoint recusar ou ignorar a
+    seleção, repete o pedido completo e desliga a seleção nele.
+    """
+    selecionados = selecao.parametros(endpoint, params)
+    resposta = await cliente.get(url, headers=headers, params=selecionados)
+    if selecionados is params:
+        return resposta
+
+    if resposta.status_code == 400:
+        await resposta.aclose()
+        resposta = await cliente.get(url, headers=headers, params=params)
+        # 400 também no pedido completo: o problema não era a seleção
+        if resposta.status_code != 400:
+            selecao.recusar(endpoint, "HTTP 400")
+    elif selecao.ignorada(endpoint, resposta):
+        selecao.recusar(endpoint, "campos ausentes na resposta")
+        resposta = await cliente.get(url, headers=headers, params=params)
+    return resposta
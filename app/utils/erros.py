@@ -44,6 +44,33 @@ class ErroRecursoNaoEncontrado(ErroAPI):
         super().__init__(mensagem, status_code=404)
 
 
+class ErroServicoExterno(ErroAPI):
+    """Erro ao comunicar com a API do Mercado Livre."""
+    def __init__(self, mensagem: str = "Erro ao comunicar com a API do Mercado Livre."):
+        super().__init__(mensagem, status_code=502)
+
+
+class ErroCircuitoAberto(ErroAPI):
+    """Endpoint do Mercado Livre com circuito aberto: a chamada é recusada sem ir ao upstream."""
+    def __init__(self, endpoint: str = "busca"):
+        self.endpoint = endpoint
+        super().__init__(
+            "A API do Mercado Livre está instável no momento. Tente novamente em instantes.", status_code=503
+        )
+
+
+class ErroPrazoEsgotado(ErroAPI):
+    """O Mercado Livre não respondeu dentro do tempo (timeout ou orçamento da requisição)."""
+    def __init__(self, mensagem: str = "O Mercado Livre demorou demais para responder. Tente novamente."):
+        super().__init__(mensagem, status_code=504)
+
+
+class ErroLimiteRequisicoes(ErroAPI):
+    """Limite de requisições à API do Mercado Livre atingido (429 ou fila do limitador)."""
+    def __init__(self, mensagem: str = "Muitas buscas no momento. Tente novamente em instantes."):
+        super().__init__(mensagem, status_code=503)
+
+
 def tratar_erro_api(erro: Exception) -> HTTPException:
     """
     Converte exceções em respostas HTTP amigáveis.
@@ -0,0 +1,84 @@
+"""
+Tempo gasto em cada etapa de uma requisição.
+
+As etapas (token, upstream, json, formatar, ordenar, validacao...) são
+medidas com medir() e somadas por nome no acumulador da requisição atual;
+o middleware TemposRequisicao as devolve no cabeçalho Server-Timing.
+
+Fora de uma requisição (ex.: revalidação em segundo plano, chamadas
+síncronas) não há acumulador e medir() não faz nada.
+"""
+import contextvars
+import time
+from typing import Dict, List, Optional
+
+# nome da etapa -> [segundos somados, vezes]
+Acumulador = Dict[str, List[float]]
+
+_etapas: contextvars.ContextVar[Optional[Acumulador]] = contextvars.ContextVar("etapas", default=None)
+
+
+class _Etapa:
+    """Context manager de medir(); soma a duração ao acumulador ao sair."""
+
+    __slots__ = ("nome", "inicio", "acumulador")
+
+    def __init__(self, nome: str) -> None:
+        self.nome = nome
+
+    def __enter__(self) -> "_Etapa":
+        self.acumulador = _etapas.get()
+        if self.acumulador is not None:
+            self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao) -> None:
+        if self.acumulador is None:
+            return
+        duracao = time.perf_counter() - self.inicio
+        medida = self.acumulador.get(self.nome)
+        if medida is None:
+            self.acumulador[self.nome] = [duracao, 1]
+        else:
+            medida[0] += duracao
+            medida[1] += 1
+
+
+def medir(nome: str) -> _Etapa:
+    """
+    Mede um trecho como etapa da requisição atual:
+
+        with medir("upstream"):
+            resposta = await cliente.get(...)
+
+    Etapas repetidas (várias páginas, principal e fallback juntos) são
+    somadas, por isso a soma pode passar do tempo total da requisição.
+    """
+    return _Etapa(nome)
+
+
+def iniciar_etapas() -> Acumulador:
+    """Abre o acumulador de etapas da requisição atual."""
+    acumulador: Acumulador = {}
+    _etapas.set(acumulador)
+    return acumulador
+
+
+def tempos_ms() -> Optional[Dict[str, float]]:
+    """Milissegundos de cada etapa medida até agora na requisição atual (None fora de uma)."""
+    acumulador = _etapas.get()
+    if acumulador is None:
+        return None
+    return {nome: round(segundos * 1000, 2) for nome, (segundos, _) in acumulador.items()}
+
+
+def server_timing(acumulador: Acumulador, total: float) -> str:
+    """Monta o valor do cabeçalho Server-Timing (durações em ms; desc="Nx" para etapas repetidas)."""
+    partes = []
+    for nome, (segundos, vezes) in acumulador.items():
+        parte = f"{nome};dur={segundos * 1000:.2f}"
+        if vezes > 1:
+            parte += f';desc="{vezes}x"'
+        partes.append(parte)
+    partes.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(partes)
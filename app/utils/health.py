@@ -4,20 +4,44 @@ Utilitários para verificação de saúde da aplicação.
 Fornece endpoints de health check para monitoramento
 e diagnóstico da aplicação.
 """
+import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
+_INICIO = time.monotonic()
 
-def verificar_saude() -> Dict[str, Any]:
+
+def verificar_vida() -> Dict[str, Any]:
+    """
+    Liveness: o processo está de pé e o laço de eventos responde.
+
+    Não depende do Mercado Livre nem de token; falhar aqui significa que o
+    processo deve ser reiniciado. Prontidão fica em VerificadorProntidao.
+    """
+    return {
+        "status": "vivo",
+        "timestamp": datetime.now().isoformat(),
+        "uptime_segundos": round(time.monotonic() - _INICIO, 1),
+    }
+
+
+def verificar_saude(circuitos: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
     """
     Retorna o status de saúde da aplicação.
     
+    Args:
+        circuitos: Estado do circuito de cada endpoint do Mercado Livre;
+            com algum circuito fora de "fechado" o status vira "degradado"
+
     Returns:
         Dicionário com informações de status
     """
+    circuitos = circuitos or {}
+    degradado = any(estado != "fechado" for estado in circuitos.values())
     return {
-        "status": "saudavel",
+        "status": "degradado" if degradado else "saudavel",
         "timestamp": datetime.now().isoformat(),
         "mensagem": "API do Desafio Mercado Livre funcionando",
-        "versao": "1.0.1"
+        "versao": "1.0.1",
+        "circuitos": circuitos,
     }
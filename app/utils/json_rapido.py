@@ -0,0 +1,46 @@
+"""
+Serialização JSON rápida para as respostas da busca.
+
+Usa orjson quando instalado (com fallback para o json da biblioteca
+padrão), tanto para codificar quanto para decodificar, e oferece uma
+resposta que entrega bytes já codificados, sem passar pela revalidação
+do response_model do FastAPI.
+"""
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+    ORJSON_DISPONIVEL = False
+
+
+def codificar_json(dados: Any) -> bytes:
+    """Codifica em JSON compacto UTF-8 (mesma saída do JSONResponse do Starlette)."""
+    if ORJSON_DISPONIVEL:
+        return orjson.dumps(dados)
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decodificar_json(conteudo: bytes) -> Any:
+    """Decodifica JSON UTF-8; erros levantam json.JSONDecodeError nos dois casos."""
+    if ORJSON_DISPONIVEL:
+        return orjson.loads(conteudo)
+    return json.loads(conteudo)
+
+
+class RespostaJSONRapida(JSONResponse):
+    """
+    JSONResponse codificada com codificar_json.
+
+    Retornar esta resposta de uma rota faz o FastAPI pular a validação do
+    response_model (que continua documentado no OpenAPI), então o conteúdo
+    precisa já estar no formato do schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return codificar_json(content)
@@ -0,0 +1,35 @@
+"""
+Utilitários para acompanhamento de latência.
+
+Mantém uma janela deslizante das últimas medições para calcular
+percentis sem guardar o histórico inteiro.
+"""
+import threading
+from collections import deque
+from typing import Optional
+
+
+class JanelaLatencia:
+    """Janela deslizante das últimas N latências, em segundos."""
+
+    def __init__(self, tamanho: int = 200):
+        self._amostras = deque(maxlen=tamanho)
+        self._trava = threading.Lock()
+
+    def registrar(self, segundos: float) -> None:
+        with self._trava:
+            self._amostras.append(segundos)
+
+    def __len__(self) -> int:
+        return len(self._amostras)
+
+    def percentil(self, p: float) -> Optional[float]:
+        """
+        Retorna o percentil p (0-100) das amostras, ou None se não houver amostras.
+        """
+        with self._trava:
+            ordenadas = sorted(self._amostras)
+        if not ordenadas:
+            return None
+        indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+        return ordenadas[indice]
@@ -0,0 +1,140 @@
+"""
+Métricas da aplicação no formato do Prometheus (exportadas em /metrics).
+
+Responsável por:
+- Histogramas de latência das buscas (ponta a ponta) e de cada endpoint do upstream
+- Bytes recebidos de cada endpoint do upstream (como trafegaram, comprimidos)
+- Contadores de uso do fallback, buscas vazias, 401 do upstream e consultas ao cache
+- Distribuição da quantidade de produtos por busca
+- Somar as métricas de todos os workers quando a aplicação roda com vários processos
+
+Registrar uma medição é só incrementar um valor em memória (ou num arquivo
+mapeado, no modo multiprocesso); a exportação é montada apenas quando o
+Prometheus lê /metrics.
+
+Configuração por ambiente:
+    PROMETHEUS_MULTIPROC_DIR: diretório compartilhado pelos workers (uvicorn/gunicorn
+        com --workers). Precisa existir, estar vazio no início do servidor e ser
+        definido antes de a aplicação ser importada; sem ele, cada processo
+        exporta só as próprias métricas.
+"""
+import os
+from functools import lru_cache
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+# Caminhos do upstream com métricas próprias; os demais são agrupados em "outro"
+ENDPOINTS_UPSTREAM = ("/products/search", "/sites/MLB/search", "/items", "/oauth/token", "/users/me")
+
+# Rotas com latência medida de ponta a ponta
+ROTAS_BUSCA = ("/api/buscar", "/api/buscar/stream")
+
+BUSCA_DURACAO = Histogram(
+    "ml_busca_duracao_segundos",
+    "Latência das rotas de busca, da chegada da requisição ao último byte da resposta",
+    ["rota", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15),
+)
+UPSTREAM_DURACAO = Histogram(
+    "ml_upstream_duracao_segundos",
+    "Latência de cada chamada à API do Mercado Livre até os cabeçalhos da resposta",
+    ["endpoint", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+UPSTREAM_BYTES = Counter(
+    "ml_upstream_bytes",
+    "Bytes de corpo recebidos da API do Mercado Livre, antes da descompressão",
+    ["endpoint"],
+)
+UPSTREAM_401 = Counter(
+    "ml_upstream_401",
+    "Respostas 401 (token inválido ou expirado) da API do Mercado Livre",
+    ["endpoint"],
+)
+FALLBACK = Counter(
+    "ml_fallback_consultas",
+    "Consultas ao endpoint de fallback (/sites/MLB/search) por resultado",
+    ["resultado"],
+)
+CACHE = Counter(
+    "ml_cache_consultas",
+    "Consultas ao cache de buscas por resultado",
+    ["resultado"],
+)
+BUSCAS_VAZIAS = Counter(
+    "ml_busca_vazia",
+    "Buscas concluídas sem nenhum produto",
+)
+BUSCA_RESULTADOS = Histogram(
+    "ml_busca_resultados",
+    "Quantidade de produtos devolvidos por busca",
+    buckets=(0, 1, 5, 10, 20, 50, 100, 200),
+)
+
+# Séries com rótulos fixos, resolvidas uma vez (evita a busca por rótulo a cada medição)
+CACHE_ACERTO = CACHE.labels("acerto")
+CACHE_VELHO = CACHE.labels("velho")
+CACHE_FALTA = CACHE.labels("falta")
+FALLBACK_COM_RESULTADOS = FALLBACK.labels("com_resultados")
+FALLBACK_VAZIO = FALLBACK.labels("vazio")
+FALLBACK_ERRO = FALLBACK.labels("erro")
+
+
+@lru_cache(maxsize=256)
+def endpoint_upstream(caminho: str) -> str:
+    """Rótulo do endpoint para um caminho do upstream (/items/MLB123 vira /items)."""
+    for endpoint in ENDPOINTS_UPSTREAM:
+        if caminho == endpoint or caminho.startswith(endpoint + "/"):
+            return endpoint
+    return "outro"
+
+
+def classe_status(status: int) -> str:
+    """Agrupa códigos HTTP por classe (2xx, 4xx...), exceto 401 e 429, mantidos inteiros."""
+    if status in (401, 429):
+        return str(status)
+    return f"{status // 100}xx"
+
+
+def registrar_upstream(caminho: str, status: str, segundos: float) -> None:
+    """Registra a latência de uma chamada ao upstream; status é o HTTP ou "erro"."""
+    endpoint = endpoint_upstream(caminho)
+    UPSTREAM_DURACAO.labels(endpoint, status).observe(segundos)
+    if status == "401":
+        UPSTREAM_401.labels(endpoint).inc()
+
+
+def registrar_bytes_upstream(caminho: str, recebidos: int) -> None:
+    """Soma os bytes de corpo recebidos em uma chamada ao upstream."""
+    UPSTREAM_BYTES.labels(endpoint_upstream(caminho)).inc(recebidos)
+
+
+def registrar_busca(total: int) -> None:
+    """Registra a quantidade de produtos de uma busca concluída (0 conta como busca vazia)."""
+    BUSCA_RESULTADOS.observe(total)
+    if not total:
+        BUSCAS_VAZIAS.inc()
+
+
+def exportar() -> Tuple[bytes, str]:
+    """
+    Gera o texto de exposição do Prometheus e o content-type correspondente.
+
+    No modo multiprocesso, soma os arquivos de todos os workers.
+    """
+    diretorio = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if diretorio:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro, path=diretorio)
+    else:
+        registro = REGISTRY
+    return generate_latest(registro), CONTENT_TYPE_LATEST
+
+
+def encerrar_processo() -> None:
+    """Avisa o modo multiprocesso que este worker terminou (shutdown da aplicação)."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
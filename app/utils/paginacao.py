@@ -0,0 +1,59 @@
+"""
+Utilitários de paginação da busca.
+
+Converte (offset, limit) nas páginas de tamanho fixo pedidas ao
+Mercado Livre e codifica o cursor opaco da próxima página.
+"""
+import base64
+import binascii
+import json
+from typing import Dict
+
+# Máximo de resultados por requisição aceito pela busca do Mercado Livre
+TAMANHO_PAGINA = 50
+
+# Máximo de resultados devolvidos em uma resposta de /api/buscar
+LIMITE_MAXIMO = 200
+
+# A busca pública do Mercado Livre não passa do resultado 1000
+OFFSET_MAXIMO = 1000
+
+
+def paginas_do_intervalo(offset: int, limit: int) -> range:
+    """
+    Retorna os índices das páginas que cobrem [offset, offset + limit),
+    sem passar de OFFSET_MAXIMO.
+    """
+    fim = min(offset + limit, OFFSET_MAXIMO)
+    if fim <= offset:
+        return range(0)
+    return range(offset // TAMANHO_PAGINA, (fim - 1) // TAMANHO_PAGINA + 1)
+
+
+def codificar_cursor(termo_normalizado: str, offset: int, limit: int) -> str:
+    """Codifica a posição da próxima página em um cursor opaco (base64 URL-safe)."""
+    dados = json.dumps({"q": termo_normalizado, "o": offset, "l": limit}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Dict:
+    """
+    Decodifica um cursor gerado por codificar_cursor.
+
+    Returns:
+        {"termo": ..., "offset": ..., "limit": ...}
+
+    Raises:
+        ValueError: cursor malformado ou fora dos limites
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        termo, offset, limit = dados["q"], int(dados["o"]), int(dados["l"])
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido.")
+
+    if not isinstance(termo, str) or not 0 <= offset < OFFSET_MAXIMO or not 1 <= limit <= LIMITE_MAXIMO:
+        raise ValueError("Cursor inválido.")
+
+    return {"termo": termo, "offset": offset, "limit": limit}
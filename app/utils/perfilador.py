@@ -0,0 +1,91 @@
+"""
+Perfil de requisições lentas, sob demanda.
+
+Com ML_PERFIL_LIMIAR_MS definido, uma amostra das requisições roda sob o
+profiler por amostragem do pyinstrument; as que passam do limiar têm o
+perfil (texto com a árvore de chamadas) gravado em ML_PERFIL_DIR.
+
+Só uma requisição por processo é perfilada de cada vez (o profiler é um
+por thread); as que chegam enquanto outra está sendo perfilada seguem sem
+perfil.
+
+Configuração por ambiente:
+    ML_PERFIL_LIMIAR_MS: duração a partir da qual o perfil é gravado (padrão 0: desativado)
+    ML_PERFIL_AMOSTRAGEM: fração das requisições perfiladas (padrão 0.1)
+    ML_PERFIL_INTERVALO_MS: intervalo entre amostras do profiler (padrão 1)
+    ML_PERFIL_DIR: diretório dos perfis (padrão "perfis")
+"""
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Optional
+
+try:
+    from pyinstrument import Profiler
+    PYINSTRUMENT_DISPONIVEL = True
+except ImportError:
+    PYINSTRUMENT_DISPONIVEL = False
+
+logger = logging.getLogger(__name__)
+
+
+class Perfilador:
+    """Decide quais requisições perfilar e grava o perfil das lentas."""
+
+    def __init__(
+        self,
+        limiar_ms: Optional[float] = None,
+        amostragem: Optional[float] = None,
+        intervalo_ms: Optional[float] = None,
+        diretorio: Optional[str] = None,
+    ) -> None:
+        self.limiar = (limiar_ms if limiar_ms is not None else float(os.getenv("ML_PERFIL_LIMIAR_MS", "0"))) / 1000
+        self.amostragem = amostragem if amostragem is not None else float(os.getenv("ML_PERFIL_AMOSTRAGEM", "0.1"))
+        self.intervalo = (intervalo_ms or float(os.getenv("ML_PERFIL_INTERVALO_MS", "1"))) / 1000
+        self.diretorio = diretorio or os.getenv("ML_PERFIL_DIR", "perfis")
+        self._ocupado = threading.Lock()
+        self.gravados = 0
+
+        if self.limiar > 0 and not PYINSTRUMENT_DISPONIVEL:
+            logger.warning("⚠️ ML_PERFIL_LIMIAR_MS definido, mas o pyinstrument não está instalado: perfil desativado")
+
+    @property
+    def ativo(self) -> bool:
+        return self.limiar > 0 and PYINSTRUMENT_DISPONIVEL
+
+    def iniciar(self) -> Optional[Any]:
+        """Inicia o profiler se a requisição for sorteada e nenhuma outra estiver sendo perfilada."""
+        if not self.ativo or random.random() >= self.amostragem:
+            return None
+        if not self._ocupado.acquire(blocking=False):
+            return None
+        try:
+            profiler = Profiler(interval=self.intervalo, async_mode="enabled")
+            profiler.start()
+        except Exception:
+            self._ocupado.release()
+            raise
+        return profiler
+
+    def parar(self, profiler: Any, duracao: float) -> bool:
+        """Para o profiler e informa se a requisição passou do limiar (perfil a gravar)."""
+        try:
+            profiler.stop()
+        finally:
+            self._ocupado.release()
+        return duracao >= self.limiar
+
+    def gravar(self, profiler: Any, descricao: str, duracao: float) -> str:
+        """Grava o perfil em texto e retorna o caminho do arquivo (I/O bloqueante: rodar fora do laço)."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        nome = re.sub(r"[^A-Za-z0-9]+", "_", descricao).strip("_")
+        caminho = os.path.join(
+            self.diretorio, f"perfil-{time.strftime('%Y%m%d-%H%M%S')}-{duracao * 1000:.0f}ms-{nome}.txt"
+        )
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.write(profiler.output_text(unicode=True, color=False))
+        self.gravados += 1
+        return caminho
@@ -0,0 +1,59 @@
+"""
+Orçamento de tempo (prazo) de uma requisição à aplicação.
+
+A rota inicia um orçamento; todas as chamadas ao upstream feitas durante a
+requisição (inclusive em tarefas filhas) o enxergam por uma contextvar e
+limitam timeouts, esperas e novas tentativas ao tempo que resta.
+"""
+import contextvars
+import threading
+import time
+from typing import Dict, Optional
+
+import httpx
+
+
+class PrazoEsgotado(httpx.TimeoutException):
+    """O orçamento da requisição acabou antes de uma chamada ao upstream."""
+
+
+class Orcamento:
+    """Prazo total de uma requisição e as novas tentativas feitas dentro dele."""
+
+    def __init__(self, segundos: float):
+        self.segundos = segundos
+        self.inicio = time.monotonic()
+        self.prazo = self.inicio + segundos
+        self.retentativas = 0
+        self._trava = threading.Lock()
+
+    def restante(self) -> float:
+        return max(0.0, self.prazo - time.monotonic())
+
+    def registrar_retentativa(self) -> None:
+        with self._trava:
+            self.retentativas += 1
+
+    def cabecalhos(self) -> Dict[str, str]:
+        """Cabeçalhos de resposta com o orçamento, o que sobrou dele e as novas tentativas."""
+        return {
+            "X-Orcamento-Ms": str(round(self.segundos * 1000)),
+            "X-Orcamento-Restante-Ms": str(round(self.restante() * 1000)),
+            "X-Upstream-Retentativas": str(self.retentativas),
+        }
+
+
+orcamento_atual: contextvars.ContextVar[Optional[Orcamento]] = contextvars.ContextVar("orcamento_atual", default=None)
+
+
+def iniciar_orcamento(segundos: Optional[float]) -> Optional[Orcamento]:
+    """Inicia o orçamento do contexto atual; None remove o prazo (tarefas em segundo plano)."""
+    orcamento = Orcamento(segundos) if segundos else None
+    orcamento_atual.set(orcamento)
+    return orcamento
+
+
+def tempo_restante() -> Optional[float]:
+    """Segundos que restam no orçamento atual, ou None se não houver prazo."""
+    orcamento = orcamento_atual.get()
+    return orcamento.restante() if orcamento is not None else None
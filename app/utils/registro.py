@@ -0,0 +1,196 @@
+"""
+Registro (logging) estruturado, assíncrono e amostrado.
+
+Responsável por:
+- Formatar cada registro como uma linha JSON (ou texto, para desenvolvimento)
+- Tirar a escrita do caminho da requisição: os registros vão para uma fila
+  limitada e uma thread os formata e grava; com a fila cheia, são descartados
+- Acumular os dados de cada requisição e gravar uma linha de resumo no fim
+- Liberar o detalhe em DEBUG só para uma amostra das requisições
+
+Configuração por ambiente:
+    ML_LOG_NIVEL: nível mínimo dos registros (padrão INFO)
+    ML_LOG_FORMATO: json (padrão) ou texto
+    ML_LOG_AMOSTRAGEM: fração das requisições com registros DEBUG (padrão 0.01)
+    ML_LOG_FILA: registros aguardando gravação antes de descartar (padrão 10000)
+"""
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import IO, Any, Dict, Optional
+
+from app.utils.json_rapido import codificar_json
+
+# Logger raiz da aplicação: app.services.*, app.api.* etc. herdam o handler dele
+LOGGER_APP = "app"
+
+_campos_requisicao: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "campos_requisicao", default=None
+)
+_amostrada: contextvars.ContextVar[bool] = contextvars.ContextVar("requisicao_amostrada", default=False)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["_HandlerFila"] = None
+_taxa_amostragem = 0.0
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro; campos estruturados vêm de extra={"campos": {...}}."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        campos = getattr(record, "campos", None)
+        if campos:
+            dados.update(campos)
+        if record.exc_info or record.exc_text:
+            dados["excecao"] = record.exc_text or self.formatException(record.exc_info)
+        return codificar_json(dados).decode("utf-8")
+
+
+class FormatadorTexto(logging.Formatter):
+    """Texto legível com os campos estruturados no fim da linha."""
+
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        linha = super().format(record)
+        campos = getattr(record, "campos", None)
+        if campos:
+            linha += " " + " ".join(f"{chave}={valor}" for chave, valor in campos.items())
+        return linha
+
+
+class _FiltroAmostragem(logging.Filter):
+    """Aplica o nível configurado, exceto nas requisições sorteadas, que registram também DEBUG."""
+
+    def __init__(self, nivel: int) -> None:
+        super().__init__()
+        self.nivel = nivel
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.nivel or _amostrada.get()
+
+
+class _HandlerFila(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não formata na thread da requisição e não bloqueia:
+    a mensagem é montada pelo listener, e com a fila cheia o registro é
+    descartado e contado.
+    """
+
+    def __init__(self, fila: queue.Queue) -> None:
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Tracebacks não sobrevivem à troca de thread: só eles são formatados aqui
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+def configurar_registro(saida: Optional[IO[str]] = None) -> None:
+    """
+    Instala o handler em fila no logger "app" e inicia a thread de gravação.
+
+    Args:
+        saida: onde gravar os registros (padrão: sys.stdout)
+
+    Pode ser chamado de novo (ex.: um ciclo de vida por teste): a
+    configuração anterior é encerrada antes.
+    """
+    global _listener, _handler, _taxa_amostragem
+    encerrar_registro()
+
+    nivel = logging.getLevelName(os.getenv("ML_LOG_NIVEL", "INFO").upper())
+    _taxa_amostragem = float(os.getenv("ML_LOG_AMOSTRAGEM", "0.01"))
+    formatador = FormatadorTexto() if os.getenv("ML_LOG_FORMATO", "json") == "texto" else FormatadorJSON()
+
+    gravador = logging.StreamHandler(saida or sys.stdout)
+    gravador.setFormatter(formatador)
+
+    _handler = _HandlerFila(queue.Queue(maxsize=int(os.getenv("ML_LOG_FILA", "10000"))))
+    _handler.addFilter(_FiltroAmostragem(nivel))
+    _listener = logging.handlers.QueueListener(_handler.queue, gravador)
+    _listener.start()
+
+    logger_app = logging.getLogger(LOGGER_APP)
+    logger_app.addHandler(_handler)
+    # DEBUG só é criado se houver amostragem; o filtro decide por requisição
+    logger_app.setLevel(min(nivel, logging.DEBUG) if _taxa_amostragem > 0 else nivel)
+    logger_app.propagate = False
+
+
+def encerrar_registro() -> None:
+    """Grava o que ainda está na fila, para a thread e remove o handler."""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logger_app = logging.getLogger(LOGGER_APP)
+        logger_app.removeHandler(_handler)
+        logger_app.propagate = True
+        _handler = None
+
+
+def estatisticas_registro() -> Dict[str, Any]:
+    """Registros na fila e descartados por fila cheia."""
+    if _handler is None:
+        return {"ativo": False}
+    return {
+        "ativo": True,
+        "na_fila": _handler.queue.qsize(),
+        "descartados": _handler.descartados,
+        "amostragem": _taxa_amostragem,
+    }
+
+
+def iniciar_requisicao() -> Dict[str, Any]:
+    """Abre o acumulador de campos da requisição atual e sorteia se ela é amostrada."""
+    campos: Dict[str, Any] = {}
+    _campos_requisicao.set(campos)
+    _amostrada.set(_taxa_amostragem > 0 and random.random() < _taxa_amostragem)
+    return campos
+
+
+def anotar(**campos: Any) -> None:
+    """Adiciona campos ao resumo da requisição atual (nada fora de uma requisição)."""
+    acumulador = _campos_requisicao.get()
+    if acumulador is not None:
+        acumulador.update(campos)
+
+
+def contar(campo: str, quantidade: int = 1) -> None:
+    """Soma um contador no resumo da requisição atual."""
+    acumulador = _campos_requisicao.get()
+    if acumulador is not None:
+        acumulador[campo] = acumulador.get(campo, 0) + quantidade
+
+
+def detalhar() -> bool:
+    """
+    Indica se a requisição atual foi sorteada para registros DEBUG.
+
+    Use para evitar montar detalhes caros fora da amostra:
+    if detalhar(): logger.debug("...", ...)
+    """
+    return _amostrada.get()
@@ -0,0 +1,21 @@
+"""
+Utilitários para tarefas assíncronas em segundo plano.
+"""
+import asyncio
+from typing import Iterable
+
+
+async def cancelar_tarefas(tarefas: Iterable[asyncio.Task]) -> None:
+    """
+    Cancela as tarefas e aguarda as do laço atual terminarem.
+
+    Tarefas de outros laços (como o laço de fundo do caminho síncrono)
+    só são canceladas, pois não podem ser aguardadas daqui.
+    """
+    laco = asyncio.get_running_loop()
+    tarefas = list(tarefas)
+    for tarefa in tarefas:
+        tarefa.cancel()
+    locais = [t for t in tarefas if t.get_loop() is laco]
+    if locais:
+        await asyncio.gather(*locais, return_exceptions=True)
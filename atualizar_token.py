@@ -91,6 +91,19 @@ def atualizar_env(access_token, refresh_token):
     
     print("✅ .env atualizado!")
 
+def publicar_no_armazenamento(access_token, refresh_token):
+    """Grava os tokens no armazenamento compartilhado, para os workers em execução"""
+    from dotenv import load_dotenv
+    from app.services.armazenamento_tokens import criar_armazenamento
+
+    load_dotenv()
+    if os.getenv("ML_TOKEN_ARMAZENAMENTO", "memoria") == "memoria":
+        return
+
+    armazenamento = criar_armazenamento()
+    armazenamento.gravar({"access_token": access_token, "refresh_token": refresh_token, "expira_em": None})
+    print(f"✅ Tokens publicados no armazenamento '{armazenamento.tipo}' (workers em execução já os usam)")
+
 def main():
     print("🔄 Atualizar Tokens")
     print("=" * 25)
@@ -159,6 +172,7 @@ def main():
     # 4. Atualiza .env
     print("\n📝 Atualizando .env...")
     atualizar_env(access, refresh)
+    publicar_no_armazenamento(access, refresh)
     
     print("\n🎉 Tokens atualizados com sucesso!")
 
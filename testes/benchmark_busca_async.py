@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: busca síncrona (bloqueante) x assíncrona em /api/buscar
+
+Sobe um servidor falso do Mercado Livre com latência fixa e mede
+requisições/segundo de um único worker uvicorn nos dois modos.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servidor_falso_ml import iniciar_ml_falso, iniciar_servidor, porta_livre
+
+ATRASO_UPSTREAM = 0.1
+TOTAL_REQUISICOES = 400
+CONCORRENCIA = 100
+
+
+def criar_app_benchmark():
+    """App real com uma rota extra que reproduz o comportamento anterior (chamada bloqueante)."""
+    from fastapi import Depends
+    from app.main import app
+    from app.api.dependencias import obter_produtos_service
+
+    @app.get("/benchmark/bloqueante")
+    async def busca_bloqueante(q: str, limit: int = 10, produtos_service=Depends(obter_produtos_service)):
+        return produtos_service.buscar_produtos(q, limit)
+
+    return app
+
+
+async def disparar(url: str) -> float:
+    """Dispara TOTAL_REQUISICOES com CONCORRENCIA simultâneas e retorna req/s."""
+    semaforo = asyncio.Semaphore(CONCORRENCIA)
+    limites = httpx.Limits(max_connections=CONCORRENCIA)
+
+    async with httpx.AsyncClient(timeout=300, limits=limites) as cliente:
+        async def uma():
+            async with semaforo:
+                resposta = await cliente.get(url, params={"q": "iphone", "limit": 10})
+                assert resposta.status_code == 200
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(uma() for _ in range(TOTAL_REQUISICOES)))
+        return TOTAL_REQUISICOES / (time.perf_counter() - inicio)
+
+
+def main():
+    print("📊 Benchmark: /api/buscar síncrono x assíncrono")
+    print("=" * 50)
+
+    upstream, url_ml = iniciar_ml_falso(atraso=ATRASO_UPSTREAM)
+    porta_app = porta_livre()
+    app = iniciar_servidor(
+        "benchmark_busca_async:criar_app_benchmark", porta_app,
+        env={"ML_API_BASE_URL": url_ml, "ML_ACCESS_TOKEN": "token-benchmark", "ML_LIMITE_TAXA": "0"},
+        factory=True,
+    )
+    base = f"http://127.0.0.1:{porta_app}"
+
+    try:
+        print(f"Upstream com {ATRASO_UPSTREAM * 1000:.0f} ms de latência, "
+              f"{TOTAL_REQUISICOES} requisições, concorrência {CONCORRENCIA}")
+
+        antes = asyncio.run(disparar(f"{base}/benchmark/bloqueante"))
+        print(f"   Antes  (chamada bloqueante):  {antes:8.1f} req/s")
+
+        depois = asyncio.run(disparar(f"{base}/api/buscar"))
+        print(f"   Depois (httpx assíncrono):    {depois:8.1f} req/s")
+        print(f"   Ganho: {depois / antes:.1f}x")
+    finally:
+        app.terminate()
+        upstream.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tempo até o primeiro produto em /api/buscar x /api/buscar/stream
+
+Sobe o servidor falso do Mercado Livre (com cauda de latência nas
+páginas) e a aplicação real, sem cache, e mede quanto o cliente espera
+até ter o primeiro produto em mãos e até ter a resposta completa.
+"""
+
+import json
+import os
+import sys
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servidor_falso_ml import iniciar_ml_falso, iniciar_servidor, porta_livre
+
+REQUISICOES = 40
+LIMITES = (50, 200)
+UPSTREAM = dict(atraso=0.1, atraso_cauda=0.4, prob_cauda=0.25)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def medir_json(cliente: httpx.Client, base: str, limit: int) -> tuple:
+    """No JSON, o primeiro produto só existe depois do corpo inteiro."""
+    inicio = time.perf_counter()
+    resposta = cliente.get(f"{base}/api/buscar", params={"q": "iphone", "limit": limit})
+    dados = resposta.json()
+    total = time.perf_counter() - inicio
+    assert dados["total"] == limit
+    return total, total
+
+
+def medir_stream(cliente: httpx.Client, base: str, limit: int) -> tuple:
+    inicio = time.perf_counter()
+    primeiro, produtos = None, 0
+    with cliente.stream("GET", f"{base}/api/buscar/stream", params={"q": "iphone", "limit": limit}) as resposta:
+        for linha in resposta.iter_lines():
+            if not linha:
+                continue
+            item = json.loads(linha)
+            if "id" in item:
+                produtos += 1
+                if primeiro is None:
+                    primeiro = time.perf_counter() - inicio
+    assert produtos == limit
+    return primeiro, time.perf_counter() - inicio
+
+
+def main():
+    print("📊 Benchmark: tempo até o primeiro produto (JSON x NDJSON)")
+    print("=" * 60)
+
+    upstream, url_ml = iniciar_ml_falso(**UPSTREAM)
+    porta_app = porta_livre()
+    app = iniciar_servidor(
+        "app.main:app", porta_app,
+        env={"ML_API_BASE_URL": url_ml, "ML_ACCESS_TOKEN": "token-benchmark", "ML_CACHE_TTL": "0", "ML_LIMITE_TAXA": "0"},
+    )
+    base = f"http://127.0.0.1:{porta_app}"
+
+    try:
+        print(f"Upstream {UPSTREAM['atraso'] * 1000:.0f} ms por página, "
+              f"{UPSTREAM['prob_cauda']:.0%} das páginas em {UPSTREAM['atraso_cauda'] * 1000:.0f} ms; "
+              f"{REQUISICOES} buscas por modo, sem cache")
+
+        with httpx.Client(timeout=30) as cliente:
+            for limit in LIMITES:
+                print(f"\nlimit={limit}")
+                for nome, medir in (("JSON", medir_json), ("NDJSON", medir_stream)):
+                    medir(cliente, base, limit)  # aquecimento
+                    amostras = [medir(cliente, base, limit) for _ in range(REQUISICOES)]
+                    primeiros = [a[0] for a in amostras]
+                    completos = [a[1] for a in amostras]
+                    print(f"   {nome:<6} 1º produto p50 {percentil(primeiros, 50) * 1000:5.0f} ms "
+                          f"p95 {percentil(primeiros, 95) * 1000:5.0f} ms | "
+                          f"completo p50 {percentil(completos, 50) * 1000:5.0f} ms "
+                          f"p95 {percentil(completos, 95) * 1000:5.0f} ms")
+    finally:
+        app.terminate()
+        upstream.terminate()
+
+
+if __name__ == "__main__":
+    main()
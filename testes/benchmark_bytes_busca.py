@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes recebidos do Mercado Livre por busca
+
+Faz a mesma busca (50 itens, com enriquecimento dos 10 itens sem imagem
+via /items) pedindo payloads completos ou só os campos usados, e com
+respostas sem compressão, gzip ou br, e informa os bytes que chegaram
+de cada endpoint. O upstream falso responde com itens do tamanho dos
+reais (servidor_falso_ml.gerar_item_completo), aplica attributes= como
+a API e comprime conforme o Accept-Encoding.
+"""
+
+import gzip
+import json
+import os
+import sys
+from collections import Counter
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "benchmark")
+os.environ.setdefault("ML_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-benchmark")
+
+from app.services import cliente_http
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.services.selecao_campos import SelecaoCampos
+from servidor_falso_ml import gerar_item_completo, selecionar_campos
+
+ITENS = 50
+SEM_IMAGEM = range(0, ITENS, 5)
+
+
+def item_busca(indice: int) -> dict:
+    item = gerar_item_completo(indice)
+    if indice in SEM_IMAGEM:
+        del item["thumbnail"], item["pictures"]
+    return item
+
+
+def responder(request: httpx.Request):
+    """(corpo como trafega, cabeçalhos) da resposta do upstream falso."""
+    attributes = request.url.params.get("attributes")
+    if request.url.path == "/items":
+        ids = request.url.params["ids"].split(",")
+        corpo = [{"code": 200, "body": gerar_item_completo(int(i[3:]))} for i in ids]
+    else:
+        corpo = {"results": [item_busca(i) for i in range(ITENS)], "paging": {"total": ITENS}}
+    conteudo = json.dumps(selecionar_campos(corpo, attributes)).encode()
+
+    aceita = request.headers.get("Accept-Encoding", "")
+    if "br" in aceita and cliente_http.BROTLI_DISPONIVEL:
+        return cliente_http.brotli.compress(conteudo), {"Content-Encoding": "br"}
+    if "gzip" in aceita:
+        return gzip.compress(conteudo), {"Content-Encoding": "gzip"}
+    return conteudo, {}
+
+
+def medir(selecao: bool, compressao: str) -> Counter:
+    """Bytes recebidos por endpoint em uma busca."""
+    recebidos = Counter()
+
+    def contar(request):
+        conteudo, cabecalhos = responder(request)
+        recebidos[request.url.path] += len(conteudo)
+        return httpx.Response(200, content=conteudo, headers={**cabecalhos, "Content-Type": "application/json"})
+
+    servico = ProdutosMercadoLivre()
+    transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(contar))
+    transporte.aceita_compressao = compressao
+    servico.transporte = transporte
+    servico.cache = CacheBusca(ttl=0)
+    servico.selecao = servico.enriquecimento.selecao = SelecaoCampos(ativa=selecao)
+
+    resposta = servico.buscar_produtos("tenis", limit=ITENS, enriquecer=True)
+    assert resposta["total"] == ITENS and all(p["imagem"] != "Não informado" for p in resposta["produtos"])
+    assert transporte.estatisticas()["bytes_recebidos"] == sum(recebidos.values())
+    return recebidos
+
+
+def main():
+    print(f"📊 Benchmark: bytes recebidos por busca ({ITENS} itens, {len(SEM_IMAGEM)} enriquecidos)")
+    print("=" * 72)
+
+    modos = [
+        ("completo, sem compressão", False, "identity"),
+        ("completo, gzip (antes)", False, "gzip"),
+        ("campos usados, gzip", True, "gzip"),
+    ]
+    if cliente_http.BROTLI_DISPONIVEL:
+        modos.append(("campos usados, br", True, "br, gzip"))
+
+    referencia = None
+    print(f"\n   {'modo':<26} {'/products/search':>17} {'/items':>9} {'total':>9}")
+    for nome, selecao, compressao in modos:
+        recebidos = medir(selecao, compressao)
+        total = sum(recebidos.values())
+        referencia = referencia or total
+        print(f"   {nome:<26} {recebidos['/products/search'] / 1024:13.1f} KiB "
+              f"{recebidos['/items'] / 1024:5.1f} KiB {total / 1024:5.1f} KiB  {referencia / total:5.1f}x menos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: decodificação de uma página de 50 itens de /products/search
+
+Compara response.json() (json da biblioteca padrão, payload inteiro), orjson
+(payload inteiro) e decodificar_resultados (msgspec, só os campos usados na
+formatação), em tempo e no pico de memória durante a decodificação. A página
+imita uma resposta real: ~5 KB por item, dos quais a formatação lê poucos campos.
+"""
+
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import decodificador_busca
+from app.services.decodificador_busca import decodificar_resultados
+from app.services.formatador_produtos import FormatadorProdutos
+from app.utils import json_rapido
+from servidor_falso_ml import gerar_item_completo
+
+ITENS = 50
+REPETICOES = 200
+RODADAS = 9
+
+
+def pico_memoria(funcao) -> int:
+    """Pico de bytes alocados durante funcao()."""
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico
+
+
+def main():
+    print(f"📊 Benchmark: decodificação de {ITENS} itens de /products/search")
+    print("=" * 60)
+
+    conteudo = json.dumps({"results": [gerar_item_completo(i) for i in range(ITENS)]}).encode()
+
+    def stdlib():
+        return json.loads(conteudo).get("results", [])
+
+    modos = [("json stdlib (antes)", stdlib)]
+    if json_rapido.ORJSON_DISPONIVEL:
+        modos.append(("orjson, completo", lambda: json_rapido.orjson.loads(conteudo).get("results", [])))
+    if decodificador_busca.MSGSPEC_DISPONIVEL:
+        modos.append(("msgspec, só os campos", lambda: decodificar_resultados(conteudo)))
+
+    formatador = FormatadorProdutos()
+    esperado = formatador.formatar(stdlib()).produtos
+    for _, funcao in modos:
+        assert formatador.formatar(funcao()).produtos == esperado
+
+    print(f"Payload de {len(conteudo) / 1024:.0f} KiB, {REPETICOES} repetições (melhor de {RODADAS})\n")
+
+    # Alterna as medições para que ruído da máquina afete todos os modos por igual
+    tempos = {nome: [] for nome, _ in modos}
+    for _ in range(RODADAS):
+        for nome, funcao in modos:
+            tempos[nome].append(timeit.timeit(funcao, number=REPETICOES) / REPETICOES)
+
+    referencia_tempo, referencia_memoria = min(tempos[modos[0][0]]), pico_memoria(stdlib)
+    for nome, funcao in modos:
+        segundos, pico = min(tempos[nome]), pico_memoria(funcao)
+        print(f"   {nome:<24} {segundos * 1e3:7.3f} ms {referencia_tempo / segundos:5.1f}x   "
+              f"pico {pico / 1024:6.0f} KiB {referencia_memoria / pico:5.1f}x menos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: estratégias de busca principal/fallback (sequencial, paralela, hedged)
+
+Mede a latência de buscar_produtos_async (sem cache) contra o servidor
+falso do Mercado Livre em três cenários de atraso injetado.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "benchmark")
+os.environ.setdefault("ML_CLIENT_SECRET", "benchmark")
+os.environ["ML_ACCESS_TOKEN"] = "token-benchmark"
+os.environ["ML_CACHE_TTL"] = "0"
+os.environ["ML_LIMITE_TAXA"] = "0"
+
+from servidor_falso_ml import iniciar_ml_falso
+
+BUSCAS_POR_MODO = 150
+CENARIOS = [
+    ("Principal com resultados (100 ms)", dict(atraso=0.1, atraso_fallback=0.1)),
+    ("Principal vazio (100 ms) + fallback (100 ms)", dict(atraso=0.1, atraso_fallback=0.1, vazio_principal=True)),
+    ("Principal 50 ms, 4% em 1 s + fallback 80 ms", dict(atraso=0.05, atraso_fallback=0.08, atraso_cauda=1.0, prob_cauda=0.04)),
+]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+async def medir(servico) -> list:
+    # Aquecimento: conexões abertas e amostras de latência para o p95
+    for _ in range(25):
+        await servico.buscar_produtos_async("iphone", 10)
+
+    latencias = []
+    for _ in range(BUSCAS_POR_MODO):
+        inicio = time.perf_counter()
+        resultado = await servico.buscar_produtos_async("iphone", 10)
+        latencias.append(time.perf_counter() - inicio)
+        assert resultado["total"] == 10
+    return latencias
+
+
+def main():
+    print("📊 Benchmark: estratégias de busca principal/fallback")
+    print("=" * 60)
+
+    for nome, parametros in CENARIOS:
+        processo, url = iniciar_ml_falso(**parametros)
+        os.environ["ML_API_BASE_URL"] = url
+        print(f"\n{nome}")
+        try:
+            from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+
+            for modo in ("sequencial", "paralela", "hedged"):
+                servico = ProdutosMercadoLivre()
+                servico.estrategia = modo
+                latencias = asyncio.run(medir(servico))
+                media = sum(latencias) / len(latencias)
+                print(f"   {modo:<11} média {media * 1000:6.0f} ms | "
+                      f"p50 {percentil(latencias, 50) * 1000:6.0f} ms | "
+                      f"p95 {percentil(latencias, 95) * 1000:6.0f} ms | "
+                      f"p99 {percentil(latencias, 99) * 1000:6.0f} ms")
+        finally:
+            processo.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark: formatação de páginas de 50, 500 e 5.000 itens do upstream
+
+Compara a formatação item a item anterior (um método por campo, laço sobre
+as chaves e sort no final) com o FormatadorProdutos, que formata a página
+em uma passada, com a extração de cada campo em linha, e separa os
+produtos sem imagem sem ordenar. As páginas imitam respostas gravadas de
+/products/search: passam por json.dumps/json.loads e misturam itens
+completos, sem imagem, sem nome, sem id e com preço só em "prices".
+"""
+
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.formatador_produtos import FormatadorProdutos
+from servidor_falso_ml import gerar_item
+
+TAMANHOS = (50, 500, 5000)
+# Muitas rodadas curtas: o melhor tempo descarta as interrompidas por ruído da máquina
+RODADAS = 200
+MARCAS = ("Nike", "Adidas", "Olympikus", "Mizuno", "Asics", "Fila", "Puma")
+CORES = ("Preto", "Branco", "Azul", "Vermelho", "Cinza")
+
+
+def gerar_pagina(tamanho: int, semente: int = 42) -> list:
+    """Página determinística com a variedade de uma resposta real."""
+    sorteio = random.Random(semente)
+    itens = []
+    for indice in range(tamanho):
+        item = gerar_item(indice)
+        item["attributes"] = [
+            {"id": "BRAND", "name": "Marca", "value_name": sorteio.choice(MARCAS)},
+            {"id": "COLOR", "name": "Cor", "value_name": sorteio.choice(CORES)},
+            {"id": "MODEL", "name": "Modelo", "value_name": f"M{indice % 40}"},
+            {"id": "GENDER", "name": "Gênero", "value_name": "Unissex"},
+        ]
+        caso = sorteio.random()
+        if caso < 0.5:
+            item["secure_thumbnail"] = item["thumbnail"].replace("http://", "https://")
+            item["price"] = 100.0 + indice
+        elif caso < 0.6:
+            item.pop("thumbnail")
+        elif caso < 0.7:
+            del item["thumbnail"], item["pictures"]
+        elif caso < 0.75:
+            item["title"] = "  "
+        elif caso < 0.78:
+            item["id"] = None
+        elif caso < 0.85:
+            item["attributes"] = item["attributes"][:1] + [{"id": "X", "name": "Cor", "value_name": None}]
+        itens.append(item)
+    return json.loads(json.dumps(itens))
+
+
+# Implementação anterior, mantida aqui como referência
+def _imagem_antes(produto):
+    imagem = produto.get("secure_thumbnail")
+    if imagem and imagem.strip():
+        return imagem.strip()
+    imagem = produto.get("thumbnail")
+    if imagem and imagem.strip():
+        imagem = imagem.strip()
+        if imagem.startswith("http://"):
+            imagem = imagem.replace("http://", "https://", 1)
+        return imagem
+    pictures = produto.get("pictures", [])
+    if pictures and len(pictures) > 0:
+        primeira = pictures[0]
+        if isinstance(primeira, dict):
+            imagem = primeira.get("secure_url") or primeira.get("url")
+            if imagem and imagem.strip():
+                imagem = imagem.strip()
+                if imagem.startswith("http://"):
+                    imagem = imagem.replace("http://", "https://", 1)
+                return imagem
+        elif isinstance(primeira, str):
+            imagem = primeira.strip()
+            if imagem.startswith("http://"):
+                imagem = imagem.replace("http://", "https://", 1)
+            return imagem
+    return "Não informado"
+
+
+def _atributos_antes(produto, max_atributos=3):
+    atributos = []
+    for attr in produto.get("attributes", [])[:max_atributos]:
+        nome, valor = attr.get("name"), attr.get("value_name")
+        if nome and valor:
+            atributos.append({"nome": nome, "valor": valor})
+    while len(atributos) < max_atributos:
+        atributos.append({"nome": "Não informado", "valor": "Não informado"})
+    return atributos
+
+
+def formatar_antes(resultados, ordenar=True):
+    produtos = []
+    for item in resultados:
+        produto_id = item.get("id")
+        if not produto_id:
+            continue
+        nome = (item.get("title") or item.get("name") or item.get("product_name") or "").strip()
+        if not nome:
+            nome = "Não informado"
+        imagem = _imagem_antes(item)
+        buy_box = item.get("buy_box_winner") if isinstance(item.get("buy_box_winner"), dict) else {}
+        permalink = buy_box.get("permalink") or item.get("permalink") or item.get("url") or item.get("product_url")
+        if permalink and str(permalink).strip().startswith("http"):
+            url = str(permalink).strip()
+        else:
+            url = "Não informado"
+        preco = None
+        try:
+            if item.get("price"):
+                preco = float(item.get("price"))
+            elif item.get("prices") and len(item.get("prices", [])) > 0:
+                valor = item.get("prices")[0].get("amount")
+                if valor:
+                    preco = float(valor)
+        except (ValueError, TypeError):
+            preco = None
+        status = item.get("status")
+        if not status or not str(status).strip():
+            status = "unknown"
+        else:
+            status = str(status).strip().lower()
+        produtos.append({
+            "id": produto_id, "nome": nome, "status": status, "imagem": imagem,
+            "url": url, "preco": preco, "atributos": _atributos_antes(item),
+        })
+    if ordenar:
+        produtos = sorted(produtos, key=lambda p: p["imagem"] == "Não informado")
+    return produtos
+
+
+def memoria(funcao) -> int:
+    """Bytes alocados e ainda vivos no resultado de funcao()."""
+    tracemalloc.start()
+    resultado = funcao()  # noqa: F841 (mantém o resultado vivo até a medição)
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return atual
+
+
+def main():
+    print("📊 Benchmark: formatação de páginas do upstream")
+    print("=" * 60)
+
+    formatador = FormatadorProdutos()
+    for tamanho in TAMANHOS:
+        pagina = gerar_pagina(tamanho)
+        assert formatar_antes(pagina) == formatador.formatar(pagina).produtos
+
+        def antes():
+            return formatar_antes(pagina)
+
+        def depois():
+            return formatador.formatar(pagina)
+
+        numero = max(1, 2000 // tamanho)
+        # Alterna as medições para que ruído da máquina afete os dois lados por igual
+        tempos = {antes: [], depois: []}
+        for _ in range(RODADAS):
+            for funcao in tempos:
+                tempos[funcao].append(timeit.timeit(funcao, number=numero) / numero)
+        segundos_antes, segundos_depois = min(tempos[antes]), min(tempos[depois])
+
+        print(f"\n{tamanho} itens ({numero} repetições, melhor de {RODADAS})")
+        print(f"   {'item a item (antes)':<24} {segundos_antes * 1e3:8.3f} ms   "
+              f"{segundos_antes / tamanho * 1e9:6.0f} ns/item")
+        print(f"   {'FormatadorProdutos':<24} {segundos_depois * 1e3:8.3f} ms   "
+              f"{segundos_depois / tamanho * 1e9:6.0f} ns/item   {segundos_antes / segundos_depois:4.2f}x")
+        bytes_antes, bytes_depois = memoria(antes), memoria(depois)
+        print(f"   {'memória do resultado':<24} {bytes_antes / 1024:8.0f} KiB -> {bytes_depois / 1024:.0f} KiB "
+              f"({bytes_antes / bytes_depois:4.2f}x menos)")
+
+
+if __name__ == "__main__":
+    main()
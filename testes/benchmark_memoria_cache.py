@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memória de 100.000 produtos no cache de buscas
+
+Guarda 2.000 páginas de 50 produtos formatados como eram guardadas antes
+(listas de dicionários de Produto) e como o CacheBusca guarda hoje
+(ProdutoCompacto), e mede a memória que fica ocupada em cada caso. Cada
+página vem de um payload próprio decodificado do JSON, como numa busca
+real, então os textos não são compartilhados entre páginas por acaso.
+Mede também o custo de uma consulta, que agora converte 50 registros
+de volta para o formato de Produto.
+"""
+
+import gc
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from collections import OrderedDict
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache_busca import CacheBusca
+from app.services.formatador_produtos import FormatadorProdutos
+from servidor_falso_ml import gerar_item
+
+PAGINAS = 2000
+POR_PAGINA = 50
+MARCAS = ("Nike", "Adidas", "Olympikus", "Mizuno", "Asics", "Fila", "Puma")
+CORES = ("Preto", "Branco", "Azul", "Vermelho", "Cinza")
+
+
+def gerar_payload(pagina: int, sorteio: random.Random) -> bytes:
+    """Página de /products/search com atributos e dados ausentes variados."""
+    itens = []
+    for indice in range(pagina * POR_PAGINA, (pagina + 1) * POR_PAGINA):
+        item = gerar_item(indice)
+        item["attributes"] = [
+            {"name": "Marca", "value_name": sorteio.choice(MARCAS)},
+            {"name": "Cor", "value_name": sorteio.choice(CORES)},
+            {"name": "Modelo", "value_name": f"M{indice % 500}"},
+        ][:sorteio.choice((0, 2, 3, 3, 3))]
+        if sorteio.random() < 0.2:
+            del item["thumbnail"], item["pictures"]
+        itens.append(item)
+    return json.dumps({"results": itens}).encode()
+
+
+def encher(guardar) -> int:
+    """Bytes que continuam ocupados depois de guardar todas as páginas."""
+    formatador = FormatadorProdutos()
+    sorteio = random.Random(7)
+    gc.collect()
+    tracemalloc.start()
+    for pagina in range(PAGINAS):
+        resultados = json.loads(gerar_payload(pagina, sorteio))["results"]
+        guardar(f"termo {pagina}", formatador.formatar(resultados).produtos)
+        del resultados
+    gc.collect()
+    ocupado, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ocupado
+
+
+def main():
+    total = PAGINAS * POR_PAGINA
+    print(f"📊 Benchmark: memória de {total:,} produtos no cache".replace(",", "."))
+    print("=" * 60)
+
+    antes = OrderedDict()
+    bytes_antes = encher(lambda termo, produtos: antes.__setitem__(termo, produtos))
+    pagina_antes = antes["termo 0"]
+    del antes
+
+    cache = CacheBusca(ttl=3600, max_entradas=PAGINAS, max_bytes=1 << 40)
+    bytes_depois = encher(lambda termo, produtos: cache.guardar(termo, POR_PAGINA, produtos))
+    assert cache.estatisticas()["entradas"] == PAGINAS
+    assert cache.consultar("termo 0", POR_PAGINA)[0] == pagina_antes
+
+    print(f"\n   {'dicionários (antes)':<24} {bytes_antes / 2**20:7.1f} MiB   {bytes_antes / total:5.0f} bytes/produto")
+    print(f"   {'ProdutoCompacto':<24} {bytes_depois / 2**20:7.1f} MiB   {bytes_depois / total:5.0f} bytes/produto"
+          f"   {bytes_antes / bytes_depois:4.2f}x menos")
+
+    numero = 2000
+    fatiar = min(timeit.repeat(lambda: pagina_antes[:POR_PAGINA], number=numero, repeat=5)) / numero
+    consultar = min(timeit.repeat(lambda: cache.consultar("termo 0", POR_PAGINA), number=numero, repeat=5)) / numero
+    print(f"\nConsulta de {POR_PAGINA} produtos (melhor de 5)")
+    print(f"   {'fatia da lista (antes)':<24} {fatiar * 1e6:7.1f} µs")
+    print(f"   {'consultar + expandir':<24} {consultar * 1e6:7.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serialização de uma resposta de /api/buscar com 50 produtos
+
+Compara o caminho padrão do FastAPI (validação pelo response_model +
+JSONResponse) com a RespostaJSONRapida, usando json da biblioteca
+padrão e orjson.
+"""
+
+import asyncio
+import os
+import sys
+import timeit
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "benchmark")
+os.environ.setdefault("ML_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-benchmark")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.main import app
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.utils import json_rapido
+from app.utils.json_rapido import RespostaJSONRapida
+from servidor_falso_ml import gerar_item
+
+REPETICOES = 2000
+
+
+def main():
+    print("📊 Benchmark: serialização de 50 produtos")
+    print("=" * 60)
+
+    servico = ProdutosMercadoLivre()
+    produtos = servico._formatar_produtos([gerar_item(i) for i in range(50)])
+    resposta = {"total": 50, "produtos": produtos, "erro": None, "proximo_cursor": None}
+
+    rota = next(r for r in app.routes if getattr(r, "path", None) == "/api/buscar")
+    laco = asyncio.new_event_loop()
+
+    def validada():
+        conteudo = laco.run_until_complete(serialize_response(field=rota.response_field, response_content=resposta))
+        return JSONResponse(conteudo).body
+
+    def rapida_stdlib():
+        json_rapido.ORJSON_DISPONIVEL = False
+        try:
+            return RespostaJSONRapida(resposta).body
+        finally:
+            json_rapido.ORJSON_DISPONIVEL = orjson_original
+
+    def rapida():
+        return RespostaJSONRapida(resposta).body
+
+    orjson_original = json_rapido.ORJSON_DISPONIVEL
+    assert validada() == rapida_stdlib() == rapida()
+    print(f"Resposta de {len(rapida())} bytes, {REPETICOES} repetições (melhor de 5)\n")
+
+    referencia = None
+    modos = [("response_model (antes)", validada), ("rápida, json stdlib", rapida_stdlib)]
+    if orjson_original:
+        modos.append(("rápida, orjson", rapida))
+
+    for nome, funcao in modos:
+        segundos = min(timeit.repeat(funcao, number=REPETICOES, repeat=5)) / REPETICOES
+        referencia = referencia or segundos
+        print(f"   {nome:<24} {segundos * 1e6:8.1f} µs/resposta   {referencia / segundos:5.1f}x")
+
+    laco.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Servidor falso da API do Mercado Livre para benchmarks locais.
+
+Responde /products/search, /sites/MLB/search e /items (individual e
+multi-get) com dados fixos após um atraso configurável, imitando a
+latência da API real. /oauth/token renova tokens como a API real:
+cada refresh_token só pode ser usado uma vez. As buscas e o multi-get
+aceitam a seleção de campos (attributes=).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def gerar_item(indice: int) -> dict:
+    """Gera um item no formato retornado por /products/search."""
+    return {
+        "id": f"MLB{indice:09d}",
+        "title": f"Produto de teste {indice}",
+        "status": "active",
+        "thumbnail": f"http://http2.mlstatic.com/D_{indice}.jpg",
+        "pictures": [{"url": f"http://http2.mlstatic.com/D_{indice}.jpg"}],
+        "buy_box_winner": {"permalink": f"https://produto.mercadolivre.com.br/MLB-{indice}"},
+        "prices": [{"amount": 100.0 + indice}],
+        "attributes": [
+            {"name": "Marca", "value_name": "Marca teste"},
+            {"name": "Cor", "value_name": "Preto"},
+            {"name": "Modelo", "value_name": f"M{indice}"},
+        ],
+    }
+
+
+def gerar_item_completo(indice: int) -> dict:
+    """
+    Item com o tamanho e os campos de uma resposta real de /products/search
+    (atributos com "values", fotos com dimensões, descrição, configurações...),
+    dos quais a formatação usa só uma pequena parte.
+    """
+    item = gerar_item(indice)
+    # Texto e números variados por item, para a compressão ficar próxima da real
+    sorteio = random.Random(indice)
+    palavras = ("tênis", "corrida", "leve", "amortecimento", "malha", "solado", "borracha", "conforto",
+                "respirável", "esportivo", "treino", "academia", "caminhada", "original", "garantia")
+    item.update({
+        "catalog_product_id": f"MLB{indice:09d}",
+        "domain_id": "MLB-SNEAKERS",
+        "date_created": "2024-03-12T18:22:41Z",
+        "main_features": [{"text": f"Característica {n} do produto {indice}", "type": "key_value"} for n in range(4)],
+        "short_description": {"type": "plaintext", "content": " ".join(sorteio.choices(palavras, k=60))},
+        "parent_id": f"MLB{indice // 10:09d}",
+        "children_ids": [f"MLB{indice * 10 + n:09d}" for n in range(5)],
+        "settings": {
+            "listing_strategy": "catalog_required", "exclusive": False, "content": "product",
+            "with_enhanced_pictures": True, "base_site_product_id": None,
+        },
+        "quality_type": "COMPLETE",
+        "keywords": f"tenis corrida esportivo modelo {indice}",
+        "pickers": [{"picker_id": "COLOR", "picker_name": "Cor", "products": [
+            {"product_id": f"MLB{indice + n:09d}", "picker_label": f"Cor {n}", "picture_id": f"{n}-MLA"}
+            for n in range(4)
+        ]}],
+    })
+    item["pictures"] = [
+        {"id": f"{indice}-{n}-MLA", "url": f"http://http2.mlstatic.com/D_{indice}_{n}.jpg",
+         "suggested_for_picker": ["COLOR"], "max_width": sorteio.randint(500, 1200), "max_height": sorteio.randint(500, 1200),
+         "source_metadata": None, "tags": []}
+        for n in range(6)
+    ]
+    item["buy_box_winner"].update({
+        "item_id": f"MLB{indice:09d}", "category_id": "MLB23332", "seller_id": 123456 + indice,
+        "price": 100.0 + indice, "currency_id": "BRL", "sold_quantity": sorteio.randint(0, 5000),
+        "shipping": {"free_shipping": True, "mode": "me2", "tags": ["fulfillment", "mandatory_free_shipping"]},
+        "condition": "new", "listing_type_id": "gold_pro", "warranty": "Garantia de fábrica: 3 meses",
+    })
+    item["attributes"] = [
+        {"id": f"ATTR_{n}", "name": nome, "value_id": str(1000 + n), "value_name": valor,
+         "values": [{"id": str(1000 + n), "name": valor, "struct": None, "meta": {"rgb": "000000"}}],
+         "meta": {"value": True}}
+        for n, (nome, valor) in enumerate([
+            ("Marca", "Marca teste"), ("Cor", "Preto"), ("Modelo", f"M{indice}"), ("Gênero", "Unissex"),
+            ("Material", "Sintético"), ("Tamanho", "42"), ("Linha", "Corrida"), ("Origem", "Nacional"),
+        ])
+    ]
+    return item
+
+
+def selecionar_campos(corpo, attributes: str):
+    """
+    Aplica o parâmetro attributes= como a API: "results.campo" mantém só
+    esses campos de cada item das buscas; "campo" filtra cada item do /items.
+    """
+    if not attributes:
+        return corpo
+    campos = attributes.split(",")
+    if isinstance(corpo, dict) and "results" in corpo:
+        campos = [c[len("results."):] for c in campos if c.startswith("results.")]
+        return {"results": [{c: item[c] for c in campos if c in item} for item in corpo["results"]]}
+    if isinstance(corpo, list):
+        return [{**r, "body": {c: r["body"][c] for c in campos if c in r["body"]}} for r in corpo]
+    return {c: corpo[c] for c in campos if c in corpo}
+
+
+def criar_app(
+    atraso: float = 0.1,
+    atraso_fallback: float = None,
+    vazio_principal: bool = False,
+    atraso_cauda: float = 0.0,
+    prob_cauda: float = 0.0,
+) -> Starlette:
+    """
+    Cria a aplicação do servidor falso.
+
+    Args:
+        atraso: Segundos de espera antes de responder /products/search
+        atraso_fallback: Segundos de espera de /sites/MLB/search (padrão: igual a atraso)
+        vazio_principal: Se True, /products/search não retorna resultados
+        atraso_cauda: Atraso de /products/search nas respostas lentas (cauda)
+        prob_cauda: Fração das respostas de /products/search que usam atraso_cauda
+    """
+    if atraso_fallback is None:
+        atraso_fallback = atraso
+
+    async def busca(request: Request):
+        lenta = prob_cauda and random.random() < prob_cauda
+        await asyncio.sleep(atraso_cauda if lenta else atraso)
+        limite = int(request.query_params.get("limit", 10))
+        offset = int(request.query_params.get("offset", 0))
+        resultados = [] if vazio_principal else [gerar_item(i) for i in range(offset, offset + limite)]
+        return JSONResponse(selecionar_campos({"results": resultados}, request.query_params.get("attributes")))
+
+    async def busca_fallback(request: Request):
+        await asyncio.sleep(atraso_fallback)
+        limite = int(request.query_params.get("limit", 10))
+        offset = int(request.query_params.get("offset", 0))
+        resultados = [gerar_item(i) for i in range(offset, offset + limite)]
+        return JSONResponse(selecionar_campos({"results": resultados}, request.query_params.get("attributes")))
+
+    async def itens(request: Request):
+        await asyncio.sleep(atraso)
+        ids = request.query_params.get("ids", "").split(",")
+        respostas = [{"code": 200, "body": gerar_item(int(i[3:]))} for i in ids if i]
+        return JSONResponse(selecionar_campos(respostas, request.query_params.get("attributes")))
+
+    async def item(request: Request):
+        await asyncio.sleep(atraso)
+        indice = int(request.path_params["item_id"][3:])
+        return JSONResponse(gerar_item(indice))
+
+    emissao = {"refresh_valido": "refresh-1", "renovacoes": 0}
+
+    async def oauth_token(request: Request):
+        await asyncio.sleep(atraso)
+        dados = urllib.parse.parse_qs((await request.body()).decode())
+        if dados.get("refresh_token", [None])[0] != emissao["refresh_valido"]:
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        emissao["renovacoes"] += 1
+        n = emissao["renovacoes"]
+        emissao["refresh_valido"] = f"refresh-{n + 1}"
+        return JSONResponse({"access_token": f"token-{n}", "refresh_token": f"refresh-{n + 1}", "expires_in": 21600})
+
+    async def renovacoes(request: Request):
+        return JSONResponse(emissao)
+
+    return Starlette(routes=[
+        Route("/oauth/token", oauth_token, methods=["POST"]),
+        Route("/oauth/renovacoes", renovacoes),
+        Route("/products/search", busca),
+        Route("/sites/MLB/search", busca_fallback),
+        Route("/items", itens),
+        Route("/items/{item_id}", item),
+    ])
+
+
+def app_por_ambiente() -> Starlette:
+    """Cria o servidor falso a partir das variáveis FAKE_ML_* (usado com uvicorn --factory)."""
+    atraso_fallback = os.getenv("FAKE_ML_ATRASO_FALLBACK")
+    return criar_app(
+        atraso=float(os.getenv("FAKE_ML_ATRASO", "0.1")),
+        atraso_fallback=float(atraso_fallback) if atraso_fallback else None,
+        vazio_principal=os.getenv("FAKE_ML_VAZIO_PRINCIPAL") == "1",
+        atraso_cauda=float(os.getenv("FAKE_ML_ATRASO_CAUDA", "0")),
+        prob_cauda=float(os.getenv("FAKE_ML_PROB_CAUDA", "0")),
+    )
+
+
+def porta_livre() -> int:
+    """Retorna uma porta TCP livre em localhost."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(app: str, porta: int, env: dict = None, factory: bool = False) -> subprocess.Popen:
+    """
+    Inicia "modulo:app" com uvicorn em outro processo e espera ele responder.
+
+    Processos separados evitam que cliente e servidores disputem o GIL
+    e distorçam a medição.
+    """
+    ambiente = {**os.environ, **(env or {})}
+    ambiente["PYTHONPATH"] = os.pathsep.join([RAIZ, os.path.join(RAIZ, "testes")])
+    comando = [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1",
+               "--port", str(porta), "--log-level", "warning", "--no-access-log"]
+    if factory:
+        comando.append("--factory")
+
+    processo = subprocess.Popen(comando, cwd=RAIZ, env=ambiente,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{porta}/", timeout=1)
+            return processo
+        except httpx.TransportError:
+            time.sleep(0.05)
+    processo.kill()
+    raise RuntimeError(f"Servidor {app} não subiu na porta {porta}")
+
+
+def iniciar_ml_falso(**parametros) -> tuple:
+    """
+    Sobe o servidor falso em outro processo.
+
+    Aceita os mesmos parâmetros de criar_app. Retorna (processo, url_base).
+    """
+    env = {}
+    if "atraso" in parametros:
+        env["FAKE_ML_ATRASO"] = str(parametros["atraso"])
+    if parametros.get("atraso_fallback") is not None:
+        env["FAKE_ML_ATRASO_FALLBACK"] = str(parametros["atraso_fallback"])
+    if parametros.get("vazio_principal"):
+        env["FAKE_ML_VAZIO_PRINCIPAL"] = "1"
+    if parametros.get("prob_cauda"):
+        env["FAKE_ML_ATRASO_CAUDA"] = str(parametros["atraso_cauda"])
+        env["FAKE_ML_PROB_CAUDA"] = str(parametros["prob_cauda"])
+
+    porta = porta_livre()
+    processo = iniciar_servidor("servidor_falso_ml:app_por_ambiente", porta, env, factory=True)
+    return processo, f"http://127.0.0.1:{porta}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor falso da API do Mercado Livre")
+    parser.add_argument("--porta", type=int, default=8081)
+    parser.add_argument("--atraso", type=float, default=0.1)
+    args = parser.parse_args()
+    uvicorn.run(criar_app(atraso=args.atraso), host="127.0.0.1", port=args.porta)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Teste 28: Aquecimento do Cache com os Termos Mais Buscados
+"""
+
+import asyncio
+import json
+import sys
+import os
+import tempfile
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.aquecimento_cache import AquecedorCache, FrequenciaBuscas
+from app.services.cache_busca import CacheBusca, FRESCO
+from app.services.cliente_http import TransporteHTTP
+from app.services.limitador_taxa import BAIXA, prioridade_upstream
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.services.prontidao import VerificadorProntidao
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico(responder):
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=60)
+    return servico
+
+
+def test_contagem_e_arquivo():
+    """Buscas contadas por termo normalizado e somadas entre workers no mesmo arquivo"""
+    print("🧪 Teste 28: Aquecimento do Cache com os Termos Mais Buscados")
+    print("=" * 50)
+    print("\n[1/5] Testando contagem e gravação...")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "buscas.json")
+        worker_a, worker_b = FrequenciaBuscas(caminho), FrequenciaBuscas(caminho)
+        for termo in ["Tenis", "tenis ", "celular", "TÊNIS  corrida", "tênis corrida", "tenis", "x" * 200]:
+            worker_a.registrar(termo)
+        for termo in ["celular", "celular", "celular", "notebook"]:
+            worker_b.registrar(termo)
+        assert worker_a.mais_buscados(2) == ["tenis", "tênis corrida"]
+
+        worker_a.gravar()
+        worker_b.gravar()
+        with open(caminho, encoding="utf-8") as arquivo:
+            gravado = json.load(arquivo)
+        assert gravado["termos"][:2] == [["celular", 4], ["tenis", 3]]
+
+        reiniciado = FrequenciaBuscas(caminho)
+        assert reiniciado.mais_buscados(10) == ["celular", "tenis", "tênis corrida", "notebook"]
+
+    # Além de 2 * max_termos, mantém os mais buscados
+    frequencias = FrequenciaBuscas("", max_termos=2)
+    for termo in ["a", "a", "a", "b", "b", "c", "d", "e"]:
+        frequencias.registrar(termo)
+    assert len(frequencias) <= 4 and frequencias.mais_buscados(2) == ["a", "b"]
+    print(f"✅ Contagens somadas entre workers: {gravado['termos']}")
+
+
+def test_aquecimento_limitado():
+    """Termos mais buscados vão para o cache com concorrência limitada e prioridade baixa"""
+    print("\n[2/5] Testando aquecimento...")
+
+    estado = {"simultaneas": 0, "maximo": 0, "prioridades": set(), "termos": []}
+
+    async def responder(request):
+        estado["simultaneas"] += 1
+        estado["maximo"] = max(estado["maximo"], estado["simultaneas"])
+        estado["prioridades"].add(prioridade_upstream.get())
+        estado["termos"].append(request.url.params["q"])
+        await asyncio.sleep(0.01)
+        estado["simultaneas"] -= 1
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(3)]})
+
+    servico = criar_servico(responder)
+    termos = [f"termo {n}" for n in range(10)]
+    for n, termo in enumerate(termos):
+        for _ in range(10 - n):
+            servico.frequencias.registrar(termo)
+
+    async def cenario():
+        aquecedor = AquecedorCache(servico, termos=6, concorrencia=2, intervalo=0)
+        aquecedor.iniciar()
+        assert not aquecedor.concluido
+        while not aquecedor.concluido:
+            await asyncio.sleep(0.01)
+        upstream = len(estado["termos"])
+        resposta = await servico.buscar_produtos_async("Termo 0", limit=3)
+        await aquecedor.fechar()
+        return aquecedor.estado(), upstream, resposta
+
+    situacao, upstream, resposta = asyncio.run(cenario())
+    assert sorted(estado["termos"]) == termos[:6] and upstream == 6
+    assert estado["maximo"] == 2 and estado["prioridades"] == {BAIXA}
+    assert situacao["aquecidos"] == 6 and situacao["falhas"] == 0
+    assert servico.cache.consultar("termo 5", 10)[1] == FRESCO
+    assert servico.cache.consultar("termo 6", 10) == (None, None)
+
+    # A busca do usuário saiu do cache aquecido
+    assert resposta["total"] == 3 and len(estado["termos"]) == 6
+    print(f"✅ 6 termos aquecidos, no máximo {estado['maximo']} por vez, prioridade {BAIXA}")
+
+
+def test_prontidao_aguarda_aquecimento():
+    """Readiness indisponível enquanto o aquecimento do startup não termina"""
+    print("\n[3/5] Testando prontidão...")
+
+    liberar = None
+
+    async def responder(request):
+        if request.url.path == "/users/me":
+            return httpx.Response(200, json={"id": 1})
+        await liberar.wait()
+        return httpx.Response(200, json={"results": [gerar_item(1)]})
+
+    servico = criar_servico(responder)
+    servico.frequencias.registrar("tenis")
+
+    async def cenario():
+        nonlocal liberar
+        liberar = asyncio.Event()
+        aquecedor = AquecedorCache(servico, termos=5, prazo=5, intervalo=0)
+        prontidao = VerificadorProntidao(servico.auth, servico.transporte, servico, aquecimento=aquecedor)
+        aquecedor.iniciar()
+        antes = await prontidao.verificar()
+        liberar.set()
+        while not aquecedor.concluido:
+            await asyncio.sleep(0.01)
+        depois = await prontidao.verificar()
+        await aquecedor.fechar()
+        return antes, depois
+
+    antes, depois = asyncio.run(cenario())
+    assert antes["pronto"] is False and antes["verificacoes"]["aquecimento"]["restantes"] == 1
+    assert depois["pronto"] is True and depois["verificacoes"]["aquecimento"]["aquecidos"] == 1
+
+    # Sem termos contados, pronto desde o startup
+    vazio = AquecedorCache(criar_servico(responder), termos=5)
+    vazio.iniciar()
+    assert vazio.concluido
+    print(f"✅ {antes['verificacoes']['aquecimento']['motivo']} → pronto após o aquecimento")
+
+
+def test_erro_inesperado_em_um_termo():
+    """Erro que não é ErroAPI em um termo não interrompe a rodada nem a tarefa de fundo"""
+    print("\n[4/5] Testando erro inesperado...")
+
+    servico = criar_servico(lambda request: httpx.Response(200, json={"results": [gerar_item(1)]}))
+    for termo in ["tenis", "celular", "notebook"]:
+        servico.frequencias.registrar(termo)
+    aquecer = servico.aquecer
+
+    async def aquecer_com_erro(termo):
+        if termo == "celular":
+            raise KeyError("campo inesperado")
+        return await aquecer(termo)
+
+    servico.aquecer = aquecer_com_erro
+
+    async def cenario():
+        aquecedor = AquecedorCache(servico, termos=3, intervalo=60)
+        aquecedor.iniciar()
+        while not aquecedor.concluido:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        viva = all(not tarefa.done() for tarefa in aquecedor._tarefas) and len(aquecedor._tarefas) == 1
+        await aquecedor.fechar()
+        return aquecedor.estado(), viva
+
+    situacao, viva = asyncio.run(cenario())
+    assert viva
+    assert situacao["aquecidos"] == 2 and situacao["falhas"] == 1 and situacao["restantes"] == 0
+    print("✅ Termo com erro contado como falha, tarefa de fundo continua")
+
+
+def test_stream_contado_e_frescos_pulados():
+    """Buscas em fluxo entram nas contagens; termos ainda frescos no cache não vão ao upstream"""
+    print("\n[5/5] Testando buscas em fluxo e termos frescos...")
+
+    termos_upstream = []
+
+    def responder(request):
+        termos_upstream.append(request.url.params["q"])
+        if request.url.params["q"] == "nada":
+            return httpx.Response(200, json={"results": []})
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(3)]})
+
+    servico = criar_servico(responder)
+
+    async def cenario():
+        for termo, offset in [("tenis", 0), ("Tenis", 0), ("celular", 0), ("notebook", 50), ("nada", 0)]:
+            async for _ in servico.buscar_produtos_stream(termo, 10, offset=offset):
+                pass
+        contagens = servico.frequencias.mais_buscados(10)
+
+        # "tenis" e "celular" ficaram frescos no cache pelas buscas acima
+        servico.frequencias.registrar("mouse")
+        antes = len(termos_upstream)
+        aquecedor = AquecedorCache(servico, termos=3, intervalo=0)
+        await aquecedor.aquecer(servico.frequencias.mais_buscados(3))
+        return contagens, termos_upstream[antes:], aquecedor.estado()
+
+    contagens, buscados, situacao = asyncio.run(cenario())
+    assert contagens == ["tenis", "celular"]
+    assert buscados == ["mouse"]
+    assert situacao["aquecidos"] == 1 and situacao["ja_frescos"] == 2
+    print(f"✅ Contagens do fluxo: {contagens}; {situacao['ja_frescos']} termos frescos pulados")
+
+
+if __name__ == "__main__":
+    test_contagem_e_arquivo()
+    test_aquecimento_limitado()
+    test_prontidao_aguarda_aquecimento()
+    test_erro_inesperado_em_um_termo()
+    test_stream_contado_e_frescos_pulados()
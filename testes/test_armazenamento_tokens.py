@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Teste 15: Tokens Compartilhados Entre Workers
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.armazenamento_tokens import (
+    ArmazenamentoArquivo, ArmazenamentoMemoria, ArmazenamentoSQLite, ArmazenamentoTokens, criar_armazenamento,
+)
+from app.services.autenticacao_mercadolivre import AutenticacaoMercadoLivre
+from app.services.cliente_http import TransporteHTTP
+from servidor_falso_ml import iniciar_ml_falso
+
+WORKERS = 4
+
+
+def _worker(tipo, caminho, url, barreira, fila):
+    """Processo worker: espera os demais e tenta renovar o mesmo token vencido ao mesmo tempo."""
+    os.environ["ML_TOKEN_ARMAZENAMENTO"] = tipo
+    os.environ["ML_TOKEN_ARQUIVO"] = caminho
+    os.environ["ML_API_BASE_URL"] = url
+    auth = AutenticacaoMercadoLivre()
+    barreira.wait()
+    try:
+        fila.put(asyncio.run(auth.renovar_token_async("token-vencido")))
+    except Exception as e:
+        fila.put(f"erro: {e}")
+
+
+def test_arquivo_troca_atomica_e_releitura():
+    """Gravação atômica no arquivo é vista por outra instância pela mudança de mtime/inode"""
+    print("🧪 Teste 15: Tokens Compartilhados Entre Workers")
+    print("=" * 50)
+    print("\n[1/5] Testando armazenamento em arquivo...")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "tokens.json")
+        a, b = ArmazenamentoArquivo(caminho), ArmazenamentoArquivo(caminho)
+        assert b.ler() == (None, None)
+
+        versao = a.gravar({"access_token": "t1", "refresh_token": "r1", "expira_em": None})
+        assert b.ler() == (versao, {"access_token": "t1", "refresh_token": "r1", "expira_em": None})
+
+        nova = a.gravar({"access_token": "t2", "refresh_token": "r2", "expira_em": None})
+        assert nova != versao and b.ler()[1]["access_token"] == "t2"
+        assert os.listdir(pasta) == ["tokens.json"]
+
+        assert a.adquirir_trava("a") and not b.adquirir_trava("b")
+        b.liberar_trava("b")
+        assert not b.adquirir_trava("b")
+        a.liberar_trava("a")
+        assert b.adquirir_trava("b")
+        time.sleep(0.05)
+        assert a.adquirir_trava("a", duracao=0.01)
+    print("✅ Arquivo trocado atomicamente e relido por outra instância")
+
+
+def test_sqlite_versao_e_trava():
+    """SQLite incrementa a versão a cada gravação e a trava expira pelo prazo"""
+    print("\n[2/5] Testando armazenamento em SQLite...")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "tokens.db")
+        a, b = ArmazenamentoSQLite(caminho), criar_armazenamento("sqlite", caminho)
+        assert b.ler() == (None, None)
+
+        assert a.gravar({"access_token": "t1", "refresh_token": "r1", "expira_em": 1.5}) == 1
+        assert a.gravar({"access_token": "t2", "refresh_token": "r2", "expira_em": 2.5}) == 2
+        assert b.ler() == (2, {"access_token": "t2", "refresh_token": "r2", "expira_em": 2.5})
+
+        assert a.adquirir_trava("a", duracao=0.05) and not b.adquirir_trava("b")
+        time.sleep(0.1)
+        assert b.adquirir_trava("b")
+        b.liberar_trava("b")
+        assert a.adquirir_trava("a")
+        a._conexao.close()
+        b._conexao.close()
+    print("✅ Versões e trava com prazo funcionando")
+
+
+def test_sincronizacao_espacada():
+    """Buscar o token não consulta o armazenamento a cada chamada; tokens novos são lidos só uma vez"""
+    print("\n[3/5] Testando consultas ao armazenamento...")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "tokens.db")
+        armazenamento, outro_worker = ArmazenamentoSQLite(caminho), ArmazenamentoSQLite(caminho)
+        armazenamento.gravar({"access_token": "t1", "refresh_token": None, "expira_em": None})
+        os.environ["ML_TOKEN_SINCRONIZACAO"] = "0.1"
+        try:
+            auth = AutenticacaoMercadoLivre(armazenamento)
+        finally:
+            del os.environ["ML_TOKEN_SINCRONIZACAO"]
+
+        consultas = {"ler": 0, "versao": 0}
+        for nome in consultas:
+            original = getattr(armazenamento, nome)
+
+            def contar(original=original, nome=nome):
+                consultas[nome] += 1
+                return original()
+
+            setattr(armazenamento, nome, contar)
+
+        tokens = [auth.obter_access_token() for _ in range(1000)]
+        assert set(tokens) == {"t1"}
+        assert consultas["ler"] == 0 and consultas["versao"] <= 1
+
+        outro_worker.gravar({"access_token": "t2", "refresh_token": None, "expira_em": None})
+        time.sleep(0.15)
+        assert [auth.obter_access_token() for _ in range(1000)] == ["t2"] * 1000
+        assert consultas["ler"] == 1 and consultas["versao"] <= 2
+        armazenamento._conexao.close()
+        outro_worker._conexao.close()
+    print(f"✅ 2000 tokens com {consultas['versao']} consultas de versão e {consultas['ler']} leitura")
+
+
+class ArmazenamentoLento(ArmazenamentoMemoria):
+    """Armazenamento em que cada operação bloqueia como um disco ou SQLite ocupado."""
+
+    def ler(self):
+        time.sleep(0.1)
+        return super().ler()
+
+    def gravar(self, dados):
+        time.sleep(0.1)
+        return super().gravar(dados)
+
+    def adquirir_trava(self, dono, duracao=30.0):
+        time.sleep(0.1)
+        return super().adquirir_trava(dono, duracao)
+
+    def liberar_trava(self, dono):
+        time.sleep(0.1)
+        super().liberar_trava(dono)
+
+
+def test_armazenamento_fora_do_laco():
+    """A interface é abstrata e a renovação não bloqueia o laço de eventos com E/S do armazenamento"""
+    print("\n[4/5] Testando armazenamento fora do laço de eventos...")
+
+    try:
+        ArmazenamentoTokens()
+        assert False, "Interface instanciada"
+    except TypeError:
+        pass
+
+    def responder(request):
+        return httpx.Response(200, json={"access_token": "novo", "refresh_token": "r2", "expires_in": 600})
+
+    auth = AutenticacaoMercadoLivre(
+        ArmazenamentoLento(), transporte=TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    )
+    auth.refresh_token = "r1"
+
+    async def cenario():
+        intervalos, fim = [], False
+
+        async def relogio():
+            anterior = time.monotonic()
+            while not fim:
+                await asyncio.sleep(0.005)
+                agora = time.monotonic()
+                intervalos.append(agora - anterior)
+                anterior = agora
+
+        tarefa = asyncio.create_task(relogio())
+        token = await auth.renovar_token_async()
+        fim = True
+        await tarefa
+        return token, max(intervalos)
+
+    token, maior_pausa = asyncio.run(cenario())
+    assert token == "novo"
+    assert maior_pausa < 0.08, maior_pausa
+    print(f"✅ Renovação com armazenamento lento, maior pausa do laço {maior_pausa * 1000:.0f} ms")
+
+
+def test_workers_compartilham_uma_renovacao():
+    """Vários processos renovando juntos gastam o refresh_token uma vez e veem o mesmo token"""
+    print("\n[5/5] Testando renovação entre processos...")
+
+    processo_ml, url = iniciar_ml_falso(atraso=0.1)
+    contexto = multiprocessing.get_context("spawn")
+    try:
+        for tipo, arquivo in (("arquivo", "tokens.json"), ("sqlite", "tokens.db")):
+            with tempfile.TemporaryDirectory() as pasta:
+                caminho = os.path.join(pasta, arquivo)
+                emissao = httpx.get(f"{url}/oauth/renovacoes").json()
+                armazenamento = criar_armazenamento(tipo, caminho)
+                armazenamento.gravar({
+                    "access_token": "token-vencido", "refresh_token": emissao["refresh_valido"], "expira_em": None,
+                })
+
+                # Worker já em execução antes da renovação, neste processo
+                os.environ["ML_TOKEN_SINCRONIZACAO"] = "0.1"
+                try:
+                    principal = AutenticacaoMercadoLivre(armazenamento)
+                finally:
+                    del os.environ["ML_TOKEN_SINCRONIZACAO"]
+                assert principal.obter_access_token() == "token-vencido"
+
+                antes = emissao["renovacoes"]
+                barreira, fila = contexto.Barrier(WORKERS), contexto.Queue()
+                processos = [
+                    contexto.Process(target=_worker, args=(tipo, caminho, url, barreira, fila))
+                    for _ in range(WORKERS)
+                ]
+                for p in processos:
+                    p.start()
+                tokens = [fila.get(timeout=60) for _ in processos]
+                for p in processos:
+                    p.join(timeout=10)
+
+                depois = httpx.get(f"{url}/oauth/renovacoes").json()["renovacoes"]
+                assert depois - antes == 1, tokens
+                assert len(set(tokens)) == 1 and tokens[0].startswith("token-"), tokens
+                time.sleep(0.1)
+                assert principal.obter_access_token() == tokens[0]
+                print(f"✅ {tipo}: {WORKERS} workers, 1 renovação, token visto sem reiniciar")
+                if tipo == "sqlite":
+                    armazenamento._conexao.close()
+    finally:
+        processo_ml.terminate()
+
+
+if __name__ == "__main__":
+    test_arquivo_troca_atomica_e_releitura()
+    test_sqlite_versao_e_trava()
+    test_sincronizacao_espacada()
+    test_armazenamento_fora_do_laco()
+    test_workers_compartilham_uma_renovacao()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Teste 12: Busca em Fluxo NDJSON
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico(atraso_primeira=0.0, atraso_demais=0.0, total=1000, status=200):
+    """Upstream simulado em que a primeira página e as seguintes têm atrasos diferentes."""
+    async def responder(request):
+        offset = int(request.url.params.get("offset", 0))
+        limite = int(request.url.params["limit"])
+        await asyncio.sleep(atraso_primeira if offset == 0 else atraso_demais)
+        if status != 200:
+            return httpx.Response(status)
+        itens = [gerar_item(i) for i in range(offset, min(total, offset + limite))]
+        return httpx.Response(200, json={"results": itens})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=0)
+    return servico
+
+
+async def coletar(servico, termo, limit, **kwargs):
+    """Retorna (itens, segundos até o primeiro item)."""
+    inicio = time.perf_counter()
+    itens, primeiro = [], None
+    async for item in servico.buscar_produtos_stream(termo, limit, **kwargs):
+        if primeiro is None:
+            primeiro = time.perf_counter() - inicio
+        itens.append(item)
+    return itens, primeiro
+
+
+def test_produtos_antes_das_paginas_lentas():
+    """Produtos da primeira página saem antes das páginas seguintes chegarem"""
+    print("🧪 Teste 12: Busca em Fluxo NDJSON")
+    print("=" * 50)
+    print("\n[1/3] Testando tempo até o primeiro produto...")
+
+    servico = criar_servico(atraso_primeira=0.05, atraso_demais=0.5)
+    itens, primeiro = asyncio.run(coletar(servico, "tenis", 150))
+
+    produtos, resumo = itens[:-1], itens[-1]
+    assert primeiro < 0.3
+    assert len(produtos) == 150
+    assert len({p["id"] for p in produtos}) == 150
+    assert resumo["total"] == 150 and resumo["erro"] is None and resumo["proximo_cursor"]
+    print(f"✅ Primeiro produto em {primeiro * 1000:.0f} ms")
+
+
+def test_erro_no_resumo():
+    """Falhas do upstream e buscas sem resultado chegam no resumo final"""
+    print("\n[2/3] Testando erros no resumo...")
+
+    itens, _ = asyncio.run(coletar(criar_servico(status=500), "tenis", 10))
+    assert len(itens) == 1 and itens[0]["erro"]
+
+    itens, _ = asyncio.run(coletar(criar_servico(total=0), "tenis", 10))
+    assert itens == [{"total": 0, "erro": itens[0]["erro"], "proximo_cursor": None}]
+    assert "Nenhum produto encontrado" in itens[0]["erro"]
+
+    itens, _ = asyncio.run(coletar(criar_servico(), "   ", 10))
+    assert itens[0]["erro"] == "O termo de busca não pode estar vazio."
+    print("✅ Erros entregues no resumo")
+
+
+def test_rota_ndjson():
+    """A rota responde application/x-ndjson com um JSON por linha"""
+    print("\n[3/3] Testando rota /api/buscar/stream...")
+
+    from app.main import app
+    from app.api.dependencias import obter_produtos_service
+
+    servico = criar_servico()
+    app.dependency_overrides[obter_produtos_service] = lambda: servico
+    try:
+        resposta = TestClient(app).get("/api/buscar/stream", params={"q": "tenis", "limit": 60})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(l) for l in resposta.text.splitlines()]
+    assert len(linhas) == 61
+    assert linhas[0]["id"] == gerar_item(0)["id"]
+    assert linhas[-1]["total"] == 60
+    print(f"✅ {len(linhas)} linhas NDJSON")
+
+
+if __name__ == "__main__":
+    test_produtos_antes_das_paginas_lentas()
+    test_erro_no_resumo()
+    test_rota_ndjson()
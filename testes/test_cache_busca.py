@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Teste 7: Cache de Resultados de Busca
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.cache_busca import CacheBusca, FRESCO, VELHO, VENCIDO
+from app.services.cliente_http import TransporteHTTP
+from app.services.formatador_produtos import FormatadorProdutos
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.utils.etapas import iniciar_etapas
+from app.utils.registro import iniciar_requisicao
+from servidor_falso_ml import gerar_item
+
+
+def produtos(n):
+    return [
+        {"id": f"MLB{i}", "nome": f"Produto {i}", "status": "active", "imagem": "", "url": "", "preco": None, "atributos": []}
+        for i in range(n)
+    ]
+
+
+def test_fatia_e_normalizacao():
+    """Entrada buscada com limite maior atende limites menores e termos equivalentes"""
+    print("🧪 Teste 7: Cache de Resultados de Busca")
+    print("=" * 50)
+    print("\n[1/6] Testando fatia e normalização...")
+
+    cache = CacheBusca(ttl=60, max_entradas=10, max_bytes=10**6)
+    cache.guardar("iPhone  15", 50, produtos(50))
+
+    assert len(cache.consultar("  iphone 15 ", 10)[0]) == 10
+    assert cache.consultar("iphone 15", 50)[0][-1]["id"] == "MLB49"
+    assert cache.consultar("iphone 15", 50, site_id="MLA") == (None, None)
+    assert cache.estatisticas()["acertos"] == 2
+    assert cache.estatisticas()["falhas"] == 1
+    print("✅ Fatias e termos normalizados atendidos pelo cache")
+
+
+def test_ttl_e_lru():
+    """Entradas expiram pelo TTL e as menos usadas são descartadas primeiro"""
+    print("\n[2/6] Testando TTL, idade das entradas e LRU...")
+
+    cache = CacheBusca(ttl=0.2, max_entradas=2, max_bytes=10**6, janela_revalidacao=0.2, janela_erro=0.4)
+    cache.guardar("a", 10, produtos(1))
+    cache.guardar("b", 10, produtos(1))
+    cache.consultar("a", 10)
+    cache.guardar("c", 10, produtos(1))
+
+    assert cache.consultar("b", 10) == (None, None)
+    assert cache.consultar("a", 10)[1] == FRESCO
+    assert cache.estatisticas()["descartes"] == 1
+
+    time.sleep(0.25)
+    assert cache.consultar("a", 10)[1] == VELHO
+    time.sleep(0.2)
+    assert cache.consultar("a", 10)[1] == VENCIDO
+    time.sleep(0.2)
+    assert cache.consultar("a", 10) == (None, None)
+    assert cache.estatisticas()["expiradas"] == 1
+    print("✅ TTL e descarte LRU funcionando")
+
+
+def test_limite_de_bytes():
+    """O tamanho estimado total nunca passa de max_bytes"""
+    print("\n[3/6] Testando limite de bytes...")
+
+    cache = CacheBusca(ttl=60, max_entradas=100, max_bytes=3000)
+    for termo in ["a", "b", "c", "d", "e"]:
+        cache.guardar(termo, 20, produtos(20))
+
+    estatisticas = cache.estatisticas()
+    assert estatisticas["bytes"] <= 3000
+    assert estatisticas["descartes"] >= 1
+
+    # A estimativa (sem serializar) fica próxima do tamanho real em JSON
+    formatados = FormatadorProdutos().formatar([gerar_item(i) for i in range(50)]).produtos
+    cache.limpar()
+    cache.max_bytes = 10**6
+    cache.guardar("tenis", 50, formatados)
+    real = len(json.dumps(formatados, ensure_ascii=False))
+    assert abs(cache.estatisticas()["bytes"] - real) <= real * 0.1
+    print(f"✅ {estatisticas['entradas']} entradas em {estatisticas['bytes']} bytes")
+
+
+def test_servico_consulta_upstream_uma_vez():
+    """Buscas repetidas do mesmo termo vão ao upstream só uma vez"""
+    print("\n[4/6] Testando cache no serviço...")
+
+    chamadas = []
+
+    def responder(request):
+        chamadas.append(dict(request.url.params))
+        limite = int(request.url.params["limit"])
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(limite)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=60, limite_minimo=50)
+
+    async def buscar():
+        primeira = await servico.buscar_produtos_async("Mochila", 10)
+        segunda = await servico.buscar_produtos_async("mochila", 5)
+        return primeira, segunda
+
+    primeira, segunda = asyncio.run(buscar())
+
+    assert len(chamadas) == 1
+    assert chamadas[0]["limit"] == "50"
+    assert primeira["total"] == 10
+    assert segunda["produtos"] == primeira["produtos"][:5]
+    print("✅ Segunda busca servida do cache")
+
+
+def test_revalidacao_e_erro_do_upstream():
+    """Entradas velhas voltam na hora e são revalidadas; vencidas cobrem falhas do upstream"""
+    print("\n[5/6] Testando stale-while-revalidate e stale-if-error...")
+
+    chamadas = 0
+    falhar = False
+
+    async def responder(request):
+        nonlocal chamadas
+        chamadas += 1
+        await asyncio.sleep(0.2)
+        if falhar:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(10)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=0.3, janela_revalidacao=0.5, janela_erro=60)
+
+    async def cenario():
+        nonlocal falhar
+        await servico.buscar_produtos_async("carregador", 10)
+
+        await asyncio.sleep(0.35)
+        campos, etapas = iniciar_requisicao(), iniciar_etapas()
+        inicio = time.perf_counter()
+        velha = await servico.buscar_produtos_async("carregador", 10)
+        assert time.perf_counter() - inicio < 0.1
+        assert velha["total"] == 10
+        await asyncio.sleep(0.3)
+        assert chamadas == 2
+
+        # A revalidação não soma chamadas, status nem tempos no resumo da requisição que a disparou
+        assert campos["cache_velhos"] == 1
+        assert not {"upstream_chamadas", "status_principal"} & set(campos) and "upstream" not in etapas
+
+        falhar = True
+        await asyncio.sleep(0.9)
+        return await servico.buscar_produtos_async("carregador", 10)
+
+    vencida = asyncio.run(cenario())
+
+    assert vencida["total"] == 10 and vencida.get("erro") is None
+    estatisticas = servico.estatisticas()["revalidacao"]
+    assert estatisticas["em_segundo_plano"] == 1
+    assert estatisticas["servidos_vencidos_em_erro"] == 1
+    print("✅ Resposta velha imediata, revalidação e fallback em erro funcionando")
+
+
+def test_item_malformado():
+    """Item que quebra a formatação vira erro tratado, sem ir para o cache"""
+    print("\n[6/6] Testando item malformado...")
+
+    def responder(request):
+        return httpx.Response(200, json={"results": [{"id": "MLB1", "title": "x", "attributes": ["Marca"]}]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=60)
+
+    resposta = servico.buscar_produtos("tenis", 10)
+    assert resposta["erro"] == "Erro inesperado ao buscar produtos."
+    assert servico.cache.estatisticas()["entradas"] == 0
+    print("✅ Erro tratado em vez de exceção")
+
+
+if __name__ == "__main__":
+    test_fatia_e_normalizacao()
+    test_ttl_e_lru()
+    test_limite_de_bytes()
+    test_servico_consulta_upstream_uma_vez()
+    test_revalidacao_e_erro_do_upstream()
+    test_item_malformado()
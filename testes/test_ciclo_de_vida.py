@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Teste 16: Ciclo de Vida e Injeção de Dependências
+"""
+
+import os
+import subprocess
+import sys
+
+import httpx
+
+# Adiciona pasta raiz ao path
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from servidor_falso_ml import gerar_item
+
+
+def test_importacao_sem_efeitos():
+    """Importar a aplicação não cria serviços nem exige credenciais"""
+    print("🧪 Teste 16: Ciclo de Vida e Injeção de Dependências")
+    print("=" * 50)
+    print("\n[1/2] Testando importação sem efeitos colaterais...")
+
+    ambiente = {k: v for k, v in os.environ.items() if not k.startswith("ML_")}
+    codigo = "import app.main as m; assert not hasattr(m.app.state, 'servicos'); print('ok')"
+    resultado = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, env=ambiente, capture_output=True, text=True, timeout=60
+    )
+
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.strip() == "ok"
+    print("✅ app.main importado sem ML_CLIENT_ID e sem instanciar serviços")
+
+
+def test_instancias_compartilhadas_e_encerradas():
+    """Rotas recebem as mesmas instâncias, encerradas no shutdown"""
+    print("\n[2/2] Testando instâncias únicas e encerramento...")
+
+    def responder(request):
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(5)]})
+
+    with TestClient(app) as cliente:
+        servicos = app.state.servicos
+        servicos.transporte._transporte_interno = httpx.MockTransport(responder)
+
+        assert servicos.produtos.auth is servicos.auth
+        assert servicos.produtos.transporte is servicos.transporte is servicos.auth.transporte
+
+        assert cliente.get("/api/buscar", params={"q": "tenis", "limit": 5}).json()["total"] == 5
+        assert servicos.produtos.buscar_produtos("tenis", 5)["total"] == 5
+        assert cliente.get("/api/saude/conexoes").json()["requisicoes"] == 1
+        assert cliente.get("/api/saude/busca").json()["cache"]["acertos"] == 1
+
+        thread_fundo = servicos.transporte._thread_fundo
+        assert thread_fundo.is_alive()
+
+    assert servicos.transporte._laco_fundo is None
+    assert not thread_fundo.is_alive()
+    assert len(servicos.transporte._clientes) == 0
+    print("✅ Um transporte, um token e um cache por processo; tudo fechado no shutdown")
+
+
+if __name__ == "__main__":
+    test_importacao_sem_efeitos()
+    test_instancias_compartilhadas_e_encerradas()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Teste 8: Coalescência de Buscas Simultâneas
+"""
+
+import asyncio
+import sys
+import os
+import threading
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.coalescencia import Coalescencia
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from servidor_falso_ml import gerar_item
+
+
+def test_buscas_identicas_simultaneas():
+    """Buscas idênticas simultâneas (assíncronas e síncronas) geram uma requisição"""
+    print("🧪 Teste 8: Coalescência de Buscas Simultâneas")
+    print("=" * 50)
+    print("\n[1/3] Testando buscas simultâneas no serviço...")
+
+    chamadas = 0
+
+    async def responder(request):
+        nonlocal chamadas
+        chamadas += 1
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(10)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+
+    resultados_sync = []
+    threads = [
+        threading.Thread(target=lambda: resultados_sync.append(servico.buscar_produtos("promo", 10)))
+        for _ in range(3)
+    ]
+
+    async def buscar():
+        for t in threads:
+            t.start()
+        return await asyncio.gather(*(servico.buscar_produtos_async("Promo", 10) for _ in range(20)))
+
+    resultados = asyncio.run(buscar())
+    for t in threads:
+        t.join()
+
+    assert chamadas == 1
+    assert all(r["total"] == 10 for r in resultados + resultados_sync)
+    assert servico.coalescencia.estatisticas()["coalescidas"] == 22
+    print("✅ 23 buscas atendidas por 1 requisição")
+
+
+def test_cancelamento_do_primeiro():
+    """Cancelar quem disparou a execução não afeta quem está aguardando"""
+    print("\n[2/3] Testando cancelamento de quem disparou...")
+
+    coalescencia = Coalescencia()
+
+    async def lento():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def cenario():
+        primeiro = asyncio.create_task(coalescencia.executar("k", lento))
+        await asyncio.sleep(0)
+        segundo = asyncio.create_task(coalescencia.executar("k", lento))
+        await asyncio.sleep(0)
+        primeiro.cancel()
+        return await segundo
+
+    assert asyncio.run(cenario()) == "ok"
+    assert coalescencia.estatisticas()["execucoes"] == 1
+    print("✅ Resultado entregue mesmo após cancelamento")
+
+
+def test_erro_compartilhado():
+    """Erros também são entregues a todas as chamadas coalescidas"""
+    print("\n[3/3] Testando propagação de erro...")
+
+    coalescencia = Coalescencia()
+
+    async def falha():
+        await asyncio.sleep(0.01)
+        raise ValueError("falhou")
+
+    async def cenario():
+        return await asyncio.gather(
+            *(coalescencia.executar("k", falha) for _ in range(5)), return_exceptions=True
+        )
+
+    erros = asyncio.run(cenario())
+    assert all(isinstance(e, ValueError) for e in erros)
+    assert coalescencia.estatisticas() == {"execucoes": 1, "coalescidas": 4, "em_voo": 0}
+    print("✅ Erro propagado para todas as chamadas")
+
+
+if __name__ == "__main__":
+    test_buscas_identicas_simultaneas()
+    test_cancelamento_do_primeiro()
+    test_erro_compartilhado()
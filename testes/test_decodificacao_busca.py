@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Teste 25: Decodificação Parcial das Respostas de Busca
+"""
+
+import json
+import sys
+import os
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services import decodificador_busca
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.decodificador_busca import decodificar_resultados
+from app.services.formatador_produtos import FormatadorProdutos
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from servidor_falso_ml import gerar_item_completo
+
+
+def formatar(resultados):
+    return FormatadorProdutos().formatar(resultados).produtos
+
+
+def test_so_campos_usados():
+    """Itens decodificados só com os campos da formatação, com o mesmo resultado formatado"""
+    print("🧪 Teste 25: Decodificação Parcial das Respostas de Busca")
+    print("=" * 50)
+    print("\n[1/3] Testando campos decodificados...")
+
+    itens = [gerar_item_completo(i) for i in range(20)]
+    itens[3]["buy_box_winner"] = None
+    itens[4]["pictures"] = [None, "http://img/4.jpg"]
+    del itens[5]["id"]
+    conteudo = json.dumps({"results": itens, "paging": {"total": 20}}).encode()
+
+    resultados = decodificar_resultados(conteudo)
+    assert formatar(resultados) == formatar(json.loads(conteudo)["results"])
+
+    if decodificador_busca.MSGSPEC_DISPONIVEL:
+        assert "short_description" not in resultados[0] and "pickers" not in resultados[0]
+        assert set(resultados[0]["attributes"][0]) == {"name", "value_name"}
+        assert set(resultados[0]["buy_box_winner"]) == {"permalink"}
+
+    assert decodificar_resultados(b'{"paging": {}}') == []
+    assert decodificar_resultados(b'{"results": null}') == []
+    print(f"✅ {len(resultados)} itens, {len(resultados[0])} campos cada")
+
+
+def test_fora_do_schema():
+    """Tipos inesperados caem na decodificação completa; JSON inválido levanta o erro de sempre"""
+    print("\n[2/3] Testando payloads fora do formato...")
+
+    estranho = {"results": [
+        {"id": "A", "title": "T", "buy_box_winner": "texto", "attributes": {"name": "Marca"}, "price": "10"},
+    ]}
+    conteudo = json.dumps(estranho).encode()
+    assert decodificar_resultados(conteudo) == estranho["results"]
+
+    for invalido in (b"<html>erro</html>", b'{"results": ['):
+        try:
+            decodificar_resultados(invalido)
+        except json.JSONDecodeError:
+            pass
+        else:
+            raise AssertionError("JSON inválido deveria levantar JSONDecodeError")
+
+    original = decodificador_busca._decodificador
+    decodificador_busca._decodificador = None
+    try:
+        assert decodificar_resultados(conteudo) == estranho["results"]
+    finally:
+        decodificador_busca._decodificador = original
+    print("✅ Decodificação completa nos casos fora do schema e sem msgspec")
+
+
+def test_busca_com_payload_completo():
+    """A busca formata itens completos do principal e do fallback"""
+    print("\n[3/3] Testando a busca...")
+
+    def responder(request):
+        if request.url.params["q"] == "raro" and request.url.path == "/products/search":
+            return httpx.Response(200, json={"results": []})
+        return httpx.Response(200, json={"results": [gerar_item_completo(i) for i in range(5)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=0)
+
+    for termo in ("tenis", "raro"):
+        resposta = servico.buscar_produtos(termo, limit=5)
+        assert resposta["total"] == 5, resposta
+        assert resposta["produtos"] == formatar([gerar_item_completo(i) for i in range(5)])
+    print("✅ Principal e fallback formatados a partir da decodificação parcial")
+
+
+if __name__ == "__main__":
+    test_so_campos_usados()
+    test_fora_do_schema()
+    test_busca_com_payload_completo()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Teste 18: Disjuntor por Endpoint
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.disjuntor import ABERTO, FECHADO, MEIO_ABERTO, Disjuntor
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.services.retentativas import PoliticaRetentativa
+from app.utils.erros import ErroCircuitoAberto
+from servidor_falso_ml import gerar_item
+
+MENSAGEM_ABERTO = "A API do Mercado Livre está instável no momento. Tente novamente em instantes."
+
+
+def criar_servico(estado, cache=None, **limites):
+    """
+    Upstream controlado por estado: {"principal": status, "fallback": status, "atraso": s}.
+    Conta as chamadas por endpoint em estado["chamadas"].
+    """
+    estado.setdefault("chamadas", {"principal": 0, "fallback": 0})
+
+    async def responder(request):
+        endpoint = "principal" if request.url.path == "/products/search" else "fallback"
+        estado["chamadas"][endpoint] += 1
+        await asyncio.sleep(estado.get("atraso", 0))
+        if estado[endpoint] != 200:
+            return httpx.Response(estado[endpoint])
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(5)]})
+
+    servico = ProdutosMercadoLivre()
+    # Sem novas tentativas: cada busca é uma chamada por endpoint
+    servico.transporte = TransporteHTTP(
+        transporte_interno=httpx.MockTransport(responder), retentativas=PoliticaRetentativa(maximo=0)
+    )
+    servico.cache = cache or CacheBusca(ttl=0)
+    servico.disjuntores = {nome: Disjuntor(nome, **limites) for nome in ("principal", "fallback")}
+    return servico
+
+
+def test_abre_apos_falhas_seguidas():
+    """Após N falhas seguidas o principal abre e a busca falha na hora"""
+    print("🧪 Teste 18: Disjuntor por Endpoint")
+    print("=" * 50)
+    print("\n[1/5] Testando abertura por falhas...")
+
+    estado = {"principal": 500, "fallback": 500}
+    servico = criar_servico(estado, limite_falhas=3, tempo_aberto=60)
+
+    for _ in range(3):
+        assert servico.buscar_produtos("tenis", 5)["erro"]
+    assert servico.estado_circuitos()["principal"] == ABERTO
+
+    inicio = time.perf_counter()
+    resposta = servico.buscar_produtos("tenis", 5)
+    decorrido = time.perf_counter() - inicio
+    assert resposta["erro"] == MENSAGEM_ABERTO
+    assert decorrido < 0.1
+    # Com o principal aberto, vai direto ao fallback (que também falha)
+    assert estado["chamadas"] == {"principal": 3, "fallback": 1}
+    estatisticas = servico.estatisticas()["circuitos"]["principal"]
+    assert estatisticas["aberturas"] == 1 and estatisticas["recusadas"] == 1
+
+    # Na rota, o circuito aberto sai com status 503 e o corpo de sempre
+    from app.main import app
+    from app.api.dependencias import obter_produtos_service
+
+    app.dependency_overrides[obter_produtos_service] = lambda: servico
+    try:
+        rota = TestClient(app).get("/api/buscar", params={"q": "tenis", "limit": 5})
+    finally:
+        app.dependency_overrides.clear()
+    assert rota.status_code == 503
+    assert rota.json() == {"total": 0, "produtos": [], "erro": MENSAGEM_ABERTO, "proximo_cursor": None}
+    print(f"✅ Recusada em {decorrido * 1000:.1f} ms após abrir, rota com 503")
+
+
+def test_fallback_e_cache_com_circuito_aberto():
+    """Com o principal aberto, o fallback atende; sem ele, o cache vencido é servido"""
+    print("\n[2/5] Testando fallback e cache vencido...")
+
+    estado = {"principal": 200, "fallback": 200}
+    servico = criar_servico(estado, cache=CacheBusca(ttl=0.05, janela_revalidacao=0, janela_erro=60), limite_falhas=1)
+    assert servico.buscar_produtos("tenis", 5)["total"] == 5
+
+    estado["principal"] = 503
+    time.sleep(0.1)
+    assert servico.buscar_produtos("bola", 5)["erro"]
+    assert servico.estado_circuitos()["principal"] == ABERTO
+
+    assert servico.buscar_produtos("camisa", 5)["total"] == 5
+    assert estado["chamadas"]["fallback"] == 1
+
+    estado["fallback"] = 503
+    assert servico.buscar_produtos("tenis", 5)["total"] == 5
+    assert servico.estatisticas()["revalidacao"]["servidos_vencidos_em_erro"] == 1
+    print(f"✅ Chamadas: {estado['chamadas']}")
+
+
+def test_meio_aberto_com_sonda():
+    """Depois do tempo aberto, uma sonda passa; sucesso fecha, falha reabre"""
+    print("\n[3/5] Testando meio-aberto...")
+
+    disjuntor = Disjuntor("teste", limite_falhas=1, tempo_aberto=0.1, sondas=1)
+    with disjuntor.chamada() as chamada:
+        chamada.falhou = True
+    assert disjuntor.estado == ABERTO
+
+    time.sleep(0.12)
+    assert disjuntor.estado == MEIO_ABERTO
+    sonda = disjuntor.chamada()
+    try:
+        disjuntor.chamada()
+        raise AssertionError("esperava ErroCircuitoAberto para a segunda sonda")
+    except ErroCircuitoAberto:
+        pass
+    with sonda:
+        pass
+    assert disjuntor.estado == FECHADO
+
+    with disjuntor.chamada() as chamada:
+        chamada.falhou = True
+    time.sleep(0.12)
+    with disjuntor.chamada() as chamada:
+        chamada.falhou = True
+    assert disjuntor.estado == ABERTO and disjuntor.estatisticas()["aberturas"] == 3
+    print("✅ fechado → aberto → meio-aberto → fechado → aberto → meio-aberto → aberto")
+
+
+def test_abre_por_latencia():
+    """Respostas acima do limite de latência contam como falha"""
+    print("\n[4/5] Testando abertura por latência...")
+
+    estado = {"principal": 200, "fallback": 200, "atraso": 0.06}
+    servico = criar_servico(estado, limite_falhas=2, limite_latencia=0.03, tempo_aberto=60)
+
+    assert servico.buscar_produtos("tenis", 5)["total"] == 5
+    assert servico.buscar_produtos("bola", 5)["total"] == 5
+    estatisticas = servico.estatisticas()["circuitos"]["principal"]
+    assert estatisticas["estado"] == ABERTO and estatisticas["respostas_lentas"] == 2
+    print(f"✅ Aberto após {estatisticas['respostas_lentas']} respostas lentas")
+
+
+def test_saude_mostra_circuitos():
+    """/api/saude expõe o estado dos circuitos e fica degradado com um aberto"""
+    print("\n[5/5] Testando /api/saude...")
+
+    from app.main import app
+    from app.api.dependencias import obter_produtos_service
+
+    servico = criar_servico({"principal": 500, "fallback": 200}, limite_falhas=1)
+    app.dependency_overrides[obter_produtos_service] = lambda: servico
+    try:
+        cliente = TestClient(app)
+        assert cliente.get("/api/saude").json()["status"] == "saudavel"
+        servico.buscar_produtos("tenis", 5)
+        saude = cliente.get("/api/saude").json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert saude["status"] == "degradado"
+    assert saude["circuitos"] == {"principal": ABERTO, "fallback": FECHADO}
+    print(f"✅ {saude['circuitos']}")
+
+
+if __name__ == "__main__":
+    test_abre_apos_falhas_seguidas()
+    test_fallback_e_cache_com_circuito_aberto()
+    test_meio_aberto_com_sonda()
+    test_abre_por_latencia()
+    test_saude_mostra_circuitos()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Teste 10: Enriquecimento em Lote com /items
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico(atraso_itens=0.0, lote_invalido=None):
+    """
+    Busca devolve itens só com ID; /items devolve os detalhes completos
+    (ou um objeto em vez da lista para o lote de número `lote_invalido`).
+    """
+    lotes = []
+
+    async def responder(request):
+        if request.url.path == "/items":
+            ids = request.url.params["ids"].split(",")
+            lotes.append(ids)
+            numero = len(lotes)
+            await asyncio.sleep(atraso_itens)
+            if numero == lote_invalido:
+                return httpx.Response(200, json={"message": "unexpected", "status": 200})
+            corpo = [{"code": 200, "body": gerar_item(int(i[3:]))} for i in ids[:-1]]
+            corpo.append({"code": 404, "body": {"message": "not found"}})
+            return httpx.Response(200, json=corpo)
+        limite = int(request.url.params["limit"])
+        return httpx.Response(200, json={"results": [{"id": gerar_item(i)["id"]} for i in range(limite)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=60)
+    return servico, lotes
+
+
+def test_lotes_e_preenchimento():
+    """Itens incompletos são completados em lotes de até 20 IDs"""
+    print("🧪 Teste 10: Enriquecimento em Lote com /items")
+    print("=" * 50)
+    print("\n[1/4] Testando lotes e preenchimento...")
+
+    servico, lotes = criar_servico()
+    resultado = asyncio.run(servico.buscar_produtos_async("tenis", 45, enriquecer=True))
+
+    assert [len(l) for l in lotes] == [20, 20, 5]
+    completos = [p for p in resultado["produtos"] if p["nome"] != "Não informado"]
+    assert len(completos) == 42
+    assert completos[0]["imagem"].startswith("https://")
+    assert completos[0]["atributos"][0]["nome"] == "Marca"
+
+    sem_enriquecer = asyncio.run(servico.buscar_produtos_async("tenis", 45))
+    assert all(p["nome"] == "Não informado" for p in sem_enriquecer["produtos"])
+    print(f"✅ {len(completos)} produtos completados em {len(lotes)} lotes")
+
+
+def test_cache_de_itens():
+    """Detalhes (inclusive 404) ficam em cache e não são consultados de novo"""
+    print("\n[2/4] Testando cache de itens...")
+
+    servico, lotes = criar_servico()
+
+    async def duas_buscas():
+        await servico.buscar_produtos_async("tenis", 10, enriquecer=True)
+        await servico.buscar_produtos_async("tenis", 10, enriquecer=True)
+
+    asyncio.run(duas_buscas())
+
+    assert len(lotes) == 1
+    assert servico.enriquecimento.estatisticas()["itens_do_cache"] == 10
+    print("✅ Segunda busca enriquecida sem chamar /items")
+
+
+def test_orcamento_de_tempo():
+    """Lotes que estouram o orçamento são abandonados sem atrasar a busca"""
+    print("\n[3/4] Testando orçamento de tempo...")
+
+    servico, _ = criar_servico(atraso_itens=1.0)
+    servico.enriquecimento.orcamento = 0.1
+
+    inicio = time.perf_counter()
+    resultado = asyncio.run(servico.buscar_produtos_async("tenis", 10, enriquecer=True))
+    duracao = time.perf_counter() - inicio
+
+    assert duracao < 0.5
+    assert resultado["total"] == 10
+    assert servico.enriquecimento.estatisticas()["orcamentos_estourados"] == 1
+    print(f"✅ Busca respondida em {duracao * 1000:.0f} ms")
+
+
+def test_lote_com_corpo_invalido():
+    """Lote cujo /items não responde uma lista fica vazio; os outros lotes continuam valendo"""
+    print("\n[4/4] Testando lote com corpo inválido...")
+
+    servico, lotes = criar_servico(lote_invalido=2)
+    resultado = asyncio.run(servico.buscar_produtos_async("tenis", 45, enriquecer=True))
+
+    assert len(lotes) == 3
+    completos = [p for p in resultado["produtos"] if p["nome"] != "Não informado"]
+    assert len(completos) == 19 + 4
+    assert servico.enriquecimento.estatisticas()["lotes_com_erro"] == 1
+    print(f"✅ {len(completos)} produtos completados com um lote inválido")
+
+
+if __name__ == "__main__":
+    test_lotes_e_preenchimento()
+    test_cache_de_itens()
+    test_orcamento_de_tempo()
+    test_lote_com_corpo_invalido()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Teste 9: Estratégias de Busca Principal/Fallback
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico(estrategia, atraso_principal, atraso_fallback, principal_vazio=False):
+    """Serviço sem cache com upstream simulado; o id dos itens indica quem respondeu."""
+    async def responder(request):
+        if request.url.path == "/products/search":
+            await asyncio.sleep(atraso_principal)
+            itens = [] if principal_vazio else [gerar_item(i) for i in range(3)]
+        else:
+            await asyncio.sleep(atraso_fallback)
+            itens = [gerar_item(100 + i) for i in range(3)]
+        return httpx.Response(200, json={"results": itens})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=0)
+    servico.estrategia = estrategia
+    return servico
+
+
+def buscar(servico):
+    inicio = time.perf_counter()
+    resultado = asyncio.run(servico.buscar_produtos_async("mochila", 3))
+    return resultado, time.perf_counter() - inicio
+
+
+def test_paralela_principal_vazio():
+    """Na paralela, principal vazio custa uma ida ao upstream, não duas"""
+    print("🧪 Teste 9: Estratégias de Busca Principal/Fallback")
+    print("=" * 50)
+    print("\n[1/3] Testando estratégia paralela com principal vazio...")
+
+    resultado, duracao = buscar(criar_servico("paralela", 0.2, 0.2, principal_vazio=True))
+
+    assert resultado["produtos"][0]["id"] == gerar_item(100)["id"]
+    assert duracao < 0.35
+    print(f"✅ Fallback usado em {duracao * 1000:.0f} ms")
+
+
+def test_paralela_prefere_principal():
+    """Na paralela, o principal com resultados vence mesmo se o fallback for mais rápido"""
+    print("\n[2/3] Testando preferência pelo principal...")
+
+    servico = criar_servico("paralela", 0.1, 0.01)
+    resultado, _ = buscar(servico)
+
+    assert resultado["produtos"][0]["id"] == gerar_item(0)["id"]
+    assert servico.estatisticas()["estrategia"]["vitorias_fallback"] == 0
+    print("✅ Resultado do principal preferido")
+
+
+def test_hedged_principal_lento():
+    """No hedged, o fallback é disparado quando o principal passa do atraso de hedge"""
+    print("\n[3/3] Testando estratégia hedged...")
+
+    servico = criar_servico("hedged", 1.0, 0.05)
+    servico.atraso_hedge_padrao = 0.1
+    resultado, duracao = buscar(servico)
+
+    assert resultado["produtos"][0]["id"] == gerar_item(100)["id"]
+    assert duracao < 0.5
+    assert servico.estatisticas()["estrategia"]["vitorias_fallback"] == 1
+
+    rapido = criar_servico("hedged", 0.01, 0.01)
+    rapido.atraso_hedge_padrao = 0.1
+    buscar(rapido)
+    assert rapido.estatisticas()["estrategia"]["fallbacks_disparados"] == 0
+    print(f"✅ Hedge respondeu em {duracao * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_paralela_principal_vazio()
+    test_paralela_prefere_principal()
+    test_hedged_principal_lento()
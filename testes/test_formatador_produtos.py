@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Teste 24: Formatação de Produtos em Uma Passada
+"""
+
+import sys
+import os
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.formatador_produtos import NAO_INFORMADO, FormatadorProdutos, ordenar_por_imagem
+from benchmark_formatacao import formatar_antes, gerar_pagina
+
+CASOS = [
+    {"id": "A", "title": " Tênis ", "secure_thumbnail": " https://img/a.jpg ", "price": "199.9", "status": " Active "},
+    {"id": "B", "name": "Camisa", "thumbnail": "http://img/b.jpg", "prices": [{"amount": 50}], "status": None},
+    {"id": "C", "product_name": "Bola", "pictures": [{"url": "http://img/c.jpg"}], "permalink": "ftp://x"},
+    {"id": "D", "title": "Meia", "pictures": ["http://img/d.jpg"], "url": "https://ml/d", "price": "abc"},
+    {"id": "E", "title": "   ", "pictures": [], "buy_box_winner": {"permalink": "https://ml/e"}, "price": 0},
+    {"id": "F", "title": "Boné", "buy_box_winner": "inválido", "product_url": "https://ml/f"},
+    {"id": None, "title": "Sem id"},
+    {"title": "Sem id também"},
+    {"id": "G", "attributes": [
+        {"name": "Marca", "value_name": "X"}, {"name": "Cor", "value_name": None},
+        {"name": "Modelo", "value_name": "Y"}, {"name": "Gênero", "value_name": "Z"},
+    ]},
+]
+
+
+def test_equivalente_a_formatacao_item_a_item():
+    """Mesmo resultado da formatação anterior nos casos de borda e em páginas variadas"""
+    print("🧪 Teste 24: Formatação de Produtos em Uma Passada")
+    print("=" * 50)
+    print("\n[1/3] Testando equivalência...")
+
+    formatador = FormatadorProdutos()
+    for ordenar in (True, False):
+        assert formatador.formatar(CASOS, ordenar).produtos == formatar_antes(CASOS, ordenar)
+    for semente in range(20):
+        pagina = gerar_pagina(100, semente)
+        assert formatador.formatar(pagina).produtos == formatar_antes(pagina)
+
+    assert formatador.formatar(None).produtos == []
+    print("✅ Equivalente em casos de borda e 20 páginas variadas")
+
+
+def test_ordem_e_contagens():
+    """Com imagem primeiro na ordem do upstream; itens sem id e incompletos contados"""
+    print("\n[2/3] Testando ordem e contagens...")
+
+    pagina = FormatadorProdutos().formatar(CASOS)
+    ids = [p["id"] for p in pagina.produtos]
+    assert ids == ["A", "B", "C", "D", "E", "F", "G"]
+    assert pagina.sem_id == 2
+    # E (sem nome nem imagem), F e G (sem imagem)
+    assert pagina.incompletos == 3
+
+    invertida = FormatadorProdutos().formatar(list(reversed(CASOS))).produtos
+    assert [p["id"] for p in invertida] == ["D", "C", "B", "A", "G", "F", "E"]
+    assert ordenar_por_imagem(list(reversed(pagina.produtos))) == invertida
+    assert FormatadorProdutos().formatar(CASOS, ordenar=False).produtos[4]["imagem"] == NAO_INFORMADO
+    print(f"✅ Ordem {ids}, {pagina.sem_id} sem id, {pagina.incompletos} incompletos")
+
+
+def test_atributos_e_regras():
+    """Atributos completados até o máximo, em dicionários próprios de cada produto"""
+    print("\n[3/3] Testando atributos e regras...")
+
+    formatador = FormatadorProdutos()
+    item = {"id": "X", "title": "T", "attributes": [{"name": "Marca", "value_name": "Nike"}]}
+    primeiro, segundo = formatador.formatar([item, {**item, "id": "Y"}]).produtos
+
+    assert primeiro["atributos"] == [
+        {"nome": "Marca", "valor": "Nike"},
+        {"nome": NAO_INFORMADO, "valor": NAO_INFORMADO},
+        {"nome": NAO_INFORMADO, "valor": NAO_INFORMADO},
+    ]
+    assert primeiro["atributos"] is not segundo["atributos"]
+    assert not any(a is b for a, b in zip(primeiro["atributos"], segundo["atributos"]))
+
+    # Regras próprias
+    curto = FormatadorProdutos(chaves_nome=("name",), max_atributos=1)
+    assert curto.formatar([item]).produtos[0]["nome"] == NAO_INFORMADO
+    assert len(curto.formatar([item]).produtos[0]["atributos"]) == 1
+    print("✅ Atributos completados, regras configuráveis")
+
+
+if __name__ == "__main__":
+    test_equivalente_a_formatacao_item_a_item()
+    test_ordem_e_contagens()
+    test_atributos_e_regras()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Teste 17: Limite de Taxa do Upstream
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.limitador_taxa import ALTA, BAIXA, LimitadorTaxa, LimiteTaxaExcedido, interpretar_retry_after
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico(respostas_429=0, retry_after="0.2", **limites):
+    """Upstream que responde 429 nas primeiras respostas_429 chamadas."""
+    chamadas = []
+
+    def responder(request):
+        chamadas.append(time.perf_counter())
+        if len(chamadas) <= respostas_429:
+            return httpx.Response(429, headers={"Retry-After": retry_after})
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(5)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(
+        transporte_interno=httpx.MockTransport(responder), limitador=LimitadorTaxa(**limites)
+    )
+    servico.cache = CacheBusca(ttl=0)
+    return servico, chamadas
+
+
+def test_balde_espaca_requisicoes():
+    """Além da rajada, as requisições saem na taxa configurada"""
+    print("🧪 Teste 17: Limite de Taxa do Upstream")
+    print("=" * 50)
+    print("\n[1/5] Testando balde de fichas...")
+
+    limitador = LimitadorTaxa(taxa=20, rajada=2, espera_maxima=5)
+
+    async def executar():
+        inicio = time.perf_counter()
+        await asyncio.gather(*(limitador.adquirir() for _ in range(6)))
+        return time.perf_counter() - inicio
+
+    duracao = asyncio.run(executar())
+    # 2 da rajada + 4 a 20/s = pelo menos 0,2 s
+    assert duracao >= 0.18, duracao
+    estatisticas = limitador.estatisticas()
+    assert estatisticas["liberadas"] == 6 and estatisticas["fila"] == 0 and estatisticas["descartes"] == 0
+    print(f"✅ 6 requisições em {duracao * 1000:.0f} ms")
+
+
+def test_429_respeita_retry_after():
+    """Um 429 pausa o limitador pelo Retry-After, reduz a taxa e a busca é repetida"""
+    print("\n[2/5] Testando 429 com Retry-After...")
+
+    assert interpretar_retry_after("3") == 3.0
+    assert interpretar_retry_after(None) is None
+    assert interpretar_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    servico, chamadas = criar_servico(respostas_429=1, retry_after="0.2", taxa=40)
+    resposta = servico.buscar_produtos("tenis", 5)
+
+    assert resposta["total"] == 5
+    assert len(chamadas) == 2
+    assert chamadas[1] - chamadas[0] >= 0.19
+    limite = servico.transporte.estatisticas()["limite_taxa"]
+    assert limite["respostas_429"] == 1
+    assert 20 <= limite["taxa_atual"] < 40
+    print(f"✅ Repetida após {(chamadas[1] - chamadas[0]) * 1000:.0f} ms, taxa {limite['taxa_atual']}/s")
+
+
+def test_pausa_longa_descarta_sem_chamar_upstream():
+    """Retry-After acima da espera máxima vira erro 503 e as buscas seguintes nem saem"""
+    print("\n[3/5] Testando Retry-After longo...")
+
+    servico, chamadas = criar_servico(respostas_429=10, retry_after="30", espera_maxima=0.5)
+    primeira = servico.buscar_produtos("tenis", 5)
+    inicio = time.perf_counter()
+    segunda = servico.buscar_produtos("bola", 5)
+
+    assert primeira["erro"] == segunda["erro"] == "Muitas buscas no momento. Tente novamente em instantes."
+    assert time.perf_counter() - inicio < 0.2
+    assert len(chamadas) == 1
+    limite = servico.transporte.estatisticas()["limite_taxa"]
+    assert limite["descartes"] >= 1 and limite["pausado_por"] > 25
+
+    # Na rota, o mesmo erro sai com status 503
+    from app.main import app
+    from app.api.dependencias import obter_produtos_service
+
+    app.dependency_overrides[obter_produtos_service] = lambda: servico
+    try:
+        resposta = TestClient(app).get("/api/buscar", params={"q": "meia", "limit": 5})
+    finally:
+        app.dependency_overrides.clear()
+    assert resposta.status_code == 503 and resposta.json()["erro"] == primeira["erro"]
+    assert len(chamadas) == 1
+    print(f"✅ 1 chamada ao upstream, {limite['descartes']} descartes, rota com 503")
+
+
+def test_usuarios_antes_do_segundo_plano():
+    """Com o balde vazio, buscas de usuários passam à frente das revalidações"""
+    print("\n[4/5] Testando prioridade...")
+
+    limitador = LimitadorTaxa(taxa=20, rajada=1, espera_maxima=5)
+    ordem = []
+
+    async def pedir(nome, prioridade):
+        await limitador.adquirir(prioridade)
+        ordem.append(nome)
+
+    async def executar():
+        await limitador.adquirir()
+        baixas = [asyncio.create_task(pedir(f"baixa{i}", BAIXA)) for i in range(2)]
+        await asyncio.sleep(0)
+        altas = [asyncio.create_task(pedir(f"alta{i}", ALTA)) for i in range(2)]
+        await asyncio.gather(*baixas, *altas)
+
+    asyncio.run(executar())
+    assert ordem == ["alta0", "alta1", "baixa0", "baixa1"], ordem
+    print(f"✅ Ordem: {ordem}")
+
+
+def test_fila_limitada():
+    """Requisições além da fila máxima são descartadas na hora"""
+    print("\n[5/5] Testando fila limitada...")
+
+    limitador = LimitadorTaxa(taxa=10, rajada=1, fila_maxima=2, espera_maxima=5)
+
+    async def executar():
+        await limitador.adquirir()
+        esperando = [asyncio.create_task(limitador.adquirir()) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert limitador.estatisticas()["fila"] == 2
+        try:
+            await limitador.adquirir()
+            raise AssertionError("esperava LimiteTaxaExcedido")
+        except LimiteTaxaExcedido:
+            pass
+        await asyncio.gather(*esperando)
+
+    asyncio.run(executar())
+    estatisticas = limitador.estatisticas()
+    assert estatisticas["descartes"] == 1 and estatisticas["liberadas"] == 3
+    print(f"✅ {estatisticas['descartes']} descarte com a fila cheia")
+
+
+if __name__ == "__main__":
+    test_balde_espaca_requisicoes()
+    test_429_respeita_retry_after()
+    test_pausa_longa_descarta_sem_chamar_upstream()
+    test_usuarios_antes_do_segundo_plano()
+    test_fila_limitada()
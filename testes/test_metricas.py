@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Teste 21: Métricas do Prometheus
+"""
+
+import subprocess
+import sys
+import os
+import tempfile
+
+import httpx
+
+# Adiciona pasta raiz ao path
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.main import app
+from app.api.dependencias import obter_produtos_service
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.utils.metricas import endpoint_upstream, exportar
+from servidor_falso_ml import gerar_item
+
+# Produtos do principal e do fallback por termo
+RESULTADOS = {"tenis": (5, 0), "raro": (0, 3), "nada": (0, 0)}
+
+
+def responder(request):
+    if request.url.path.startswith("/items"):
+        return httpx.Response(401, json={"message": "invalid_token"})
+    principal, fallback = RESULTADOS[request.url.params["q"]]
+    quantidade = principal if request.url.path == "/products/search" else fallback
+    return httpx.Response(200, json={"results": [gerar_item(i) for i in range(quantidade)]})
+
+
+def amostras(texto):
+    """{(nome, rótulos ordenados): valor} do texto de exposição."""
+    return {
+        (amostra.name, tuple(sorted(amostra.labels.items()))): amostra.value
+        for familia in text_string_to_metric_families(texto)
+        for amostra in familia.samples
+    }
+
+
+def valor(metricas, nome, **rotulos):
+    return metricas.get((nome, tuple(sorted(rotulos.items()))), 0.0)
+
+
+def test_metricas_da_busca():
+    """Buscas pela API atualizam latência, cache, fallback, vazias e produtos por busca"""
+    print("🧪 Teste 21: Métricas do Prometheus")
+    print("=" * 50)
+    print("\n[1/3] Testando métricas das buscas...")
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca()
+    app.dependency_overrides[obter_produtos_service] = lambda: servico
+    try:
+        cliente = TestClient(app)
+        antes = amostras(cliente.get("/metrics").text)
+        for termo in ("tenis", "tenis", "raro", "nada"):
+            cliente.get("/api/buscar", params={"q": termo, "limit": 5})
+        resposta = cliente.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain")
+    depois = amostras(resposta.text)
+
+    def delta(nome, **rotulos):
+        return valor(depois, nome, **rotulos) - valor(antes, nome, **rotulos)
+
+    assert delta("ml_busca_duracao_segundos_count", rota="/api/buscar", status="2xx") == 4
+    assert delta("ml_upstream_duracao_segundos_count", endpoint="/products/search", status="2xx") == 3
+    assert delta("ml_upstream_duracao_segundos_count", endpoint="/sites/MLB/search", status="2xx") == 2
+    assert delta("ml_cache_consultas_total", resultado="acerto") == 1
+    assert delta("ml_cache_consultas_total", resultado="falta") == 3
+    assert delta("ml_fallback_consultas_total", resultado="com_resultados") == 1
+    assert delta("ml_fallback_consultas_total", resultado="vazio") == 1
+    assert delta("ml_busca_vazia_total") == 1
+    assert delta("ml_busca_resultados_count") == 4
+    assert delta("ml_busca_resultados_sum") == 5 + 5 + 3
+    assert delta("ml_busca_resultados_bucket", le="0.0") == 1
+    print(f"✅ {len(depois)} séries exportadas após 4 buscas")
+
+
+def test_401_por_endpoint():
+    """Respostas 401 são contadas por endpoint, com /items/<id> agrupado em /items"""
+    print("\n[2/3] Testando 401...")
+
+    assert endpoint_upstream("/items/MLB123") == "/items"
+    assert endpoint_upstream("/sites/MLB/search") == "/sites/MLB/search"
+    assert endpoint_upstream("/sites/MLB/categories") == "outro"
+
+    transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    antes = amostras(exportar()[0].decode())
+
+    async def consultar():
+        return await transporte.cliente().get("https://api.mercadolibre.com/items/MLB1")
+
+    assert transporte.executar(consultar()).status_code == 401
+    depois = amostras(exportar()[0].decode())
+    assert valor(depois, "ml_upstream_401_total", endpoint="/items") - valor(
+        antes, "ml_upstream_401_total", endpoint="/items"
+    ) == 1
+    print("✅ 401 contado em /items")
+
+
+def test_soma_entre_workers():
+    """Com PROMETHEUS_MULTIPROC_DIR, /metrics soma as métricas de todos os processos"""
+    print("\n[3/3] Testando vários workers...")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        ambiente = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": diretorio}
+        codigo = (
+            "from app.utils import metricas\n"
+            "metricas.registrar_busca(10)\n"
+            "metricas.CACHE_ACERTO.inc()\n"
+            "metricas.encerrar_processo()\n"
+        )
+        for _ in range(3):
+            subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=ambiente, check=True)
+
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = diretorio
+        try:
+            metricas = amostras(exportar()[0].decode())
+        finally:
+            del os.environ["PROMETHEUS_MULTIPROC_DIR"]
+
+    assert valor(metricas, "ml_busca_resultados_count") == 3
+    assert valor(metricas, "ml_busca_resultados_sum") == 30
+    assert valor(metricas, "ml_cache_consultas_total", resultado="acerto") == 3
+    print("✅ 3 processos somados")
+
+
+if __name__ == "__main__":
+    test_metricas_da_busca()
+    test_401_por_endpoint()
+    test_soma_entre_workers()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Teste 11: Paginação Além de 50 Resultados
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.utils.paginacao import codificar_cursor, decodificar_cursor
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico(total=1000, sobreposicao=0, atraso=0.0, sem_id=()):
+    """
+    Upstream simulado com `total` resultados; cada página repete os
+    `sobreposicao` últimos itens da anterior, como a API real às vezes faz.
+    Os itens nas posições de `sem_id` vêm sem id.
+    """
+    offsets = []
+
+    async def responder(request):
+        offset = int(request.url.params.get("offset", 0))
+        limite = int(request.url.params["limit"])
+        offsets.append(offset)
+        await asyncio.sleep(atraso)
+        inicio = max(0, offset - sobreposicao)
+        fim = min(total, inicio + limite)
+        itens = [gerar_item(i) for i in range(inicio, fim)]
+        for item, posicao in zip(itens, range(inicio, fim)):
+            if posicao in sem_id:
+                item["id"] = None
+        return httpx.Response(200, json={"results": itens})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=60)
+    return servico, offsets
+
+
+def test_paginas_em_paralelo():
+    """Limite de 120 busca três páginas do upstream ao mesmo tempo"""
+    print("🧪 Teste 11: Paginação Além de 50 Resultados")
+    print("=" * 50)
+    print("\n[1/5] Testando páginas em paralelo...")
+
+    servico, offsets = criar_servico(atraso=0.2)
+    inicio = time.perf_counter()
+    resultado = asyncio.run(servico.buscar_produtos_async("tenis", 120))
+    duracao = time.perf_counter() - inicio
+
+    assert resultado["total"] == 120
+    assert sorted(offsets) == [0, 50, 100]
+    assert duracao < 0.5
+    ids = [p["id"] for p in resultado["produtos"]]
+    assert len(set(ids)) == 120
+    assert decodificar_cursor(resultado["proximo_cursor"]) == {"termo": "tenis", "offset": 120, "limit": 120}
+    print(f"✅ 3 páginas em {duracao * 1000:.0f} ms")
+
+
+def test_sem_ids_repetidos():
+    """Itens repetidos na fronteira entre páginas aparecem uma vez só"""
+    print("\n[2/5] Testando remoção de repetidos...")
+
+    servico, _ = criar_servico(sobreposicao=5)
+    resultado = asyncio.run(servico.buscar_produtos_async("tenis", 100))
+
+    ids = [p["id"] for p in resultado["produtos"]]
+    assert len(ids) == len(set(ids))
+    assert len(ids) == 95
+    print(f"✅ {len(ids)} produtos sem repetição")
+
+
+def test_reuso_de_paginas_em_cache():
+    """Rolar a lista só busca as páginas novas"""
+    print("\n[3/5] Testando reuso de páginas em cache...")
+
+    servico, offsets = criar_servico()
+
+    async def rolar():
+        primeira = await servico.buscar_produtos_async("tenis", 50)
+        cursor = decodificar_cursor(primeira["proximo_cursor"])
+        segunda = await servico.buscar_produtos_async("tenis", cursor["limit"], offset=cursor["offset"])
+        meio = await servico.buscar_produtos_async("tenis", 50, offset=25)
+        return primeira, segunda, meio
+
+    primeira, segunda, meio = asyncio.run(rolar())
+
+    assert offsets == [0, 50]
+    assert segunda["produtos"][0]["id"] == gerar_item(50)["id"]
+    assert {p["id"] for p in meio["produtos"]} == {gerar_item(i)["id"] for i in range(25, 75)}
+    assert not {p["id"] for p in primeira["produtos"]} & {p["id"] for p in segunda["produtos"]}
+    print(f"✅ {len(offsets)} chamadas ao upstream para 3 buscas")
+
+
+def test_fim_dos_resultados():
+    """Sem mais resultados, não há cursor; offset além do fim não é erro"""
+    print("\n[4/5] Testando fim dos resultados e cursor...")
+
+    servico, _ = criar_servico(total=70)
+    resultado = asyncio.run(servico.buscar_produtos_async("tenis", 200))
+    assert resultado["total"] == 70
+    assert resultado["proximo_cursor"] is None
+
+    alem = asyncio.run(servico.buscar_produtos_async("tenis", 50, offset=100))
+    assert alem["total"] == 0 and not alem.get("erro")
+
+    for invalido in ("abc", codificar_cursor("tenis", 5000, 10), codificar_cursor("tenis", 0, 0)):
+        try:
+            decodificar_cursor(invalido)
+            assert False, f"Cursor aceito: {invalido}"
+        except ValueError:
+            pass
+    print("✅ Paginação encerrada corretamente")
+
+
+def test_itens_sem_id_nao_encerram_paginacao():
+    """Item sem id descartado na formatação não é confundido com o fim dos resultados"""
+    print("\n[5/5] Testando itens sem id...")
+
+    servico, offsets = criar_servico(sem_id={3, 60})
+
+    async def buscar():
+        uma_pagina = await servico.buscar_produtos_async("tenis", 50)
+        do_cache = await servico.buscar_produtos_async("tenis", 50)
+        tres_paginas = await servico.buscar_produtos_async("tenis", 120)
+        return uma_pagina, do_cache, tres_paginas
+
+    uma_pagina, do_cache, tres_paginas = asyncio.run(buscar())
+    assert uma_pagina["total"] == 49
+    assert decodificar_cursor(uma_pagina["proximo_cursor"])["offset"] == 50
+    assert do_cache["total"] == 49 and decodificar_cursor(do_cache["proximo_cursor"])["offset"] == 50
+    assert tres_paginas["total"] == 120 and sorted(offsets) == [0, 50, 100]
+    assert decodificar_cursor(tres_paginas["proximo_cursor"])["offset"] == 120
+    print(f"✅ {tres_paginas['total']} produtos em 3 páginas, cursor mantido")
+
+
+if __name__ == "__main__":
+    test_paginas_em_paralelo()
+    test_sem_ids_repetidos()
+    test_reuso_de_paginas_em_cache()
+    test_fim_dos_resultados()
+    test_itens_sem_id_nao_encerram_paginacao()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Teste 26: Produtos Compactos no Cache
+"""
+
+import json
+import sys
+import os
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache_busca import CacheBusca
+from app.services.formatador_produtos import NAO_INFORMADO, FormatadorProdutos
+from app.services.produto_compacto import ProdutoCompacto, compactar, expandir
+from benchmark_formatacao import gerar_pagina
+
+
+def test_ida_e_volta():
+    """Compactar e expandir devolve os mesmos produtos, com textos repetidos compartilhados"""
+    print("🧪 Teste 26: Produtos Compactos no Cache")
+    print("=" * 50)
+    print("\n[1/2] Testando compactação...")
+
+    # Cada produto vem de um JSON próprio: nada compartilhado de antemão
+    produtos = [
+        json.loads(json.dumps(produto)) for produto in FormatadorProdutos().formatar(gerar_pagina(200)).produtos
+    ]
+    registros = compactar(produtos)
+    assert expandir(registros) == produtos
+    assert not hasattr(registros[0], "__dict__")
+
+    incompleto = next(r for r in registros if r.imagem == NAO_INFORMADO)
+    assert incompleto.imagem is NAO_INFORMADO
+    assert len({id(r.status) for r in registros}) == len({r.status for r in registros})
+
+    pares = [a for r in registros for a in r.atributos]
+    assert len({id(a) for a in pares}) == len({(a["nome"], a["valor"]) for a in pares})
+    assert len({id(a["nome"]) for a in pares}) == len({a["nome"] for a in pares})
+    print(f"✅ {len(registros)} produtos, {len({id(a) for a in pares})} pares de atributo distintos")
+
+
+def test_cache_devolve_produtos_novos():
+    """Cada consulta ao cache devolve dicionários novos no formato de Produto"""
+    print("\n[2/2] Testando consultas ao cache...")
+
+    produtos = FormatadorProdutos().formatar(gerar_pagina(10)).produtos
+    cache = CacheBusca(ttl=60)
+    cache.guardar("tenis", 10, produtos)
+
+    primeira, _ = cache.consultar("tenis", 10)
+    assert primeira == produtos and primeira[0] is not produtos[0]
+    primeira[0]["nome"] = "alterado"
+    primeira[0]["atributos"] = []
+
+    segunda, _ = cache.consultar("tenis", 5)
+    assert segunda == produtos[:5]
+    assert isinstance(cache._entradas[("tenis", "MLB", 0)].produtos[0], ProdutoCompacto)
+    print("✅ Alterar uma consulta não altera o cache")
+
+
+if __name__ == "__main__":
+    test_ida_e_volta()
+    test_cache_devolve_produtos_novos()
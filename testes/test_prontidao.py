@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Teste 23: Liveness e Readiness com Sonda ao Upstream
+"""
+
+import asyncio
+import sys
+import os
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.limitador_taxa import LimiteTaxaExcedido
+from app.services.prontidao import VerificadorProntidao
+from app.services.retentativas import PoliticaRetentativa
+
+
+def preparar(estado):
+    """Upstream cuja sonda (/users/me) responde estado["status"]; conta as sondas."""
+    estado.setdefault("sondas", 0)
+
+    def responder(request):
+        if request.url.path == "/users/me":
+            estado["sondas"] += 1
+            return httpx.Response(estado["status"], json={"id": 1})
+        return httpx.Response(200, json={"results": []})
+
+    servicos = app.state.servicos
+    servicos.transporte._transporte_interno = httpx.MockTransport(responder)
+    servicos.transporte.retentativas = PoliticaRetentativa(maximo=0)
+    return servicos
+
+
+def abrir_circuito(disjuntor):
+    for _ in range(disjuntor.limite_falhas):
+        with disjuntor.chamada() as chamada:
+            chamada.falhou = True
+
+
+def test_vivo_e_pronto():
+    """Liveness sempre 200; readiness 200 com a sonda reaproveitada por alguns segundos"""
+    print("🧪 Teste 23: Liveness e Readiness com Sonda ao Upstream")
+    print("=" * 50)
+    print("\n[1/5] Testando vivo e pronto...")
+
+    estado = {"status": 200}
+    with TestClient(app) as cliente:
+        preparar(estado)
+        vivo = cliente.get("/api/saude/vivo")
+        assert vivo.status_code == 200 and vivo.json()["status"] == "vivo"
+
+        respostas = [cliente.get("/api/saude/pronto") for _ in range(5)]
+
+    assert all(r.status_code == 200 for r in respostas)
+    corpo = respostas[-1].json()
+    assert corpo["status"] == "pronto" and corpo["pronto"] is True
+    assert set(corpo["verificacoes"]) == {"token", "upstream", "recursos", "circuitos", "aquecimento"}
+    assert corpo["verificacoes"]["upstream"]["status"] == 200
+    assert estado["sondas"] == 1
+    print(f"✅ 5 verificações, 1 sonda ao upstream ({corpo['verificacoes']['upstream']['latencia_ms']} ms)")
+
+
+def test_upstream_e_token_indisponiveis():
+    """Upstream fora do ar, token recusado ou ausente deixam o processo indisponível (503)"""
+    print("\n[2/5] Testando upstream e token...")
+
+    estado = {"status": 503}
+    with TestClient(app) as cliente:
+        servicos = preparar(estado)
+        servicos.prontidao.validade = 0
+        servicos.auth.refresh_token = None
+
+        resposta = cliente.get("/api/saude/pronto")
+        assert resposta.status_code == 503
+        assert resposta.json()["verificacoes"]["upstream"]["ok"] is False
+
+        estado["status"] = 401
+        resposta = cliente.get("/api/saude/pronto")
+        assert resposta.status_code == 503
+        assert resposta.json()["verificacoes"]["token"]["motivo"] == "Token recusado pela API do Mercado Livre"
+
+        estado["status"] = 200
+        servicos.auth.access_token = None
+        resposta = cliente.get("/api/saude/pronto")
+        assert resposta.status_code == 503
+        assert resposta.json()["verificacoes"]["token"]["motivo"] == "Access token não configurado"
+
+        # Com refresh_token o token ausente é renovado na próxima busca
+        servicos.auth.refresh_token = "refresh-teste"
+        assert cliente.get("/api/saude/pronto").status_code == 200
+    print("✅ 503 com upstream fora, token recusado ou ausente")
+
+
+def test_circuitos():
+    """Um circuito aberto degrada; todos abertos deixam indisponível"""
+    print("\n[3/5] Testando circuitos...")
+
+    with TestClient(app) as cliente:
+        servicos = preparar({"status": 200})
+        disjuntores = servicos.produtos.disjuntores
+
+        abrir_circuito(disjuntores["principal"])
+        resposta = cliente.get("/api/saude/pronto")
+        assert resposta.status_code == 200 and resposta.json()["status"] == "degradado"
+
+        abrir_circuito(disjuntores["fallback"])
+        resposta = cliente.get("/api/saude/pronto")
+        assert resposta.status_code == 503 and resposta.json()["status"] == "indisponivel"
+        assert resposta.json()["verificacoes"]["circuitos"]["estados"] == {"principal": "aberto", "fallback": "aberto"}
+    print("✅ degradado com um circuito aberto, indisponível com os dois")
+
+
+def test_sondas_simultaneas_compartilhadas():
+    """Verificações simultâneas com a sonda vencida fazem uma sonda só"""
+    print("\n[4/5] Testando sondas simultâneas...")
+
+    estado = {"status": 200}
+    with TestClient(app):
+        servicos = preparar(estado)
+        servicos.prontidao.validade = 0
+
+        async def varias():
+            return await asyncio.gather(*(servicos.prontidao.verificar() for _ in range(10)))
+
+        resultados = servicos.transporte.executar(varias())
+
+    assert all(r["pronto"] for r in resultados)
+    assert estado["sondas"] == 1
+    print("✅ 10 verificações simultâneas, 1 sonda")
+
+
+def test_sonda_descartada_pelo_limite():
+    """Sonda descartada pelo limite de taxa (processo ocupado) não tira o processo do balanceador"""
+    print("\n[5/5] Testando sonda descartada pelo limite de taxa...")
+
+    estado = {"status": 200}
+    with TestClient(app) as cliente:
+        servicos = preparar(estado)
+        servicos.prontidao.validade = 0
+        assert cliente.get("/api/saude/pronto").status_code == 200
+
+        async def descartar(prioridade=None):
+            raise LimiteTaxaExcedido("Fila do limite de taxa cheia")
+
+        servicos.transporte.limitador.adquirir = descartar
+        resposta = cliente.get("/api/saude/pronto")
+        upstream = resposta.json()["verificacoes"]["upstream"]
+        assert resposta.status_code == 200 and upstream["ok"] is True
+        assert upstream["status"] == 200 and "limite de taxa" in upstream["aviso"]
+
+        # Sem resultado anterior, a sonda descartada também não conta como falha
+        novo = VerificadorProntidao(servicos.auth, servicos.transporte, servicos.produtos)
+        resultado = servicos.transporte.executar(novo.verificar())
+        del servicos.transporte.limitador.adquirir
+    assert resultado["pronto"] is True and resultado["verificacoes"]["upstream"]["ok"] is True
+    assert estado["sondas"] == 1
+    print(f"✅ Pronto com a sonda descartada: {upstream['aviso']}")
+
+
+if __name__ == "__main__":
+    test_vivo_e_pronto()
+    test_upstream_e_token_indisponiveis()
+    test_circuitos()
+    test_sondas_simultaneas_compartilhadas()
+    test_sonda_descartada_pelo_limite()
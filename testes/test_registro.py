@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Teste 20: Registro Estruturado, Amostrado e em Fila
+"""
+
+import io
+import json
+import logging
+import queue
+import sys
+import os
+import threading
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import registro
+from servidor_falso_ml import gerar_item
+
+
+def responder(request):
+    itens = [gerar_item(i) for i in range(5)]
+    del itens[0]["thumbnail"], itens[0]["pictures"]
+    return httpx.Response(200, json={"results": itens})
+
+
+def buscar_e_registrar(amostragem: str, buscas: int) -> list:
+    """Faz buscas pela aplicação e devolve os registros JSON gravados."""
+    saida = io.StringIO()
+    os.environ["ML_LOG_AMOSTRAGEM"] = amostragem
+    try:
+        with TestClient(app) as cliente:
+            app.state.servicos.transporte._transporte_interno = httpx.MockTransport(responder)
+            registro.configurar_registro(saida)
+            for _ in range(buscas):
+                assert cliente.get("/api/buscar", params={"q": "tenis", "limit": 5}).status_code == 200
+    finally:
+        del os.environ["ML_LOG_AMOSTRAGEM"]
+    # O shutdown encerra o registro, gravando o que estava na fila
+    return [json.loads(linha) for linha in saida.getvalue().splitlines()]
+
+
+def test_uma_linha_de_resumo_por_requisicao():
+    """Cada busca gera uma linha JSON de resumo, sem os registros INFO intermediários"""
+    print("🧪 Teste 20: Registro Estruturado, Amostrado e em Fila")
+    print("=" * 50)
+    print("\n[1/4] Testando linha de resumo...")
+
+    registros = buscar_e_registrar("0", buscas=2)
+    resumos = [r for r in registros if r["msg"] == "requisicao"]
+    assert len(resumos) == 2
+    assert [r for r in registros if r["msg"] != "requisicao" and r["nivel"] == "INFO"] == [
+        r for r in registros if r["logger"] == "app.api.dependencias"
+    ]
+
+    primeira, segunda = resumos
+    assert primeira["rota"] == "/api/buscar" and primeira["status"] == 200
+    assert primeira["termo"] == "tenis" and primeira["total"] == 5
+    assert primeira["cache_faltas"] == 1 and primeira["upstream_chamadas"] == 1
+    assert primeira["produtos_incompletos"] == 1
+    assert segunda["cache_acertos"] == 1 and "upstream_chamadas" not in segunda
+    assert primeira["duracao_ms"] >= 0 and primeira["ts"].endswith("Z")
+    print(f"✅ {len(registros)} linhas para 2 buscas: {json.dumps(primeira, ensure_ascii=False)[:120]}...")
+
+
+def test_amostragem_do_debug():
+    """Detalhe em DEBUG só aparece nas requisições sorteadas"""
+    print("\n[2/4] Testando amostragem...")
+
+    sem_amostra = buscar_e_registrar("0", buscas=1)
+    com_amostra = buscar_e_registrar("1", buscas=1)
+
+    assert not [r for r in sem_amostra if r["nivel"] == "DEBUG"]
+    depuracao = [r["msg"] for r in com_amostra if r["nivel"] == "DEBUG"]
+    assert any(m.startswith("🔍 GET") for m in depuracao)
+    assert any("sem dados completos" in m for m in depuracao)
+    print(f"✅ 0 linhas DEBUG sem amostra, {len(depuracao)} com amostra")
+
+
+def test_formatacao_fora_da_requisicao():
+    """A mensagem é montada na thread do listener, não na que registrou"""
+    print("\n[3/4] Testando formatação preguiçosa...")
+
+    threads = []
+
+    class Argumento:
+        def __str__(self):
+            threads.append(threading.current_thread().name)
+            return "valor"
+
+    saida = io.StringIO()
+    registro.configurar_registro(saida)
+    try:
+        logging.getLogger("app.teste").info("argumento: %s", Argumento())
+    finally:
+        registro.encerrar_registro()
+
+    assert json.loads(saida.getvalue())["msg"] == "argumento: valor"
+    assert threads and threads[0] != threading.current_thread().name
+    print(f"✅ Formatado na thread {threads[0]}")
+
+
+def test_fila_cheia_descarta_sem_bloquear():
+    """Com a fila cheia, registros são descartados e contados"""
+    print("\n[4/4] Testando fila cheia...")
+
+    handler = registro._HandlerFila(queue.Queue(maxsize=2))
+    logger = logging.Logger("teste_fila")
+    logger.addHandler(handler)
+    for i in range(5):
+        logger.warning("registro %d", i)
+
+    assert handler.queue.qsize() == 2
+    assert handler.descartados == 3
+    print(f"✅ {handler.descartados} descartados, nenhuma espera")
+
+
+if __name__ == "__main__":
+    test_uma_linha_de_resumo_por_requisicao()
+    test_amostragem_do_debug()
+    test_formatacao_fora_da_requisicao()
+    test_fila_cheia_descarta_sem_bloquear()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Teste 14: Renovação Automática do Token OAuth
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico(refresh_token="refresh-1", atraso_renovacao=0.0):
+    """Upstream que só aceita o token mais recente emitido por /oauth/token."""
+    estado = {"valido": "token-novo-1", "renovacoes": 0}
+
+    async def responder(request):
+        if request.url.path == "/oauth/token":
+            await asyncio.sleep(atraso_renovacao)
+            estado["renovacoes"] += 1
+            n = estado["renovacoes"]
+            estado["valido"] = f"token-novo-{n}"
+            return httpx.Response(200, json={
+                "access_token": f"token-novo-{n}", "refresh_token": f"refresh-{n + 1}", "expires_in": 21600,
+            })
+        if request.headers["Authorization"] != f"Bearer {estado['valido']}":
+            return httpx.Response(401, json={"message": "invalid access token"})
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(5)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.auth.transporte = servico.transporte
+    servico.auth.access_token = "token-expirado"
+    servico.auth.refresh_token = refresh_token
+    servico.cache = CacheBusca(ttl=0)
+    return servico, estado
+
+
+def test_repete_busca_apos_401():
+    """Um 401 renova o token e repete a busca uma vez"""
+    print("🧪 Teste 14: Renovação Automática do Token OAuth")
+    print("=" * 50)
+    print("\n[1/4] Testando nova tentativa após 401...")
+
+    servico, estado = criar_servico()
+    resultado = asyncio.run(servico.buscar_produtos_async("tenis", 5))
+
+    assert resultado["total"] == 5 and not resultado.get("erro")
+    assert estado["renovacoes"] == 1
+    assert servico.auth.access_token == "token-novo-1"
+    assert servico.auth.refresh_token == "refresh-2"
+    assert servico.auth.segundos_para_expirar() > 21000
+    print("✅ Busca concluída com o token renovado")
+
+
+def test_renovacoes_simultaneas():
+    """Vários 401 simultâneos resultam em uma única chamada a /oauth/token"""
+    print("\n[2/4] Testando renovações simultâneas...")
+
+    servico, estado = criar_servico(atraso_renovacao=0.1)
+
+    async def varias():
+        return await asyncio.gather(*(servico.buscar_produtos_async(f"termo {i}", 5) for i in range(20)))
+
+    resultados = asyncio.run(varias())
+
+    assert all(r["total"] == 5 for r in resultados)
+    assert estado["renovacoes"] == 1
+    print("✅ 20 buscas, 1 renovação")
+
+
+def test_renovacao_proativa():
+    """Perto da expiração, a busca usa o token atual e renova em segundo plano"""
+    print("\n[3/4] Testando renovação antes da expiração...")
+
+    servico, estado = criar_servico(atraso_renovacao=0.3)
+    servico.auth.access_token = "token-novo-1"
+    servico.auth.expira_em = time.time() + 60
+
+    async def buscar_e_aguardar():
+        inicio = time.perf_counter()
+        resultado = await servico.buscar_produtos_async("tenis", 5)
+        duracao = time.perf_counter() - inicio
+        await asyncio.gather(*servico.auth._tarefas)
+        return resultado, duracao
+
+    resultado, duracao = asyncio.run(buscar_e_aguardar())
+
+    assert resultado["total"] == 5
+    assert duracao < 0.2
+    assert estado["renovacoes"] == 1
+    assert servico.auth.segundos_para_expirar() > 21000
+    print("✅ Token renovado sem atrasar a busca")
+
+
+def test_sem_refresh_token():
+    """Sem refresh token, o 401 continua virando a mensagem de token inválido"""
+    print("\n[4/4] Testando ausência de refresh token...")
+
+    servico, estado = criar_servico(refresh_token=None)
+    resultado = asyncio.run(servico.buscar_produtos_async("tenis", 5))
+
+    assert resultado["erro"] == "Token inválido ou expirado."
+    assert estado["renovacoes"] == 0
+    print("✅ Nenhuma renovação tentada")
+
+
+if __name__ == "__main__":
+    test_repete_busca_apos_401()
+    test_renovacoes_simultaneas()
+    test_renovacao_proativa()
+    test_sem_refresh_token()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Teste 19: Novas Tentativas e Orçamento de Tempo
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.services.retentativas import PoliticaRetentativa
+from app.utils.prazo import iniciar_orcamento
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico(falhas, politica=None):
+    """
+    Upstream que falha nas primeiras chamadas: cada item de falhas é um
+    status HTTP ou uma exceção do httpx. Guarda os timeouts de cada chamada.
+    """
+    chamadas = []
+
+    def responder(request):
+        chamadas.append(dict(request.extensions["timeout"]))
+        if len(chamadas) <= len(falhas):
+            falha = falhas[len(chamadas) - 1]
+            if isinstance(falha, int):
+                return httpx.Response(falha)
+            raise falha("Conexão redefinida", request=request)
+        return httpx.Response(200, json={"results": [gerar_item(i) for i in range(5)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(
+        transporte_interno=httpx.MockTransport(responder),
+        retentativas=politica or PoliticaRetentativa(espera_base=0.01, espera_maxima=0.05),
+    )
+    servico.cache = CacheBusca(ttl=0)
+    return servico, chamadas
+
+
+def test_falha_transitoria_repetida():
+    """Conexão derrubada e 503 são repetidos e a busca dá certo"""
+    print("🧪 Teste 19: Novas Tentativas e Orçamento de Tempo")
+    print("=" * 50)
+    print("\n[1/6] Testando falhas transitórias...")
+
+    servico, chamadas = criar_servico([httpx.ReadError, 503])
+    resposta = servico.buscar_produtos("tenis", 5)
+
+    assert resposta["total"] == 5
+    assert len(chamadas) == 3
+    assert servico.transporte.estatisticas()["retentativas"] == 2
+
+    # Esgotadas as tentativas, o erro chega ao usuário
+    servico, chamadas = criar_servico([httpx.ConnectError] * 3)
+    assert servico.buscar_produtos("tenis", 5)["erro"] == "Erro ao comunicar com a API do Mercado Livre."
+    assert len(chamadas) == 3
+    print("✅ 2 novas tentativas, busca concluída")
+
+
+def test_post_nao_repetido():
+    """Requisições não idempotentes (POST do OAuth) não são repetidas"""
+    print("\n[2/6] Testando POST...")
+
+    servico, chamadas = criar_servico([httpx.ConnectError])
+
+    async def postar():
+        try:
+            await servico.transporte.cliente().post("https://api.mercadolibre.com/oauth/token")
+        except httpx.ConnectError:
+            return "erro"
+
+    assert asyncio.run(postar()) == "erro"
+    assert len(chamadas) == 1
+    print("✅ POST falhou sem nova tentativa")
+
+
+def test_orcamento_limita_tentativas():
+    """As novas tentativas param quando o orçamento não comporta mais uma"""
+    print("\n[3/6] Testando orçamento...")
+
+    politica = PoliticaRetentativa(maximo=10, espera_base=0.2, espera_maxima=0.2, minimo_tentativa=0.1)
+    servico, chamadas = criar_servico([503] * 10, politica)
+
+    async def buscar():
+        iniciar_orcamento(0.5)
+        inicio = time.perf_counter()
+        resposta = await servico.buscar_produtos_async("tenis", 5)
+        return resposta, time.perf_counter() - inicio
+
+    resposta, duracao = asyncio.run(buscar())
+    assert resposta["erro"]
+    assert duracao < 0.5
+    assert 1 < len(chamadas) < 10
+    print(f"✅ {len(chamadas)} chamadas em {duracao * 1000:.0f} ms (orçamento 500 ms)")
+
+
+def test_timeouts_separados_e_limitados():
+    """Timeouts de conexão e leitura separados, reduzidos ao que resta do orçamento"""
+    print("\n[4/6] Testando timeouts...")
+
+    servico, chamadas = criar_servico([])
+    servico.buscar_produtos("tenis", 5)
+    assert chamadas[0]["connect"] == 2.0 and chamadas[0]["read"] == 5.0
+
+    async def buscar(segundos, atraso=0.0):
+        iniciar_orcamento(segundos)
+        await asyncio.sleep(atraso)
+        return await servico.buscar_produtos_async("tenis", 5)
+
+    asyncio.run(buscar(1.0))
+    assert chamadas[1]["connect"] <= 1.0 and chamadas[1]["read"] <= 1.0
+
+    total = len(chamadas)
+    resposta = asyncio.run(buscar(0.01, atraso=0.02))
+    assert resposta["erro"] == "O Mercado Livre demorou demais para responder. Tente novamente."
+    assert len(chamadas) == total
+    print(f"✅ connect={chamadas[1]['connect']:.2f}s read={chamadas[1]['read']:.2f}s com orçamento de 1 s")
+
+
+def test_cabecalhos_de_orcamento():
+    """A rota informa orçamento, sobra e novas tentativas nos cabeçalhos"""
+    print("\n[5/6] Testando cabeçalhos...")
+
+    from app.main import app
+    from app.api.dependencias import obter_produtos_service
+
+    servico, _ = criar_servico([httpx.ConnectError])
+    app.dependency_overrides[obter_produtos_service] = lambda: servico
+    os.environ["ML_PRAZO_BUSCA"] = "3"
+    try:
+        cliente = TestClient(app)
+        resposta = cliente.get("/api/buscar", params={"q": "tenis", "limit": 5})
+        stream = cliente.get("/api/buscar/stream", params={"q": "tenis", "limit": 5})
+    finally:
+        app.dependency_overrides.clear()
+        del os.environ["ML_PRAZO_BUSCA"]
+
+    assert resposta.json()["total"] == 5
+    assert resposta.headers["X-Orcamento-Ms"] == "3000"
+    assert 0 < int(resposta.headers["X-Orcamento-Restante-Ms"]) <= 3000
+    assert resposta.headers["X-Upstream-Retentativas"] == "1"
+    assert stream.headers["X-Orcamento-Ms"] == "15000"
+    print(f"✅ Restante {resposta.headers['X-Orcamento-Restante-Ms']} ms de 3000 ms, 1 nova tentativa")
+
+
+def test_rota_responde_504():
+    """Timeout do upstream e orçamento esgotado saem da rota com status 504"""
+    print("\n[6/6] Testando status 504...")
+
+    from app.main import app
+    from app.api.dependencias import obter_produtos_service
+
+    servico, _ = criar_servico([httpx.ReadTimeout] * 2, PoliticaRetentativa(maximo=0))
+
+    # Upstream lento que, como um transporte real, desiste no timeout de leitura
+    # (que a busca já limita ao que resta do orçamento)
+    leituras = []
+
+    async def responder(request):
+        leitura = request.extensions["timeout"]["read"]
+        leituras.append(leitura)
+        await asyncio.sleep(min(leitura, 0.3))
+        if leitura < 0.3:
+            raise httpx.ReadTimeout("Leitura excedeu o prazo", request=request)
+        return httpx.Response(200, json={"results": [gerar_item(1)]})
+
+    lento = ProdutosMercadoLivre()
+    lento.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    lento.cache = CacheBusca(ttl=0)
+
+    os.environ["ML_PRAZO_BUSCA"] = "0.2"
+    try:
+        cliente = TestClient(app)
+        respostas = []
+        app.dependency_overrides[obter_produtos_service] = lambda: servico
+        respostas.append(cliente.get("/api/buscar", params={"q": "tenis", "limit": 5}))
+        app.dependency_overrides[obter_produtos_service] = lambda: lento
+        respostas.append(cliente.get("/api/buscar", params={"q": "tenis", "limit": 5}))
+    finally:
+        app.dependency_overrides.clear()
+        del os.environ["ML_PRAZO_BUSCA"]
+
+    mensagem = "O Mercado Livre demorou demais para responder. Tente novamente."
+    for resposta in respostas:
+        assert resposta.status_code == 504
+        assert resposta.json() == {"total": 0, "produtos": [], "erro": mensagem, "proximo_cursor": None}
+    assert len(leituras) == 1 and leituras[0] <= 0.2
+    print("✅ Timeout e orçamento esgotado com status 504")
+
+
+if __name__ == "__main__":
+    test_falha_transitoria_repetida()
+    test_post_nao_repetido()
+    test_orcamento_limita_tentativas()
+    test_timeouts_separados_e_limitados()
+    test_cabecalhos_de_orcamento()
+    test_rota_responde_504()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Teste 27: Seleção de Campos e Compressão nas Chamadas ao Upstream
+"""
+
+import gzip
+import json
+import sys
+import os
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import ACEITA_COMPRESSAO, TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.services.selecao_campos import BUSCA, BUSCA_FALLBACK, CAMPOS_ITEM, ITENS
+from servidor_falso_ml import gerar_item, selecionar_campos
+
+
+def criar_servico(responder):
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=0)
+    return servico
+
+
+def test_campos_e_compressao():
+    """Buscas e /items pedem só os campos usados, com gzip; bytes recebidos contabilizados"""
+    print("🧪 Teste 27: Seleção de Campos e Compressão nas Chamadas ao Upstream")
+    print("=" * 50)
+    print("\n[1/3] Testando campos pedidos...")
+
+    pedidos = []
+
+    def responder(request):
+        pedidos.append(request)
+        if request.url.path == "/items":
+            corpo = [{"code": 200, "body": gerar_item(int(i[3:]))} for i in request.url.params["ids"].split(",")]
+        elif request.url.path == "/products/search":
+            corpo = {"results": []}
+        else:
+            corpo = {"results": [{**gerar_item(1), "thumbnail": None, "pictures": []}]}
+        conteudo = gzip.compress(json.dumps(selecionar_campos(corpo, request.url.params.get("attributes"))).encode())
+        return httpx.Response(200, content=conteudo, headers={"Content-Encoding": "gzip"})
+
+    servico = criar_servico(responder)
+    resposta = servico.buscar_produtos("tenis", limit=5, enriquecer=True)
+    assert resposta["total"] == 1 and resposta["produtos"][0]["imagem"].startswith("https://")
+
+    assert [r.url.path for r in pedidos] == ["/products/search", "/sites/MLB/search", "/items"]
+    for request in pedidos[:2]:
+        assert request.url.params["attributes"].split(",") == [f"results.{c}" for c in CAMPOS_ITEM]
+    assert pedidos[2].url.params["attributes"].split(",") == list(CAMPOS_ITEM)
+    assert all(r.headers["Accept-Encoding"] == ACEITA_COMPRESSAO for r in pedidos)
+
+    recebidos = servico.transporte.estatisticas()["bytes_recebidos"]
+    assert 0 < recebidos < sum(len(json.dumps(gerar_item(1))) for _ in range(3))
+    assert set(servico.estatisticas()["selecao_campos"].values()) == {"ativa"}
+    print(f"✅ attributes= nos 3 endpoints, {ACEITA_COMPRESSAO}, {recebidos} bytes recebidos")
+
+
+def test_selecao_recusada():
+    """400 à seleção repete o pedido completo e desliga a seleção só naquele endpoint"""
+    print("\n[2/3] Testando seleção recusada...")
+
+    pedidos = []
+
+    def responder(request):
+        pedidos.append(request.url.params.get("attributes"))
+        if request.url.params.get("attributes"):
+            return httpx.Response(400, json={"message": "invalid attributes"})
+        return httpx.Response(200, json={"results": [gerar_item(1)]})
+
+    servico = criar_servico(responder)
+    for _ in range(2):
+        assert servico.buscar_produtos("tenis", limit=5)["total"] == 1
+
+    assert [bool(a) for a in pedidos] == [True, False, False]
+    estado = servico.estatisticas()["selecao_campos"]
+    assert estado[BUSCA] == "HTTP 400" and estado[BUSCA_FALLBACK] == "ativa" and estado[ITENS] == "ativa"
+
+    # 400 também sem a seleção: a culpa não é dela, a seleção continua
+    servico = criar_servico(lambda request: httpx.Response(400, json={"message": "bad request"}))
+    servico.buscar_produtos("tenis", limit=5)
+    assert servico.estatisticas()["selecao_campos"][BUSCA] == "ativa"
+    print("✅ Pedido completo após o 400 e seleção desligada no endpoint")
+
+
+def test_selecao_ignorada():
+    """Resposta 200 sem os campos pedidos também volta ao payload completo"""
+    print("\n[3/3] Testando seleção ignorada...")
+
+    pedidos = []
+
+    def responder(request):
+        pedidos.append(request.url.params.get("attributes"))
+        if request.url.params.get("attributes"):
+            return httpx.Response(200, json={})
+        return httpx.Response(200, json={"results": [gerar_item(1)]})
+
+    servico = criar_servico(responder)
+    assert servico.buscar_produtos("tenis", limit=5)["total"] == 1
+    assert [bool(a) for a in pedidos] == [True, False]
+    assert servico.estatisticas()["selecao_campos"][BUSCA] == "campos ausentes na resposta"
+
+    # Busca sem resultados não conta como seleção ignorada
+    servico = criar_servico(lambda request: httpx.Response(200, json={"results": []}))
+    servico.buscar_produtos("nada", limit=5)
+    assert set(servico.estatisticas()["selecao_campos"].values()) == {"ativa"}
+    print("✅ Payload completo quando a seleção é ignorada")
+
+
+if __name__ == "__main__":
+    test_campos_e_compressao()
+    test_selecao_recusada()
+    test_selecao_ignorada()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Teste 13: Serialização Rápida da Busca
+"""
+
+import sys
+import os
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import routes
+from app.api.dependencias import obter_produtos_service
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.utils import json_rapido
+from servidor_falso_ml import gerar_item
+
+
+def criar_servico():
+    def responder(request):
+        itens = [gerar_item(i) for i in range(int(request.url.params["limit"]))]
+        itens[1]["title"] = "Câmera fotográfica ação"
+        del itens[2]["thumbnail"], itens[2]["pictures"], itens[2]["prices"]
+        return httpx.Response(200, json={"results": itens})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=0)
+    return servico
+
+
+def buscar(validar: bool, params: dict) -> bytes:
+    servico, original = criar_servico(), routes.VALIDAR_RESPOSTA
+    app.dependency_overrides[obter_produtos_service] = lambda: servico
+    routes.VALIDAR_RESPOSTA = validar
+    try:
+        resposta = TestClient(app).get("/api/buscar", params=params)
+    finally:
+        app.dependency_overrides.clear()
+        routes.VALIDAR_RESPOSTA = original
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"] == "application/json"
+    return resposta.content
+
+
+def test_mesmos_bytes_que_a_validacao():
+    """Resposta rápida é idêntica, byte a byte, à validada pelo response_model"""
+    print("🧪 Teste 13: Serialização Rápida da Busca")
+    print("=" * 50)
+    print("\n[1/3] Comparando com a resposta validada...")
+
+    params = {"q": "camera", "limit": 50}
+    rapida = buscar(False, params)
+    assert rapida == buscar(True, params)
+    assert "Câmera".encode() in rapida
+    print(f"✅ {len(rapida)} bytes idênticos")
+
+
+def test_fallback_sem_orjson():
+    """Sem orjson, o json da biblioteca padrão produz a mesma saída"""
+    print("\n[2/3] Testando fallback sem orjson...")
+
+    params = {"q": "camera", "limit": 10}
+    com_orjson = buscar(False, params)
+    original = json_rapido.ORJSON_DISPONIVEL
+    json_rapido.ORJSON_DISPONIVEL = False
+    try:
+        sem_orjson = buscar(False, params)
+    finally:
+        json_rapido.ORJSON_DISPONIVEL = original
+
+    assert com_orjson == sem_orjson
+    print(f"✅ Saídas iguais (orjson disponível: {original})")
+
+
+def test_schema_openapi_mantido():
+    """O OpenAPI continua documentando RespostaBusca em /api/buscar"""
+    print("\n[3/3] Testando schema OpenAPI...")
+
+    esquema = TestClient(app).get("/openapi.json").json()
+    resposta_200 = esquema["paths"]["/api/buscar"]["get"]["responses"]["200"]
+    assert resposta_200["content"]["application/json"]["schema"]["$ref"].endswith("/RespostaBusca")
+    assert "Produto" in esquema["components"]["schemas"]
+    print("✅ RespostaBusca documentada")
+
+
+if __name__ == "__main__":
+    test_mesmos_bytes_que_a_validacao()
+    test_fallback_sem_orjson()
+    test_schema_openapi_mantido()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Teste 22: Tempo por Etapa (Server-Timing) e Perfil de Requisições Lentas
+"""
+
+import asyncio
+import sys
+import os
+import tempfile
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ML_CLIENT_ID", "teste")
+os.environ.setdefault("ML_CLIENT_SECRET", "teste")
+os.environ.setdefault("ML_ACCESS_TOKEN", "token-teste")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import routes
+from app.api.dependencias import obter_produtos_service
+from app.api.tempos_requisicao import TemposRequisicao
+from app.services.cache_busca import CacheBusca
+from app.services.cliente_http import TransporteHTTP
+from app.services.produtos_mercadolivre import ProdutosMercadoLivre
+from app.utils.perfilador import Perfilador
+from servidor_falso_ml import gerar_item
+
+ATRASO_UPSTREAM = 0.05
+
+
+def criar_servico():
+    async def responder(request):
+        await asyncio.sleep(ATRASO_UPSTREAM)
+        offset = int(request.url.params.get("offset", 0))
+        limite = int(request.url.params["limit"])
+        return httpx.Response(200, json={"results": [gerar_item(offset + i) for i in range(limite)]})
+
+    servico = ProdutosMercadoLivre()
+    servico.transporte = TransporteHTTP(transporte_interno=httpx.MockTransport(responder))
+    servico.cache = CacheBusca(ttl=0)
+    return servico
+
+
+def buscar(aplicacao, **params):
+    app.dependency_overrides[obter_produtos_service] = criar_servico
+    try:
+        return TestClient(aplicacao).get("/api/buscar", params={"q": "tenis", **params})
+    finally:
+        app.dependency_overrides.clear()
+
+
+def etapas(resposta):
+    """{nome: (ms, desc)} do cabeçalho Server-Timing."""
+    resultado = {}
+    for parte in resposta.headers["Server-Timing"].split(", "):
+        nome, *atributos = parte.split(";")
+        valores = dict(atributo.split("=", 1) for atributo in atributos)
+        resultado[nome] = (float(valores["dur"]), valores.get("desc"))
+    return resultado
+
+
+def test_server_timing():
+    """A busca devolve o tempo de cada etapa em Server-Timing"""
+    print("🧪 Teste 22: Tempo por Etapa e Perfil de Requisições Lentas")
+    print("=" * 50)
+    print("\n[1/4] Testando Server-Timing...")
+
+    resposta = buscar(app, limit=100)
+    assert resposta.status_code == 200 and resposta.json()["total"] == 100
+    medidas = etapas(resposta)
+
+    for nome in ("token", "upstream", "json", "formatar", "ordenar", "serializacao", "total"):
+        assert nome in medidas, nome
+    # Duas páginas buscadas em paralelo: a etapa soma as duas
+    assert medidas["upstream"] == (medidas["upstream"][0], '"2x"')
+    assert medidas["upstream"][0] >= 2 * ATRASO_UPSTREAM * 1000
+    assert ATRASO_UPSTREAM * 1000 <= medidas["total"][0] < medidas["upstream"][0]
+    assert "tempos_ms" not in resposta.json()
+    print("✅ " + ", ".join(f"{nome}={ms:.1f}ms" for nome, (ms, _) in medidas.items()))
+
+
+def test_campo_tempos_e_validacao():
+    """tempos=true repete as etapas no corpo; com validação ligada, a etapa validacao aparece"""
+    print("\n[2/4] Testando campo tempos_ms...")
+
+    tempos = buscar(app, limit=5, tempos="true").json()["tempos_ms"]
+    assert set(tempos) >= {"token", "upstream", "json", "formatar", "ordenar"}
+
+    routes.VALIDAR_RESPOSTA = True
+    try:
+        resposta = buscar(app, limit=5, tempos="true")
+    finally:
+        routes.VALIDAR_RESPOSTA = False
+    assert "validacao" in etapas(resposta)
+    assert resposta.json()["tempos_ms"]["upstream"] > 0
+    assert "tempos_ms" not in buscar(app, limit=5).json()
+    print(f"✅ tempos_ms: {tempos}")
+
+
+def test_perfil_de_requisicao_lenta():
+    """Requisições acima do limiar têm o perfil gravado; as rápidas não"""
+    print("\n[3/4] Testando perfil de requisição lenta...")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        aplicacao = TemposRequisicao(app)
+        aplicacao.perfilador = Perfilador(limiar_ms=ATRASO_UPSTREAM * 1000 / 2, amostragem=1, diretorio=diretorio)
+        assert buscar(aplicacao, limit=5).status_code == 200
+        perfis = os.listdir(diretorio)
+        assert len(perfis) == 1 and "_api_buscar" in perfis[0]
+        with open(os.path.join(diretorio, perfis[0]), encoding="utf-8") as arquivo:
+            assert "Samples:" in arquivo.read()
+
+        aplicacao.perfilador = Perfilador(limiar_ms=60_000, amostragem=1, diretorio=diretorio)
+        buscar(aplicacao, limit=5)
+        assert len(os.listdir(diretorio)) == 1
+    print(f"✅ Perfil gravado: {perfis[0]}")
+
+
+def test_perfil_desativado_por_padrao():
+    """Sem ML_PERFIL_LIMIAR_MS nenhuma requisição é perfilada"""
+    print("\n[4/4] Testando perfil desativado...")
+
+    perfilador = Perfilador()
+    assert not perfilador.ativo
+    assert perfilador.iniciar() is None
+
+    # Uma requisição perfilada por vez
+    perfilador = Perfilador(limiar_ms=1, amostragem=1)
+
+    async def duas():
+        primeiro = perfilador.iniciar()
+        segundo = perfilador.iniciar()
+        perfilador.parar(primeiro, 0)
+        return primeiro, segundo
+
+    primeiro, segundo = asyncio.run(duas())
+    assert primeiro is not None and segundo is None
+    print("✅ Desativado por padrão, um perfil por vez")
+
+
+if __name__ == "__main__":
+    test_server_timing()
+    test_campo_tempos_e_validacao()
+    test_perfil_de_requisicao_lenta()
+    test_perfil_desativado_por_padrao()
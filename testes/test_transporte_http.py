@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Teste 6: Pool de Conexões Compartilhado
+"""
+
+import asyncio
+import sys
+import os
+
+import httpx
+
+# Adiciona pasta raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cliente_http import TransporteHTTP
+from servidor_falso_ml import iniciar_ml_falso
+
+
+def test_limite_por_host():
+    """Nunca mais que max_por_host requisições simultâneas para o mesmo host"""
+    print("🧪 Teste 6: Pool de Conexões Compartilhado")
+    print("=" * 50)
+    print("\n[1/2] Testando limite de requisições por host...")
+
+    em_andamento = 0
+    pico = 0
+
+    async def responder(request):
+        nonlocal em_andamento, pico
+        em_andamento += 1
+        pico = max(pico, em_andamento)
+        await asyncio.sleep(0.01)
+        em_andamento -= 1
+        return httpx.Response(200, json={"results": []})
+
+    transporte = TransporteHTTP(max_por_host=3, transporte_interno=httpx.MockTransport(responder))
+
+    async def disparar():
+        cliente = transporte.cliente()
+        await asyncio.gather(*(cliente.get("http://ml.teste/products/search") for _ in range(20)))
+        await transporte.fechar()
+
+    asyncio.run(disparar())
+
+    assert pico == 3
+    assert transporte.estatisticas()["requisicoes"] == 20
+    print(f"✅ Pico de {pico} requisições simultâneas")
+
+
+def test_reuso_de_conexoes():
+    """Requisições sequenciais (síncronas e assíncronas) reaproveitam conexões"""
+    print("\n[2/2] Testando reuso de conexões...")
+
+    processo, url = iniciar_ml_falso(atraso=0)
+    try:
+        transporte = TransporteHTTP()
+
+        async def sequencial():
+            for _ in range(10):
+                resposta = await transporte.cliente().get(f"{url}/products/search")
+                assert resposta.status_code == 200
+
+        asyncio.run(sequencial())
+        for _ in range(10):
+            transporte.executar(sequencial())
+
+        estatisticas = transporte.estatisticas()
+        assert estatisticas["requisicoes"] == 110
+        assert estatisticas["conexoes_novas"] == 2
+        assert estatisticas["conexoes_ociosas"] >= 1
+        print(f"✅ Taxa de reuso: {estatisticas['taxa_reuso']:.0%}")
+    finally:
+        processo.terminate()
+
+
+if __name__ == "__main__":
+    test_limite_por_host()
+    test_reuso_de_conexoes()